@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark: catalog KPIs with NumPy vs. per-row Python dicts
+
+Usage:
+    python benchmarks/bench_analytics.py [order_lines] [items]
+"""
+import sys
+
+from bench_common import use_temp_database, drop_temp_database, seed_reference_data, seed_completed_orders, timed
+
+from database.db_connection import get_connection
+
+
+def kpis_with_dicts(start, end, days):
+    """Reference implementation: the same KPIs built row by row"""
+    conn = get_connection()
+    items = {row[0]: {"quantity": row[1], "price": row[2] or 0, "sold": 0, "revenue": 0.0, "received": 0}
+             for row in conn.execute("SELECT id, quantity, price FROM items")}
+    for table, lines, key in (("sales_orders", "sales_order_lines", "sold"),
+                              ("purchase_orders", "purchase_order_lines", "received")):
+        for item_id, qty, total in conn.execute(f"""
+            SELECT l.item_id, l.quantity, l.total_price
+            FROM {lines} l JOIN {table} o ON l.order_id = o.id
+            WHERE o.status = 'COMPLETED' AND o.completed_at >= ? AND o.completed_at <= ?
+        """, (start, end)):
+            item = items.get(item_id)
+            if item:
+                item[key] += qty
+                if key == "sold":
+                    item["revenue"] += total
+    conn.close()
+
+    total_revenue = sum(i["revenue"] for i in items.values())
+    running = 0.0
+    for item in sorted(items.values(), key=lambda i: -i["revenue"]):
+        share = running / total_revenue if total_revenue else 1
+        item["abc"] = "A" if share < 0.8 and item["revenue"] > 0 else "B" if share < 0.95 and item["revenue"] > 0 else "C"
+        running += item["revenue"]
+        opening = max(item["quantity"] + item["sold"] - item["received"], 0)
+        average = (opening + item["quantity"]) / 2
+        item["turnover"] = item["sold"] / average if average else None
+        item["days_of_supply"] = item["quantity"] / (item["sold"] / days) if item["sold"] else None
+        available = item["sold"] + item["quantity"]
+        item["sell_through"] = item["sold"] / available * 100 if available else None
+        item["stock_to_sales"] = item["quantity"] * item["price"] / item["revenue"] if item["revenue"] else None
+    return items
+
+
+def main():
+    n_lines = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    n_items = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+
+    path = use_temp_database()
+    try:
+        conn = get_connection()
+        user_id = seed_reference_data(conn, n_items=n_items)
+        with timed(f"seed {n_lines:,} sales lines over {n_items:,} items", ops=n_lines):
+            seed_completed_orders(conn, "sales_orders", "sales_order_lines", "customer_id",
+                                  n_lines, 365, user_id, 200, n_items=n_items)
+            seed_completed_orders(conn, "purchase_orders", "purchase_order_lines", "supplier_id",
+                                  n_lines // 10, 365, user_id, 50, n_items=n_items)
+        conn.close()
+        from models.rollup_model import rebuild_rollups
+        with timed("rebuild_rollups (backfill job)"):
+            rebuild_rollups()
+        print()
+
+        from models.analytics_model import compute_inventory_kpis, kpi_rows
+        with timed("compute_inventory_kpis (NumPy)", ops=n_lines):
+            result = compute_inventory_kpis()
+        with timed("kpi_rows top 100"):
+            kpi_rows(result["columns"], limit=100)
+        with timed("per-row dict baseline", ops=n_lines):
+            baseline = kpis_with_dicts(result["start_date"], result["end_date"], result["period_days"])
+
+        # Both implementations must agree
+        columns = result["columns"]
+        for pos in range(0, len(columns["item_id"]), max(len(columns["item_id"]) // 50, 1)):
+            row = baseline[int(columns["item_id"][pos])]
+            assert row["sold"] == columns["units_sold"][pos]
+            assert row["abc"] == columns["abc_class"][pos]
+        print(f"\nsummary: {result['summary']}")
+    finally:
+        drop_temp_database(path)
+
+
+if __name__ == "__main__":
+    main()
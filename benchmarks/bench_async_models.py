@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Benchmark: async facade vs. synchronous model calls
+
+Usage:
+    python benchmarks/bench_async_models.py [requests] [connections]
+"""
+import asyncio
+import random
+import sys
+
+from bench_common import use_temp_database, drop_temp_database, seed_reference_data, timed
+
+from database.db_connection import get_connection
+from models import inventory_model, customer_model
+from models.async_models import AsyncModels
+
+
+def main():
+    n_requests = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    n_connections = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    path = use_temp_database()
+    try:
+        conn = get_connection()
+        seed_reference_data(conn, n_items=5000, n_customers=500)
+        conn.close()
+
+        item_ids = [random.randint(1, 5000) for _ in range(n_requests)]
+        customer_ids = [random.randint(1, 500) for _ in range(n_requests)]
+
+        print(f"{n_requests} lightweight reads (get_item + get_customer), {n_connections} connections\n")
+
+        with timed("sync, one connection per call", ops=2 * n_requests):
+            for item_id, customer_id in zip(item_ids, customer_ids):
+                inventory_model.get_item(item_id)
+                customer_model.get_customer(customer_id)
+
+        async def run_async():
+            async with AsyncModels(max_connections=n_connections) as db:
+                calls = []
+                for item_id, customer_id in zip(item_ids, customer_ids):
+                    calls.append(db.inventory.get_item(item_id))
+                    calls.append(db.customers.get_customer(customer_id))
+                results = await db.gather(*calls)
+            return results
+
+        with timed("async facade, gather over pinned pool", ops=2 * n_requests):
+            results = asyncio.run(run_async())
+
+        assert all(r["success"] for r in results)
+    finally:
+        drop_temp_database(path)
+
+
+if __name__ == "__main__":
+    main()
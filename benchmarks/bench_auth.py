@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Benchmark: a burst of logins, then follow-up requests by password vs. session token
+
+Usage:
+    python benchmarks/bench_auth.py [logins] [requests]
+"""
+import sys
+import threading
+import time
+
+from bench_common import use_temp_database, drop_temp_database, timed
+
+from models.user_model import authenticate, create_user
+from utils.auth_service import submit_login, validate_session, shutdown_auth_service
+
+
+def main():
+    n_logins = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    n_requests = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    path = use_temp_database()
+    try:
+        users = [create_user(password="benchpass1", username=f"bench{i}")["username"] for i in range(n_logins)]
+
+        # How long a 10 ms timer on the caller's thread is held up during the burst
+        lag = []
+        stop = threading.Event()
+
+        def ticker():
+            while not stop.is_set():
+                start = time.perf_counter()
+                time.sleep(0.01)
+                lag.append(time.perf_counter() - start - 0.01)
+
+        thread = threading.Thread(target=ticker, daemon=True)
+        thread.start()
+        with timed(f"{n_logins} logins through the auth pool"):
+            futures = [submit_login(name, "benchpass1") for name in users]
+            results = [future.result() for future in futures]
+        stop.set()
+        thread.join()
+        tokens = [result["token"] for result in results if result["success"]]
+        print(f"  {len(tokens)} signed in, {n_logins - len(tokens)} turned away (queue limit)")
+        print(f"  worst timer lag during burst: {max(lag) * 1000:.1f} ms")
+
+        with timed(f"{n_requests} requests re-verifying the password"):
+            for i in range(n_requests):
+                assert authenticate(users[i % n_logins], "benchpass1")
+        with timed(f"{n_requests} requests presenting a session token"):
+            for i in range(n_requests):
+                assert validate_session(tokens[i % len(tokens)])
+    finally:
+        shutdown_auth_service()
+        drop_temp_database(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Benchmark: barcode images for item dialogs, cold vs. disk cache vs. memory cache
+
+Each "dialog open" fetches the barcode scaled to the dialog width, as
+get_barcode_tk_image does before wrapping it in a Tk PhotoImage. With
+more items than fit in IMAGE_CACHE_MEMORY_BYTES the memory pass falls back
+to the disk cache.
+
+Usage:
+    python benchmarks/bench_barcode_images.py [items]
+"""
+import sys
+import tempfile
+import time
+
+from bench_common import timed
+
+from utils import barcode_utils
+from utils.barcode_utils import barcode_display_image, generate_barcode_number, clear_image_cache
+
+
+def open_dialogs(codes):
+    start = time.perf_counter()
+    for item_id, code in codes:
+        assert barcode_display_image(code, f"Bench Item {item_id}", width=400) is not None
+    return (time.perf_counter() - start) / len(codes) * 1000
+
+
+def main():
+    n_items = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    codes = [(i, generate_barcode_number(i, f"BENCH-{i:07d}")) for i in range(n_items)]
+
+    with tempfile.TemporaryDirectory() as folder:
+        barcode_utils.IMAGE_CACHE_DIR = folder
+        clear_image_cache(disk=True)
+        with timed(f"{n_items} dialogs, cold (render + write cache)"):
+            cold = open_dialogs(codes)
+        clear_image_cache()
+        with timed(f"{n_items} dialogs, disk cache (new process)"):
+            disk = open_dialogs(codes)
+        with timed(f"{n_items} dialogs, memory cache"):
+            memory = open_dialogs(codes)
+        clear_image_cache(disk=True)
+
+    print(f"\nper dialog open: cold {cold:.2f} ms, disk {disk:.2f} ms, memory {memory:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
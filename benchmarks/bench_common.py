@@ -0,0 +1,112 @@
+"""
+Shared helpers for the benchmark scripts
+
+Benchmarks never touch the real inventory.db: they point the connection
+module at a throwaway database file and build the schema there.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database import db_connection
+from database.db_setup import setup_database
+
+
+def use_temp_database():
+    """Redirect all connections to a fresh temporary database and return its path"""
+    fd, path = tempfile.mkstemp(prefix="inventory_bench_", suffix=".db")
+    os.close(fd)
+    db_connection.DB_PATH = path
+    setup_database()
+    return path
+
+
+def drop_temp_database(path):
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def seed_reference_data(conn, n_items=1000, n_customers=200, n_suppliers=50):
+    """Insert a user, items, customers and suppliers in bulk; returns the user id"""
+    cur = conn.cursor()
+    cur.execute("INSERT INTO users (username, password, role) VALUES ('bench', 'x', 'ADMIN')")
+    user_id = cur.lastrowid
+    cur.executemany(
+        "INSERT INTO items (name, sku, quantity, price) VALUES (?, ?, ?, ?)",
+        ((f"Bench Item {i}", f"BENCH-{i:07d}", 1000, 5.0 + (i % 50)) for i in range(n_items))
+    )
+    cur.executemany(
+        "INSERT INTO customers (name, email) VALUES (?, ?)",
+        ((f"Bench Customer {i}", f"c{i}@bench.local") for i in range(n_customers))
+    )
+    cur.executemany(
+        "INSERT INTO suppliers (name, email) VALUES (?, ?)",
+        ((f"Bench Supplier {i}", f"s{i}@bench.local") for i in range(n_suppliers))
+    )
+    conn.commit()
+    return user_id
+
+
+def seed_completed_orders(conn, table, lines_table, party_col, n, days, user_id, n_parties, n_items=1000):
+    """
+    Bulk insert n completed single-line orders spread evenly over the last `days` days
+
+    Each order also gets its ledger row (with a placeholder quantity_after).
+    """
+    rng = random.Random(42)
+    now = datetime.now()
+    utc_now = datetime.now(timezone.utc)
+    step = timedelta(days=days) / n
+    cur = conn.cursor()
+    cur.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}")
+    first_id = cur.fetchone()[0] + 1
+    prefix = "BS" if table == "sales_orders" else "BP"
+    reason, reference_type, sign = ("SALE", "SALES_ORDER", -1) if table == "sales_orders" else ("PURCHASE", "PURCHASE_ORDER", 1)
+
+    batch = 50_000
+    for start in range(0, n, batch):
+        headers, lines, movements = [], [], []
+        for i in range(start, min(start + batch, n)):
+            item_id = rng.randint(1, n_items)
+            qty = rng.randint(1, 10)
+            price = 5.0 + item_id % 50
+            ts = (now - step * (n - i)).isoformat()
+            headers.append((first_id + i, f"{prefix}-{i:09d}", 1 + i % n_parties, item_id, qty, price,
+                            qty * price, "COMPLETED", user_id, ts, ts))
+            lines.append((first_id + i, 1, item_id, qty, price, qty * price))
+            movements.append((item_id, sign * qty, reason, reference_type, first_id + i,
+                              (utc_now - step * (n - i)).strftime("%Y-%m-%d %H:%M:%S")))
+        cur.executemany(f"""
+            INSERT INTO {table} (id, order_number, {party_col}, item_id, quantity, unit_price,
+                                 total_price, status, created_by, created_at, completed_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, headers)
+        cur.executemany(f"""
+            INSERT INTO {lines_table} (order_id, line_no, item_id, quantity, unit_price, total_price)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, lines)
+        cur.executemany("""
+            INSERT INTO inventory_movements
+                (item_id, change, quantity_after, reason, reference_type, reference_id, created_at)
+            VALUES (?, ?, 0, ?, ?, ?, ?)
+        """, movements)
+        conn.commit()
+
+
+@contextmanager
+def timed(label, ops=None):
+    """Print wall-clock time (and throughput when ops is given) for a block"""
+    start = time.perf_counter()
+    yield
+    elapsed = time.perf_counter() - start
+    if ops:
+        print(f"{label:<45} {elapsed * 1000:10.1f} ms  {ops / elapsed:12,.0f} ops/s")
+    else:
+        print(f"{label:<45} {elapsed * 1000:10.1f} ms")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark: rendering a low stock alert for many items
+
+Compares the f-string concatenation the alert used before templates (kept
+here as the baseline) with the templates in utils.email_templates.
+
+Usage:
+    python benchmarks/bench_email_templates.py [items] [repeats]
+"""
+import sys
+import time
+
+from bench_common import timed
+
+from utils.email_notifications import _low_stock_content
+from utils.email_templates import get_template
+
+
+def legacy_low_stock_content(items):
+    """The pre-template renderer: inline CSS and += per item"""
+    subject = f"🔴 Low Stock Alert - {len(items)} Items Need Attention"
+    html_body = """
+    <html>
+    <head>
+        <style>
+            body { font-family: Arial, sans-serif; }
+            .header { background-color: #dc2626; color: white; padding: 20px; }
+            .content { padding: 20px; }
+            .item { background-color: #fee2e2; padding: 10px; margin: 10px 0; border-radius: 5px; }
+            .item-name { font-weight: bold; color: #991b1b; }
+            .footer { padding: 20px; font-size: 12px; color: #666; }
+        </style>
+    </head>
+    <body>
+        <div class="header">
+            <h2>⚠️ Low Stock Alert</h2>
+        </div>
+        <div class="content">
+            <p>The following items are running low and need to be restocked:</p>
+    """
+    for item in items:
+        if item['quantity'] == 0:
+            status = "🔴 OUT OF STOCK"
+        elif item['quantity'] <= item.get('min_stock_level', 10):
+            status = "🟡 LOW STOCK"
+        else:
+            status = "⚠️ REORDER SOON"
+        html_body += f"""
+            <div class="item">
+                <div class="item-name">{item['name']} ({item['sku']})</div>
+                <div>Status: {status}</div>
+                <div>Current Quantity: {item['quantity']}</div>
+                <div>Min Stock Level: {item.get('min_stock_level', 10)}</div>
+                <div>Price: ${item['price']:.2f}</div>
+            </div>
+        """
+    html_body += """
+        </div>
+        <div class="footer">
+            <p>This is an automated notification from your Inventory Management System.</p>
+            <p>Please log in to the system to take action.</p>
+        </div>
+    </body>
+    </html>
+    """
+    text_body = f"Low Stock Alert - {len(items)} Items\n\n"
+    for item in items:
+        text_body += f"- {item['name']} ({item['sku']}): {item['quantity']} units\n"
+    return subject, html_body, text_body
+
+
+def best_of(render, items, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        render(items)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    n_items = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    items = [{"name": f"Bench Item {i} & Co", "sku": f"BENCH-{i:07d}", "quantity": i % 7,
+              "min_stock_level": 5, "price": 1.25 + i % 100} for i in range(n_items)]
+
+    with timed("parse templates (first use)"):
+        get_template("layout")
+        get_template("low_stock_item")
+    with timed(f"{n_items} items, f-string concatenation x{repeats}"):
+        legacy = best_of(legacy_low_stock_content, items, repeats)
+    with timed(f"{n_items} items, templates x{repeats}"):
+        templated = best_of(_low_stock_content, items, repeats)
+
+    size = len(_low_stock_content(items)[1]) / 1024
+    print(f"\nbest render: f-strings {legacy:.1f} ms, templates {templated:.1f} ms "
+          f"({legacy / templated:.2f}x); HTML {size:.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Benchmark: nightly demand forecast / reorder point job
+
+Usage:
+    python benchmarks/bench_forecast.py [skus] [sale_days_per_sku]
+"""
+import random
+import sys
+from datetime import date, timedelta
+
+from bench_common import use_temp_database, drop_temp_database, timed
+
+from database.db_connection import get_connection
+
+
+def main():
+    n_skus = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    sale_days = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+    path = use_temp_database()
+    try:
+        rng = random.Random(7)
+        yesterday = date.today() - timedelta(days=1)
+        days = [(yesterday - timedelta(days=d)).isoformat() for d in range(90)]
+        conn = get_connection()
+        with timed(f"seed {n_skus:,} items + ~{n_skus * sale_days:,} rollup rows"):
+            conn.executemany(
+                "INSERT INTO items (id, name, sku, quantity, price) VALUES (?, ?, ?, ?, ?)",
+                ((i, f"SKU {i}", f"FC-{i:08d}", 100, 9.99) for i in range(1, n_skus + 1))
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO daily_item_sales (day, item_id, quantity, revenue, order_count) VALUES (?, ?, ?, ?, 1)",
+                ((day, i, q, q * 9.99)
+                 for i in range(1, n_skus + 1)
+                 for day, q in ((rng.choice(days), rng.randint(1, 20)) for _ in range(sale_days)))
+            )
+            conn.commit()
+        conn.close()
+
+        from models.forecast_model import run_reorder_job
+        with timed(f"run_reorder_job dry run ({n_skus:,} SKUs)", ops=n_skus):
+            run_reorder_job(dry_run=True)
+        with timed(f"run_reorder_job ({n_skus:,} SKUs)", ops=n_skus):
+            result = run_reorder_job()
+        print(f"\n{result['message']}")
+        with timed(f"run_reorder_job again, nothing changed", ops=n_skus):
+            result = run_reorder_job()
+        print(f"\n{result['message']}")
+    finally:
+        drop_temp_database(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Benchmark: catalog label sheets, in-process vs. process pool
+
+Usage:
+    python benchmarks/bench_label_sheets.py [items] [workers]
+"""
+import os
+import sys
+import tempfile
+
+from bench_common import use_temp_database, drop_temp_database, seed_reference_data, timed
+
+from database.db_connection import get_connection
+from utils import barcode_utils
+from utils.barcode_utils import assign_missing_barcodes, clear_image_cache
+from utils.label_sheets import generate_label_sheets
+
+
+def main():
+    n_items = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+
+    path = use_temp_database()
+    try:
+        conn = get_connection()
+        seed_reference_data(conn, n_items=n_items)
+        conn.close()
+        with timed(f"assign barcodes to {n_items:,} items"):
+            assign_missing_barcodes()
+        print()
+
+        with tempfile.TemporaryDirectory() as folder:
+            barcode_utils.IMAGE_CACHE_DIR = os.path.join(folder, "cache")
+            for content, page_size in (("barcode", "A4"), ("both", "letter")):
+                for n_workers in sorted({1, workers}):
+                    # cold image cache each run, so rendering is measured
+                    clear_image_cache(disk=True)
+                    output = os.path.join(folder, f"labels_{content}_{n_workers}.pdf")
+                    with timed(f"{content} labels, {page_size} PDF, {n_workers} worker(s)"):
+                        result = generate_label_sheets(output, page_size=page_size, content=content,
+                                                       max_workers=n_workers)
+                    assert result["success"], result["message"]
+                    print(f"  {result['pages']} pages, {os.path.getsize(output) / 1024:.0f} KiB")
+    finally:
+        drop_temp_database(path)
+
+
+if __name__ == "__main__":
+    main()
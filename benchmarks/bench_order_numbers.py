@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Benchmark: order number generation and order creation rate
+
+Usage:
+    python benchmarks/bench_order_numbers.py [orders_per_process] [processes]
+"""
+import sys
+from multiprocessing import Pool
+
+from bench_common import use_temp_database, drop_temp_database, seed_reference_data, timed
+
+from database import db_connection
+from database.db_connection import get_connection
+
+
+def _init_worker(path):
+    db_connection.DB_PATH = path
+
+
+def _create_orders(args):
+    n, user_id = args
+    from models.sales_order_model import create_sales_order
+    numbers = []
+    for i in range(n):
+        result = create_sales_order(1 + i % 100, 1 + i % 1000, 1, 9.99, user_id)
+        if not result["success"]:
+            raise RuntimeError(result["message"])
+        numbers.append(result["order_number"])
+    return numbers
+
+
+def main():
+    per_process = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    processes = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    path = use_temp_database()
+    try:
+        conn = get_connection()
+        user_id = seed_reference_data(conn, n_items=1000, n_customers=100)
+        conn.close()
+
+        from models.sequence_model import next_order_number
+        n = 100_000
+        with timed(f"next_order_number x{n}", ops=n):
+            for _ in range(n):
+                next_order_number("BENCH")
+
+        total = per_process * processes
+        with timed(f"create_sales_order x{total} ({processes} processes)", ops=total):
+            with Pool(processes, initializer=_init_worker, initargs=(path,)) as pool:
+                batches = pool.map(_create_orders, [(per_process, user_id)] * processes)
+
+        numbers = [n for batch in batches for n in batch]
+        assert len(set(numbers)) == len(numbers), "duplicate order numbers"
+        print(f"\n{len(numbers)} orders, all order numbers unique")
+    finally:
+        drop_temp_database(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Benchmark: password hash cost per scheme, and the cost that hits a target time
+
+Prints the time of the configured hashers, then calibrates each scheme to
+the target and prints the environment settings that select it.
+
+Usage:
+    python benchmarks/bench_password_hashing.py [target_ms]
+"""
+import sys
+
+from bench_common import timed
+
+from utils.encryption import DEFAULT_SCHEME, HASHERS, calibrate, time_hash
+
+ENV_SETTING = {"pbkdf2": "PBKDF2_ITERATIONS", "scrypt": "SCRYPT_N"}
+
+
+def main():
+    target_ms = float(sys.argv[1]) if len(sys.argv) > 1 else 250.0
+
+    print(f"default scheme: {DEFAULT_SCHEME}")
+    for scheme, hasher in HASHERS.items():
+        print(f"  {scheme:<7} cost {hasher.cost():>9,}: {time_hash(hasher):7.1f} ms per hash")
+
+    print(f"\ncalibrating to {target_ms:.0f} ms per hash")
+    for scheme in HASHERS:
+        with timed(f"calibrate {scheme}"):
+            hasher = calibrate(scheme, target_ms)
+        print(f"  {ENV_SETTING[scheme]}={hasher.cost()} PASSWORD_HASHER={scheme}"
+              f"  ({time_hash(hasher):.1f} ms per hash)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Benchmark: full-catalog replenishment planning run
+
+Usage:
+    python benchmarks/bench_replenishment.py [items] [purchase_history_lines]
+"""
+import sys
+
+from bench_common import use_temp_database, drop_temp_database, seed_reference_data, seed_completed_orders, timed
+
+from database.db_connection import get_connection
+
+
+def main():
+    n_items = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    n_lines = int(sys.argv[2]) if len(sys.argv) > 2 else 500_000
+
+    path = use_temp_database()
+    try:
+        conn = get_connection()
+        user_id = seed_reference_data(conn, n_items=n_items)
+        with timed(f"seed {n_lines:,} completed purchase lines"):
+            seed_completed_orders(conn, "purchase_orders", "purchase_order_lines", "supplier_id",
+                                  n_lines, 365, user_id, 50, n_items=n_items)
+        # Put every third item at or below its reorder point
+        conn.execute("UPDATE items SET quantity = id % 25, reorder_point = 20 WHERE id % 3 = 0")
+        conn.commit()
+        conn.close()
+
+        from models.replenishment_model import plan_replenishment
+        with timed(f"plan_replenishment dry run ({n_items:,} items)", ops=n_items):
+            plan = plan_replenishment(user_id, dry_run=True)
+        print(f"  {plan['message']}, {len(plan['skipped'])} skipped")
+        with timed(f"plan_replenishment ({n_items:,} items)", ops=n_items):
+            result = plan_replenishment(user_id)
+        print(f"  {result['message']}")
+        with timed("plan_replenishment again, all on order", ops=n_items):
+            again = plan_replenishment(user_id)
+        print(f"  {again['message']}")
+        assert again["line_count"] == 0
+    finally:
+        drop_temp_database(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Benchmark: month-end report batch, sequential vs. concurrent
+
+Usage:
+    python benchmarks/bench_report_batch.py [order_lines] [items]
+"""
+import os
+import sys
+import tempfile
+
+from bench_common import use_temp_database, drop_temp_database, seed_reference_data, seed_completed_orders, timed
+
+from database.db_connection import get_connection
+
+ADMIN = {"id": 1, "username": "bench", "role": "ADMIN"}
+
+
+def main():
+    n_lines = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    n_items = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+
+    path = use_temp_database()
+    try:
+        conn = get_connection()
+        user_id = seed_reference_data(conn, n_items=n_items)
+        with timed(f"seed {n_lines:,} sales + {n_lines // 4:,} purchase lines"):
+            seed_completed_orders(conn, "sales_orders", "sales_order_lines", "customer_id",
+                                  n_lines, 365, user_id, 200, n_items=n_items)
+            seed_completed_orders(conn, "purchase_orders", "purchase_order_lines", "supplier_id",
+                                  n_lines // 4, 365, user_id, 50, n_items=n_items)
+        conn.close()
+        from models.rollup_model import rebuild_rollups
+        rebuild_rollups()
+        print()
+
+        from controllers.reports_controller import export_report_batch, clear_report_cache
+        with tempfile.TemporaryDirectory() as folder:
+            for file_format, workers in (("csv", 1), ("csv", 4), ("xlsx", 1), ("xlsx", 4)):
+                clear_report_cache()
+                target = folder if file_format == "csv" else os.path.join(folder, f"batch_{workers}.xlsx")
+                with timed(f"export_report_batch {file_format}, {workers} worker(s)"):
+                    result = export_report_batch(ADMIN, target, file_format=file_format, max_workers=workers)
+                assert result["success"], result["message"]
+                print(f"  wall clock {result['wall_clock']:.2f}s vs sum of parts {result['sum_of_parts']:.2f}s")
+                for report_type, seconds in result["timings"].items():
+                    print(f"    {report_type:<20} {seconds * 1000:8.1f} ms")
+    finally:
+        drop_temp_database(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Benchmark: date-range reports over a large order history
+
+Usage:
+    python benchmarks/bench_reports.py [sales_orders] [days_of_history]
+"""
+import sys
+from datetime import datetime, timedelta
+
+from bench_common import use_temp_database, drop_temp_database, seed_reference_data, seed_completed_orders, timed
+
+from database.db_connection import get_connection
+
+
+def main():
+    n_sales = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 3 * 365
+    n_purchases = max(n_sales // 10, 1)
+
+    path = use_temp_database()
+    try:
+        conn = get_connection()
+        user_id = seed_reference_data(conn)
+        with timed(f"seed {n_sales:,} sales + {n_purchases:,} purchase orders", ops=n_sales + n_purchases):
+            seed_completed_orders(conn, "sales_orders", "sales_order_lines", "customer_id", n_sales, days, user_id, 200)
+            seed_completed_orders(conn, "purchase_orders", "purchase_order_lines", "supplier_id", n_purchases, days, user_id, 50)
+        conn.close()
+        from models.rollup_model import rebuild_rollups
+        with timed("rebuild_rollups (backfill job)"):
+            rebuild_rollups()
+        conn = get_connection()
+        conn.execute("ANALYZE")
+        plan = conn.execute("""
+            EXPLAIN QUERY PLAN SELECT COUNT(*), SUM(total_price) FROM sales_orders
+            WHERE status = 'COMPLETED' AND completed_at >= ? AND completed_at <= ?
+        """, ("2024-01-01", "2024-02-01")).fetchall()
+        conn.close()
+        print("sales summary plan:", "; ".join(row[3] for row in plan))
+        print()
+
+        from models.reports_model import (
+            get_sales_report, get_purchase_report, get_stock_movement_report, get_profit_analysis
+        )
+        now = datetime.now()
+        ranges = [("last 7 days", 7), ("last 30 days", 30), ("last 90 days", 90),
+                  ("last 365 days", 365), ("all time", None)]
+        for label, span in ranges:
+            start = (now - timedelta(days=span)).isoformat() if span else None
+            end = now.isoformat() if span else None
+            with timed(f"get_sales_report {label}"):
+                report = get_sales_report(start, end)
+            with timed(f"get_purchase_report {label}"):
+                get_purchase_report(start, end)
+            with timed(f"get_stock_movement_report {label}"):
+                get_stock_movement_report(start, end)
+            with timed(f"get_profit_analysis {label}"):
+                get_profit_analysis(start, end)
+            print(f"  -> {report['total_orders']:,} sales orders in range\n")
+    finally:
+        drop_temp_database(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Benchmark: barcode scans via search_item_by_barcode vs. the in-memory index
+
+Usage:
+    python benchmarks/bench_scanner.py [items] [scans]
+"""
+import random
+import sys
+
+from bench_common import use_temp_database, drop_temp_database, seed_reference_data, timed
+
+from database.db_connection import get_connection
+from models.scan_model import ScanSession, load_barcode_index, lookup_barcode
+from utils.barcode_utils import assign_missing_barcodes, search_item_by_barcode
+
+
+def main():
+    n_items = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    n_scans = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+
+    path = use_temp_database()
+    try:
+        conn = get_connection()
+        seed_reference_data(conn, n_items=n_items)
+        conn.close()
+        assign_missing_barcodes()
+        conn = get_connection()
+        codes = [row[0] for row in conn.execute("SELECT barcode FROM items")]
+        conn.close()
+        scans = random.Random(42).choices(codes, k=n_scans)
+
+        with timed(f"{n_scans:,} scans, search_item_by_barcode"):
+            for code in scans:
+                search_item_by_barcode(code)
+        with timed(f"load index of {n_items:,} barcodes"):
+            load_barcode_index()
+        with timed(f"{n_scans:,} scans, lookup_barcode"):
+            for code in scans:
+                lookup_barcode(code)
+
+        session = ScanSession("receive")
+        with timed(f"{n_scans:,} scans into a session + commit"):
+            for code in scans:
+                session.scan(code)
+            result = session.commit()
+        assert result["success"], result["message"]
+        print(f"  {result['units']:,} units over {result['items']:,} items")
+    finally:
+        drop_temp_database(path)
+
+
+if __name__ == "__main__":
+    main()
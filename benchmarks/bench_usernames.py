@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark: generating a username as a prefix fills up
+
+Compares the old loop (a SELECT per random candidate, kept here as the
+baseline) with generate_username's single range query.
+
+Usage:
+    python benchmarks/bench_usernames.py [taken] [names]
+"""
+import random
+import sys
+
+from bench_common import use_temp_database, drop_temp_database, timed
+
+from database.db_connection import get_connection
+from models.user_model import generate_username
+
+
+def legacy_generate_username(prefix):
+    """The pre-change generator: probe random candidates one query at a time"""
+    conn = get_connection(); cur = conn.cursor()
+    try:
+        for queries in range(1, 10001):
+            candidate = prefix + f"{random.randint(0, 9999):04d}"
+            cur.execute("SELECT 1 FROM users WHERE username = ?", (candidate,))
+            if not cur.fetchone():
+                return candidate, queries
+        raise RuntimeError("Unable to generate a unique username.")
+    finally:
+        conn.close()
+
+
+def main():
+    n_taken = int(sys.argv[1]) if len(sys.argv) > 1 else 9_990
+    n_names = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    path = use_temp_database()
+    try:
+        conn = get_connection()
+        taken = random.Random(7).sample(range(10000), n_taken)
+        conn.executemany("INSERT INTO users (username, password, role) VALUES (?, 'x', 'STAFF')",
+                         [(f"ak{n:04d}",) for n in taken])
+        # other prefixes, so the index isn't just this one
+        conn.executemany("INSERT INTO users (username, password, role) VALUES (?, 'x', 'STAFF')",
+                         [(f"b{chr(97 + i % 26)}{i:04d}",) for i in range(10000)])
+        conn.commit()
+        conn.close()
+
+        queries = failures = 0
+        with timed(f"{n_names} names, prefix {n_taken:,}/10,000 taken, query per candidate"):
+            for _ in range(n_names):
+                try:
+                    queries += legacy_generate_username("ak")[1]
+                except RuntimeError:
+                    queries += 10000
+                    failures += 1
+        print(f"  {queries / n_names:,.0f} queries per name, {failures} gave up with free names left")
+        with timed(f"{n_names} names, prefix {n_taken:,}/10,000 taken, one range query"):
+            for _ in range(n_names):
+                generate_username("Alex", "King")
+    finally:
+        drop_temp_database(path)
+
+
+if __name__ == "__main__":
+    main()
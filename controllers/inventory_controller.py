@@ -1,7 +1,9 @@
 from models.inventory_model import get_items, add_item, update_item, delete_item, search_items
 from models.audit_log_model import log_action
+from models.forecast_model import run_reorder_job
 from utils.permissions import require_permission
-from utils.barcode_utils import generate_barcode_number, update_item_barcode
+from utils.barcode_utils import assign_item_barcode, assign_missing_barcodes as assign_missing
+from utils.label_sheets import generate_label_sheets
 import json
 
 def list_items():
@@ -20,9 +22,8 @@ def create_item(current_user: dict, payload: dict):
     if not payload.get('barcode'):
         # Create item first to get ID
         item_id = add_item(payload)
-        # Generate and update barcode
-        barcode_num = generate_barcode_number(item_id, payload.get('sku', ''))
-        update_item_barcode(item_id, barcode_num)
+        # Assign a collision-checked barcode
+        assign_item_barcode(item_id, payload.get('sku', ''))
     else:
         item_id = add_item(payload)
     
@@ -78,3 +79,64 @@ def remove_item(current_user: dict, item_id: int):
     )
     
     return result
+
+def recompute_reorder_points(current_user: dict, dry_run: bool = False, **options):
+    """ADMIN and STAFF can recompute min stock levels and reorder points from sales history"""
+    require_permission(current_user, 'edit_item')
+    result = run_reorder_job(dry_run=dry_run, **options)
+    
+    if result.get("success") and not dry_run:
+        log_action(
+            user_id=current_user['id'],
+            username=current_user['username'],
+            action='UPDATE',
+            resource_type='ITEM',
+            details=json.dumps({
+                'job': 'reorder_points',
+                'items_forecast': result['items_forecast'],
+                'items_updated': result['items_updated'],
+                'options': options
+            })
+        )
+    
+    return result
+
+def assign_missing_barcodes(current_user: dict):
+    """ADMIN and STAFF can give every item without a barcode its generated code"""
+    require_permission(current_user, 'edit_item')
+    result = assign_missing()
+    
+    if result.get("success") and result['assigned']:
+        log_action(
+            user_id=current_user['id'],
+            username=current_user['username'],
+            action='UPDATE',
+            resource_type='ITEM',
+            details=json.dumps({'job': 'assign_barcodes', 'items_updated': result['assigned']})
+        )
+    
+    return result
+
+def print_item_labels(current_user: dict, output_path: str, item_ids: list = None, page_size: str = "A4",
+                      content: str = "barcode", max_workers: int = None, progress=None):
+    """Anyone who can view inventory can print barcode/QR label sheets (PDF or PNG pages)"""
+    require_permission(current_user, 'view_inventory')
+    return generate_label_sheets(output_path, item_ids, page_size, content, max_workers, progress)
+
+def commit_scan_session(current_user: dict, session):
+    """ADMIN and STAFF can apply a scan session's counted quantities to stock"""
+    require_permission(current_user, 'edit_item')
+    mode = session.mode
+    result = session.commit()
+    
+    if result.get("success"):
+        log_action(
+            user_id=current_user['id'],
+            username=current_user['username'],
+            action='UPDATE',
+            resource_type='ITEM',
+            details=json.dumps({'job': 'scan_session', 'mode': mode,
+                                'items_updated': result['items'], 'units': result['units']})
+        )
+    
+    return result
@@ -1,9 +1,15 @@
-from models.user_model import authenticate, create_user
+from models.user_model import create_user
 from models.audit_log_model import log_action
+from utils.auth_service import login_with_password, validate_session, end_session
 
 def login(identifier: str, password: str):
-    user = authenticate(identifier, password)
-    if user:
+    """
+    Check the password on the auth service's worker pool. On success the
+    user dict carries a "session_token" for resume_session.
+    """
+    result = login_with_password(identifier, password)
+    if result["success"]:
+        user = dict(result["user"], session_token=result["token"])
         # Log successful login
         log_action(
             user_id=user['id'],
@@ -15,6 +21,16 @@ def login(identifier: str, password: str):
         return (True, user)
     return (False, None)
 
+def resume_session(token: str):
+    """Log back in with a session token instead of the password"""
+    user = validate_session(token)
+    if user:
+        return (True, dict(user, session_token=token))
+    return (False, None)
+
+def logout(token: str):
+    return end_session(token)
+
 def create_admin_account(form: dict):
     """
     Create an ADMIN account (used for initial setup or by existing ADMIN)
@@ -1,32 +1,38 @@
 from models.purchase_order_model import (
-    create_purchase_order as model_create_po,
+    create_purchase_order_with_lines as model_create_po,
     get_purchase_order as model_get_po,
     list_all_purchase_orders as model_list_po,
     update_purchase_order_status as model_update_po_status,
+    complete_purchase_order as model_complete_po,
     delete_purchase_order as model_delete_po
 )
-from models.inventory_model import get_item, update_item_quantity
+from models.replenishment_model import plan_replenishment as model_plan_replenishment
 from models.audit_log_model import log_action
 from utils.permissions import require_permission
+from utils.order_lines import parse_order_lines
 import json
 
 def create_purchase_order(user, form_data):
-    """Create a new purchase order (requires create_purchase permission)"""
+    """
+    Create a new purchase order (requires create_purchase permission)
+    
+    form_data may carry a "lines" list of {item_id, quantity, unit_price};
+    otherwise a single line is read from item_id, quantity and unit_price.
+    """
     require_permission(user, "create_purchase")
     
     try:
         supplier_id = int(form_data.get("supplier_id"))
-        item_id = int(form_data.get("item_id"))
-        quantity = int(form_data.get("quantity"))
-        unit_price = float(form_data.get("unit_price"))
-        notes = form_data.get("notes", "").strip() or None
+        lines = parse_order_lines(form_data)
+        notes = (form_data.get("notes") or "").strip() or None
         
-        if quantity <= 0:
-            return {"success": False, "message": "Quantity must be positive"}
-        if unit_price < 0:
-            return {"success": False, "message": "Unit price cannot be negative"}
+        for line in lines:
+            if line["quantity"] <= 0:
+                return {"success": False, "message": "Quantity must be positive"}
+            if line["unit_price"] < 0:
+                return {"success": False, "message": "Unit price cannot be negative"}
         
-        result = model_create_po(supplier_id, item_id, quantity, unit_price, user["id"], notes)
+        result = model_create_po(supplier_id, lines, user["id"], notes)
         
         if result.get("success"):
             # Log purchase order creation
@@ -35,18 +41,16 @@ def create_purchase_order(user, form_data):
                 username=user['username'],
                 action='CREATE',
                 resource_type='PURCHASE_ORDER',
-                resource_id=result.get('order_id'),
+                resource_id=result.get('id'),
                 details=json.dumps({
                     'supplier_id': supplier_id,
-                    'item_id': item_id,
-                    'quantity': quantity,
-                    'unit_price': unit_price,
-                    'total_amount': quantity * unit_price
+                    'lines': lines,
+                    'total_amount': sum(l['quantity'] * l['unit_price'] for l in lines)
                 })
             )
         
         return result
-    except (ValueError, KeyError) as e:
+    except (ValueError, KeyError, TypeError) as e:
         return {"success": False, "message": f"Invalid form data: {e}"}
 
 def list_purchase_orders(user, status=None):
@@ -62,37 +66,19 @@ def get_purchase_order(user, order_id):
 def complete_purchase_order(user, order_id):
     """
     Complete a purchase order and update inventory.
-    Increases item quantity by order quantity.
+    Increases item quantities by every line's quantity in one transaction.
     """
     require_permission(user, "create_purchase")
     
-    # Get order details
-    result = model_get_po(order_id)
-    if not result.get("success"):
-        return result
-    
-    order = result["order"]
-    
-    if order["status"] != "PENDING":
-        return {"success": False, "message": f"Cannot complete order with status: {order['status']}"}
-    
-    # Get current item quantity
-    item_result = get_item(order["item_id"])
-    if not item_result.get("success"):
-        return {"success": False, "message": "Item not found"}
-    
-    current_qty = item_result["item"]["quantity"]
-    new_qty = current_qty + order["quantity"]
-    
-    # Update item quantity
-    update_result = update_item_quantity(order["item_id"], new_qty)
-    if not update_result.get("success"):
-        return update_result
-    
-    # Update order status
-    status_result = model_update_po_status(order_id, "COMPLETED")
+    status_result = model_complete_po(order_id)
     if status_result.get("success"):
-        status_result["message"] = f"Purchase order completed. Item quantity increased by {order['quantity']} (from {current_qty} to {new_qty})"
+        items = status_result["items"]
+        line_count = status_result["line_count"]
+        if len(items) == 1:
+            line = items[0]
+            status_result["message"] = f"Purchase order completed. Item quantity increased by {line['quantity']} (from {line['old_quantity']} to {line['new_quantity']})"
+        else:
+            status_result["message"] = f"Purchase order completed. Inventory increased for {len(items)} items across {line_count} lines"
         
         # Log purchase order completion
         log_action(
@@ -101,12 +87,7 @@ def complete_purchase_order(user, order_id):
             action='COMPLETE',
             resource_type='PURCHASE_ORDER',
             resource_id=order_id,
-            details=json.dumps({
-                'item_id': order["item_id"],
-                'quantity_added': order["quantity"],
-                'old_quantity': current_qty,
-                'new_quantity': new_qty
-            })
+            details=json.dumps({'items': items, 'line_count': line_count})
         )
         
         # Send email notification if configured
@@ -117,7 +98,7 @@ def complete_purchase_order(user, order_id):
                     user['email'],
                     'purchase',
                     order_id,
-                    1  # Number of items (single item per order in this system)
+                    line_count
                 )
         except Exception as e:
             print(f"Email notification error: {e}")
@@ -159,3 +140,30 @@ def delete_purchase_order(user, order_id):
         )
     
     return result
+
+def plan_replenishment(user, method="eoq", dry_run=False, **quantity_options):
+    """
+    Create draft purchase orders for every item at or below its reorder point
+    (requires create_purchase permission). With dry_run the plan is only returned.
+    """
+    require_permission(user, "create_purchase")
+    result = model_plan_replenishment(user["id"], method, dry_run, **quantity_options)
+    
+    if result.get("success") and not dry_run:
+        # Log each generated purchase order
+        for order in result["orders"]:
+            log_action(
+                user_id=user['id'],
+                username=user['username'],
+                action='CREATE',
+                resource_type='PURCHASE_ORDER',
+                resource_id=order['id'],
+                details=json.dumps({
+                    'supplier_id': order['supplier_id'],
+                    'line_count': len(order['lines']),
+                    'total_amount': order['total_price'],
+                    'source': 'replenishment_planner'
+                })
+            )
+    
+    return result
@@ -1,15 +1,78 @@
 """
 Reports Controller for handling report generation with permissions
+
+Successful results are cached per (report type, parameters, write counters
+of the tables the report reads), so re-selecting a report returns at once
+and any committed change to those tables makes the next request recompute.
+Reports with an open-ended date range also key on today's date.
 """
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+
+from database import db_connection
+from database.db_executor import DatabaseExecutor
 from models.reports_model import (
     get_inventory_summary,
     get_sales_report,
     get_purchase_report,
     get_stock_movement_report,
     get_low_stock_report,
-    get_profit_analysis
+    get_profit_analysis,
+    get_data_versions
 )
+from models.analytics_model import compute_inventory_kpis, kpi_rows
+from models.trends_model import get_trend_series
 from utils.permissions import require_permission
+from utils.import_export import EXCEL_AVAILABLE
+from utils.report_export import report_rows, write_report_csv, append_report_sheet, export_report_detail as export_detail
+
+CACHE_SIZE = 64
+
+# Tables each report reads; lines and rollups only change along with their order headers,
+# and ledger rows along with items
+REPORT_TABLES = {
+    "inventory_summary": ("items",),
+    "sales": ("sales_orders", "items", "customers"),
+    "purchase": ("purchase_orders", "items", "suppliers"),
+    "stock_movement": ("items",),
+    "low_stock": ("items",),
+    "profit": ("sales_orders", "purchase_orders", "items"),
+    "inventory_kpis": ("sales_orders", "purchase_orders", "items"),
+    "trend": ("sales_orders", "purchase_orders"),
+}
+
+_report_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _cached(report_type, params, compute):
+    """Return a cached copy of a report, or compute and cache it (successful results only)"""
+    key = (db_connection.DB_PATH, report_type, params, get_data_versions(REPORT_TABLES[report_type]))
+    if None in params:
+        key += (date.today(),)
+    with _cache_lock:
+        if key in _report_cache:
+            _report_cache.move_to_end(key)
+            return copy.deepcopy(_report_cache[key])
+
+    result = compute()
+    # most report models raise on error; those that return a status dict may report failure
+    if not isinstance(result, dict) or result.get("success", True):
+        with _cache_lock:
+            _report_cache[key] = copy.deepcopy(result)
+            while len(_report_cache) > CACHE_SIZE:
+                _report_cache.popitem(last=False)
+    return result
+
+
+def clear_report_cache():
+    """Drop every cached report"""
+    with _cache_lock:
+        _report_cache.clear()
 
 
 def generate_inventory_summary(user):
@@ -18,7 +81,7 @@ def generate_inventory_summary(user):
     Requires view_inventory permission
     """
     require_permission(user, "view_inventory")
-    return get_inventory_summary()
+    return _cached("inventory_summary", (), get_inventory_summary)
 
 
 def generate_sales_report(user, start_date=None, end_date=None):
@@ -27,7 +90,7 @@ def generate_sales_report(user, start_date=None, end_date=None):
     Requires view_inventory permission
     """
     require_permission(user, "view_inventory")
-    return get_sales_report(start_date, end_date)
+    return _cached("sales", (start_date, end_date), lambda: get_sales_report(start_date, end_date))
 
 
 def generate_purchase_report(user, start_date=None, end_date=None):
@@ -36,7 +99,7 @@ def generate_purchase_report(user, start_date=None, end_date=None):
     Requires view_inventory permission
     """
     require_permission(user, "view_inventory")
-    return get_purchase_report(start_date, end_date)
+    return _cached("purchase", (start_date, end_date), lambda: get_purchase_report(start_date, end_date))
 
 
 def generate_stock_movement_report(user, start_date=None, end_date=None):
@@ -45,7 +108,7 @@ def generate_stock_movement_report(user, start_date=None, end_date=None):
     Requires view_inventory permission
     """
     require_permission(user, "view_inventory")
-    return get_stock_movement_report(start_date, end_date)
+    return _cached("stock_movement", (start_date, end_date), lambda: get_stock_movement_report(start_date, end_date))
 
 
 def generate_low_stock_report(user):
@@ -54,7 +117,7 @@ def generate_low_stock_report(user):
     Requires view_inventory permission
     """
     require_permission(user, "view_inventory")
-    return get_low_stock_report()
+    return _cached("low_stock", (), get_low_stock_report)
 
 
 def generate_profit_analysis(user, start_date=None, end_date=None):
@@ -63,4 +126,146 @@ def generate_profit_analysis(user, start_date=None, end_date=None):
     Requires view_inventory permission (ADMIN/STAFF only for financial data)
     """
     require_permission(user, "view_inventory")
-    return get_profit_analysis(start_date, end_date)
+    return _cached("profit", (start_date, end_date), lambda: get_profit_analysis(start_date, end_date))
+
+
+def generate_inventory_kpis(user, start_date=None, end_date=None, limit=100, order_by="revenue"):
+    """
+    Generate ABC class, turnover, days-of-supply, sell-through and
+    stock-to-sales for the catalog; rows are the top `limit` items by order_by
+    Requires view_inventory permission
+    """
+    require_permission(user, "view_inventory")
+
+    def compute():
+        result = compute_inventory_kpis(start_date, end_date)
+        if not result.get("success"):
+            return result
+        return {
+            "success": True,
+            "start_date": result["start_date"],
+            "end_date": result["end_date"],
+            "summary": result["summary"],
+            "items": kpi_rows(result["columns"], limit=limit, order_by=order_by)
+        }
+
+    return _cached("inventory_kpis", (start_date, end_date, limit, order_by), compute)
+
+
+def generate_trend_series(user, kind="sales", bucket="day", start_date=None, end_date=None,
+                          item_id=None, party_id=None):
+    """
+    Generate a gap-filled quantity/amount/order-count series per hour, day,
+    week or month, optionally for one item or one customer/supplier
+    Requires view_inventory permission
+    """
+    require_permission(user, "view_inventory")
+    return _cached("trend", (kind, bucket, start_date, end_date, item_id, party_id),
+                   lambda: get_trend_series(kind, bucket, start_date, end_date, item_id, party_id))
+
+
+def export_report_detail(user, report_type, filepath, start_date=None, end_date=None, progress=None):
+    """
+    Stream every row behind a report (not just the top entries shown on
+    screen) to a CSV or .xlsx file, calling progress(rows_written, total)
+    Requires view_inventory permission
+    """
+    require_permission(user, "view_inventory")
+    return export_detail(report_type, filepath, start_date, end_date, progress)
+
+
+# Report types for batch export, and whether each takes a date range
+BATCH_REPORTS = {
+    "inventory_summary": (generate_inventory_summary, False),
+    "sales_report": (generate_sales_report, True),
+    "purchase_report": (generate_purchase_report, True),
+    "stock_movement": (generate_stock_movement_report, True),
+    "low_stock": (generate_low_stock_report, False),
+    "profit_analysis": (generate_profit_analysis, True),
+}
+
+
+def _run_timed(generate, user, args):
+    start = time.perf_counter()
+    data = generate(user, *args)
+    return data, time.perf_counter() - start
+
+
+def export_report_batch(user, output_path, report_types=None, start_date=None, end_date=None,
+                        file_format="xlsx", max_workers=4):
+    """
+    Generate several reports concurrently and export them together
+    Requires view_inventory permission
+
+    Each report runs on its own worker thread and read connection; results
+    are written as they arrive, in the order requested, to one sheet each of
+    an Excel workbook, or to one CSV per report in the output_path directory.
+
+    Args:
+        user (dict): Current user
+        output_path (str): .xlsx file path, or a directory for CSV files
+        report_types (list, optional): Keys of BATCH_REPORTS (default: all)
+        start_date, end_date (str, optional): Range for date-based reports
+        file_format (str): "xlsx" or "csv"
+        max_workers (int): Concurrent report queries
+
+    Returns:
+        dict: {"success", "message", "files", "timings": {type: seconds},
+               "sum_of_parts", "wall_clock"}
+    """
+    require_permission(user, "view_inventory")
+    report_types = list(report_types or BATCH_REPORTS)
+    unknown = [t for t in report_types if t not in BATCH_REPORTS]
+    if unknown:
+        return {"success": False, "message": f"Unknown report types: {', '.join(unknown)}"}
+    if file_format == "xlsx" and not EXCEL_AVAILABLE:
+        return {"success": False, "message": "Excel support not available. Install openpyxl: pip install openpyxl"}
+    if file_format not in ("xlsx", "csv"):
+        return {"success": False, "message": f"Unsupported format: {file_format}"}
+
+    started = time.perf_counter()
+    executor = DatabaseExecutor(max_connections=min(max_workers, len(report_types)))
+    try:
+        futures = []
+        for report_type in report_types:
+            generate, dated = BATCH_REPORTS[report_type]
+            futures.append(executor.submit(_run_timed, generate, user, (start_date, end_date) if dated else ()))
+
+        if file_format == "xlsx":
+            import openpyxl
+            workbook = openpyxl.Workbook(write_only=True)
+            files = [output_path]
+        else:
+            os.makedirs(output_path, exist_ok=True)
+            files = []
+
+        timings = {}
+        for report_type, future in zip(report_types, futures):
+            data, elapsed = future.result()
+            rows = report_rows(report_type, data)
+            if file_format == "xlsx":
+                append_report_sheet(workbook, report_type, rows)
+            else:
+                path = os.path.join(output_path, f"{report_type}.csv")
+                write_report_csv(path, rows)
+                files.append(path)
+            timings[report_type] = elapsed
+
+        if file_format == "xlsx":
+            workbook.save(output_path)
+    except Exception as e:
+        return {"success": False, "message": f"Batch export failed: {e}"}
+    finally:
+        executor.close()
+
+    wall_clock = time.perf_counter() - started
+    sum_of_parts = sum(timings.values())
+    return {
+        "success": True,
+        "message": f"Exported {len(report_types)} reports in {wall_clock:.2f}s "
+                   f"(reports took {sum_of_parts:.2f}s combined)",
+        "files": files,
+        "timings": timings,
+        "sum_of_parts": sum_of_parts,
+        "wall_clock": wall_clock
+    }
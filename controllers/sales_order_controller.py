@@ -1,41 +1,53 @@
 from models.sales_order_model import (
-    create_sales_order as model_create_so,
+    create_sales_order_with_lines as model_create_so,
     get_sales_order as model_get_so,
     list_all_sales_orders as model_list_so,
     update_sales_order_status as model_update_so_status,
+    complete_sales_order as model_complete_so,
     delete_sales_order as model_delete_so
 )
-from models.inventory_model import get_item, update_item_quantity
+from models.allocation_model import get_available_to_promise_bulk
 from models.audit_log_model import log_action
 from utils.permissions import require_permission
+from utils.order_lines import parse_order_lines
 import json
 
 def create_sales_order(user, form_data):
-    """Create a new sales order (requires create_sale permission)"""
+    """
+    Create a new sales order (requires create_sale permission)
+    
+    form_data may carry a "lines" list of {item_id, quantity, unit_price};
+    otherwise a single line is read from item_id, quantity and unit_price.
+    """
     require_permission(user, "create_sale")
     
     try:
         customer_id = int(form_data.get("customer_id"))
-        item_id = int(form_data.get("item_id"))
-        quantity = int(form_data.get("quantity"))
-        unit_price = float(form_data.get("unit_price"))
-        notes = form_data.get("notes", "").strip() or None
-        
-        if quantity <= 0:
-            return {"success": False, "message": "Quantity must be positive"}
-        if unit_price < 0:
-            return {"success": False, "message": "Unit price cannot be negative"}
+        lines = parse_order_lines(form_data)
+        notes = (form_data.get("notes") or "").strip() or None
         
-        # Check if enough inventory available
-        item_result = get_item(item_id)
-        if not item_result.get("success"):
-            return {"success": False, "message": "Item not found"}
+        requested = {}
+        for line in lines:
+            if line["quantity"] <= 0:
+                return {"success": False, "message": "Quantity must be positive"}
+            if line["unit_price"] < 0:
+                return {"success": False, "message": "Unit price cannot be negative"}
+            requested[line["item_id"]] = requested.get(line["item_id"], 0) + line["quantity"]
         
-        current_qty = item_result["item"]["quantity"]
-        if current_qty < quantity:
-            return {"success": False, "message": f"Insufficient inventory. Available: {current_qty}, Requested: {quantity}"}
+        # Check available-to-promise (on hand minus stock reserved by pending orders);
+        # the model re-checks atomically when it reserves
+        atp_result = get_available_to_promise_bulk(requested.keys())
+        if not atp_result.get("success"):
+            return atp_result
+        for item_id, quantity in requested.items():
+            if item_id not in atp_result["available"]:
+                return {"success": False, "message": "Item not found"}
+            
+            available = atp_result["available"][item_id]
+            if available < quantity:
+                return {"success": False, "message": f"Insufficient inventory. Available: {available}, Requested: {quantity}"}
         
-        result = model_create_so(customer_id, item_id, quantity, unit_price, user["id"], notes)
+        result = model_create_so(customer_id, lines, user["id"], notes)
         
         if result.get("success"):
             # Log sales order creation
@@ -44,18 +56,16 @@ def create_sales_order(user, form_data):
                 username=user['username'],
                 action='CREATE',
                 resource_type='SALES_ORDER',
-                resource_id=result.get('order_id'),
+                resource_id=result.get('id'),
                 details=json.dumps({
                     'customer_id': customer_id,
-                    'item_id': item_id,
-                    'quantity': quantity,
-                    'unit_price': unit_price,
-                    'total_amount': quantity * unit_price
+                    'lines': lines,
+                    'total_amount': sum(l['quantity'] * l['unit_price'] for l in lines)
                 })
             )
         
         return result
-    except (ValueError, KeyError) as e:
+    except (ValueError, KeyError, TypeError) as e:
         return {"success": False, "message": f"Invalid form data: {e}"}
 
 def list_sales_orders(user, status=None):
@@ -71,42 +81,19 @@ def get_sales_order(user, order_id):
 def complete_sales_order(user, order_id):
     """
     Complete a sales order and update inventory.
-    Decreases item quantity by order quantity.
+    Decreases item quantities by every line's quantity in one transaction.
     """
     require_permission(user, "create_sale")
     
-    # Get order details
-    result = model_get_so(order_id)
-    if not result.get("success"):
-        return result
-    
-    order = result["order"]
-    
-    if order["status"] != "PENDING":
-        return {"success": False, "message": f"Cannot complete order with status: {order['status']}"}
-    
-    # Get current item quantity
-    item_result = get_item(order["item_id"])
-    if not item_result.get("success"):
-        return {"success": False, "message": "Item not found"}
-    
-    current_qty = item_result["item"]["quantity"]
-    
-    # Verify sufficient quantity
-    if current_qty < order["quantity"]:
-        return {"success": False, "message": f"Insufficient inventory. Available: {current_qty}, Required: {order['quantity']}"}
-    
-    new_qty = current_qty - order["quantity"]
-    
-    # Update item quantity
-    update_result = update_item_quantity(order["item_id"], new_qty)
-    if not update_result.get("success"):
-        return update_result
-    
-    # Update order status
-    status_result = model_update_so_status(order_id, "COMPLETED")
+    status_result = model_complete_so(order_id)
     if status_result.get("success"):
-        status_result["message"] = f"Sales order completed. Item quantity decreased by {order['quantity']} (from {current_qty} to {new_qty})"
+        items = status_result["items"]
+        line_count = status_result["line_count"]
+        if len(items) == 1:
+            line = items[0]
+            status_result["message"] = f"Sales order completed. Item quantity decreased by {line['quantity']} (from {line['old_quantity']} to {line['new_quantity']})"
+        else:
+            status_result["message"] = f"Sales order completed. Inventory decreased for {len(items)} items across {line_count} lines"
         
         # Log sales order completion
         log_action(
@@ -115,12 +102,7 @@ def complete_sales_order(user, order_id):
             action='COMPLETE',
             resource_type='SALES_ORDER',
             resource_id=order_id,
-            details=json.dumps({
-                'item_id': order["item_id"],
-                'quantity_sold': order["quantity"],
-                'old_quantity': current_qty,
-                'new_quantity': new_qty
-            })
+            details=json.dumps({'items': items, 'line_count': line_count})
         )
         
         # Send email notification if configured
@@ -131,7 +113,7 @@ def complete_sales_order(user, order_id):
                     user['email'],
                     'sales',
                     order_id,
-                    1  # Number of items (single item per order in this system)
+                    line_count
                 )
         except Exception as e:
             print(f"Email notification error: {e}")
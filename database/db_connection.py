@@ -1,8 +1,56 @@
-import sqlite3, os
+import sqlite3, os, threading
 
 DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "inventory.db")
 
+# connection pinned to the current thread by pin_thread_connection()
+_local = threading.local()
+
+class PinnedConnection(sqlite3.Connection):
+    """Long-lived connection owned by an executor worker thread.
+
+    Model code always calls conn.close() when it is done. Each
+    get_connection() on the thread counts as one holder and each close()
+    drops one; only when the outermost holder closes is anything left open
+    rolled back, so a nested model call can't undo its caller's
+    transaction. release() really closes it.
+    """
+    holders = 0
+
+    def acquire(self):
+        self.holders += 1
+        return self
+
+    def close(self):
+        self.holders = max(self.holders - 1, 0)
+        if self.holders == 0 and self.in_transaction:
+            self.rollback()
+
+    def reset(self):
+        """Drop every holder and roll back, e.g. after a task that raised before closing"""
+        self.holders = 0
+        if self.in_transaction:
+            self.rollback()
+
+    def release(self):
+        super().close()
+
 def get_connection():
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        return conn.acquire()
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row  # lets us dict() rows easily
     return conn
+
+def pin_thread_connection():
+    """Open a connection that every get_connection() on this thread will reuse."""
+    conn = sqlite3.connect(DB_PATH, factory=PinnedConnection, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    _local.conn = conn
+    return conn
+
+def reset_thread_connection():
+    """Reset this thread's pinned connection, if it has one, between tasks"""
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        conn.reset()
@@ -0,0 +1,58 @@
+"""
+Dedicated executor for running SQLite work off the asyncio event loop
+"""
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from database.db_connection import pin_thread_connection, reset_thread_connection
+
+
+class DatabaseExecutor:
+    """
+    Fixed-size pool of worker threads, each owning one pinned SQLite connection.
+
+    The number of open connections never exceeds max_connections no matter how
+    many coroutines are waiting; extra calls queue inside the executor.
+    """
+
+    def __init__(self, max_connections=4):
+        self.max_connections = max_connections
+        self._connections = []
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_connections,
+            thread_name_prefix="sqlite-worker",
+            initializer=self._init_worker
+        )
+
+    def _init_worker(self):
+        conn = pin_thread_connection()
+        with self._lock:
+            self._connections.append(conn)
+
+    @staticmethod
+    def _call(func, *args, **kwargs):
+        # every task starts on a clean connection, even if the last one raised before closing
+        try:
+            return func(*args, **kwargs)
+        finally:
+            reset_thread_connection()
+
+    async def run(self, func, *args, **kwargs):
+        """Run a blocking model function on a worker and await its result"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, functools.partial(self._call, func, *args, **kwargs))
+
+    def submit(self, func, *args, **kwargs):
+        """Run a blocking model function on a worker from synchronous code; returns a Future"""
+        return self._pool.submit(self._call, func, *args, **kwargs)
+
+    def close(self):
+        """Wait for queued work, then close every pinned connection"""
+        self._pool.shutdown(wait=True)
+        with self._lock:
+            for conn in self._connections:
+                conn.release()
+            self._connections.clear()
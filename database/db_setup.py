@@ -27,7 +27,8 @@ CREATE TABLE IF NOT EXISTS items (
     price REAL DEFAULT 0.0,
     min_stock_level INTEGER DEFAULT 10,
     reorder_point INTEGER DEFAULT 20,
-    barcode TEXT
+    barcode TEXT,
+    reserved_quantity INTEGER NOT NULL DEFAULT 0
 );
 """
 
@@ -59,9 +60,9 @@ CREATE TABLE IF NOT EXISTS purchase_orders (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     order_number TEXT UNIQUE NOT NULL,
     supplier_id INTEGER NOT NULL,
-    item_id INTEGER NOT NULL,
+    item_id INTEGER,
     quantity INTEGER NOT NULL,
-    unit_price REAL NOT NULL,
+    unit_price REAL,
     total_price REAL NOT NULL,
     status TEXT NOT NULL CHECK(status IN ('PENDING', 'COMPLETED', 'CANCELLED')) DEFAULT 'PENDING',
     notes TEXT,
@@ -79,9 +80,9 @@ CREATE TABLE IF NOT EXISTS sales_orders (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     order_number TEXT UNIQUE NOT NULL,
     customer_id INTEGER NOT NULL,
-    item_id INTEGER NOT NULL,
+    item_id INTEGER,
     quantity INTEGER NOT NULL,
-    unit_price REAL NOT NULL,
+    unit_price REAL,
     total_price REAL NOT NULL,
     status TEXT NOT NULL CHECK(status IN ('PENDING', 'COMPLETED', 'CANCELLED')) DEFAULT 'PENDING',
     notes TEXT,
@@ -94,6 +95,39 @@ CREATE TABLE IF NOT EXISTS sales_orders (
 );
 """
 
+# Order lines: one row per item on an order. Headers keep item_id/unit_price
+# only for single-line orders; multi-line headers leave them NULL and carry
+# the total quantity and total price.
+BASE_PURCHASE_ORDER_LINES_SQL = """
+CREATE TABLE IF NOT EXISTS purchase_order_lines (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    order_id INTEGER NOT NULL,
+    line_no INTEGER NOT NULL,
+    item_id INTEGER NOT NULL,
+    quantity INTEGER NOT NULL,
+    unit_price REAL NOT NULL,
+    total_price REAL NOT NULL,
+    UNIQUE(order_id, line_no),
+    FOREIGN KEY(order_id) REFERENCES purchase_orders(id),
+    FOREIGN KEY(item_id) REFERENCES items(id)
+);
+"""
+
+BASE_SALES_ORDER_LINES_SQL = """
+CREATE TABLE IF NOT EXISTS sales_order_lines (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    order_id INTEGER NOT NULL,
+    line_no INTEGER NOT NULL,
+    item_id INTEGER NOT NULL,
+    quantity INTEGER NOT NULL,
+    unit_price REAL NOT NULL,
+    total_price REAL NOT NULL,
+    UNIQUE(order_id, line_no),
+    FOREIGN KEY(order_id) REFERENCES sales_orders(id),
+    FOREIGN KEY(item_id) REFERENCES items(id)
+);
+"""
+
 BASE_STOCK_ALERTS_SQL = """
 CREATE TABLE IF NOT EXISTS stock_alerts (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -123,6 +157,131 @@ CREATE TABLE IF NOT EXISTS audit_logs (
 );
 """
 
+# Named counters for collision-free identifiers (order numbers etc.)
+BASE_SEQUENCES_SQL = """
+CREATE TABLE IF NOT EXISTS sequences (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+BASE_INVENTORY_MOVEMENTS_SQL = """
+CREATE TABLE IF NOT EXISTS inventory_movements (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    item_id INTEGER NOT NULL,
+    change INTEGER NOT NULL,
+    quantity_after INTEGER NOT NULL,
+    reason TEXT NOT NULL,
+    reference_type TEXT,
+    reference_id INTEGER,
+    created_at TEXT NOT NULL
+)
+"""
+
+BASE_INVENTORY_SNAPSHOTS_SQL = """
+CREATE TABLE IF NOT EXISTS inventory_snapshots (
+    item_id INTEGER NOT NULL,
+    snapshot_at TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    PRIMARY KEY (item_id, snapshot_at)
+)
+"""
+
+BASE_ROLLUPS_SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS daily_item_sales (
+        day TEXT NOT NULL,
+        item_id INTEGER NOT NULL,
+        quantity INTEGER NOT NULL DEFAULT 0,
+        revenue REAL NOT NULL DEFAULT 0,
+        order_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, item_id)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS daily_customer_sales (
+        day TEXT NOT NULL,
+        customer_id INTEGER NOT NULL,
+        quantity INTEGER NOT NULL DEFAULT 0,
+        revenue REAL NOT NULL DEFAULT 0,
+        order_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, customer_id)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS daily_item_purchases (
+        day TEXT NOT NULL,
+        item_id INTEGER NOT NULL,
+        quantity INTEGER NOT NULL DEFAULT 0,
+        cost REAL NOT NULL DEFAULT 0,
+        order_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, item_id)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS daily_supplier_purchases (
+        day TEXT NOT NULL,
+        supplier_id INTEGER NOT NULL,
+        quantity INTEGER NOT NULL DEFAULT 0,
+        cost REAL NOT NULL DEFAULT 0,
+        order_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, supplier_id)
+    ) WITHOUT ROWID
+    """,
+]
+
+BASE_DEMAND_FORECASTS_SQL = """
+CREATE TABLE IF NOT EXISTS demand_forecasts (
+    item_id INTEGER PRIMARY KEY,
+    daily_demand REAL NOT NULL,
+    demand_std REAL NOT NULL,
+    safety_stock INTEGER NOT NULL,
+    reorder_point INTEGER NOT NULL,
+    method TEXT NOT NULL,
+    history_days INTEGER NOT NULL,
+    computed_at TEXT NOT NULL
+)
+"""
+
+BASE_EMAIL_OUTBOX_SQL = """
+CREATE TABLE IF NOT EXISTS email_outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    to_email TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    body_html TEXT NOT NULL,
+    body_text TEXT,
+    status TEXT NOT NULL DEFAULT 'PENDING',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at TEXT NOT NULL,
+    last_error TEXT,
+    created_at TEXT NOT NULL,
+    sent_at TEXT
+)
+"""
+
+BASE_EMAIL_DIGEST_EVENTS_SQL = """
+CREATE TABLE IF NOT EXISTS email_digest_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    to_email TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at TEXT NOT NULL
+)
+"""
+
+BASE_DATA_VERSIONS_SQL = """
+CREATE TABLE IF NOT EXISTS data_versions (
+    table_name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID
+"""
+
+# Tables whose writes bump data_versions, for caches of derived results
+VERSIONED_TABLES = ("items", "customers", "suppliers", "sales_orders", "purchase_orders")
+
+# write counter for the fields the scanner's barcode index holds (not quantities)
+BARCODE_INDEX_VERSION = "item_barcodes"
+
 def _existing_cols(cur, table):
     cur.execute(f"PRAGMA table_info({table})")
     return {row[1] for row in cur.fetchall()}  # set of column names
@@ -211,6 +370,182 @@ def _migrate_items(conn):
     
     conn.commit()
 
+def _migrate_order_lines(conn):
+    """Move orders onto header + lines.
+
+    Older databases declare item_id/unit_price NOT NULL on the order headers,
+    which multi-line orders cannot satisfy, so those tables are rebuilt with
+    the columns relaxed. Every header that has no lines yet gets a single
+    line copied from its own item columns.
+    """
+    cur = conn.cursor()
+    for table, create_sql, lines_table in (
+        ("purchase_orders", BASE_PURCHASE_ORDERS_SQL, "purchase_order_lines"),
+        ("sales_orders", BASE_SALES_ORDERS_SQL, "sales_order_lines"),
+    ):
+        cur.execute(f"PRAGMA table_info({table})")
+        notnull = {row[1]: row[3] for row in cur.fetchall()}
+        if notnull.get("item_id"):
+            print(f"[DB] Rebuilding '{table}' for multi-line orders...")
+            cols = ", ".join(notnull.keys())
+            cur.execute(create_sql.replace(f"EXISTS {table} (", f"EXISTS {table}_new ("))
+            cur.execute(f"INSERT INTO {table}_new ({cols}) SELECT {cols} FROM {table}")
+            cur.execute(f"DROP TABLE {table}")
+            cur.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+
+        cur.execute(f"CREATE INDEX IF NOT EXISTS ix_{lines_table}_item ON {lines_table}(item_id)")
+        cur.execute(f"""
+            INSERT INTO {lines_table} (order_id, line_no, item_id, quantity, unit_price, total_price)
+            SELECT o.id, 1, o.item_id, o.quantity, o.unit_price, o.total_price
+            FROM {table} o
+            WHERE o.item_id IS NOT NULL
+            AND NOT EXISTS (SELECT 1 FROM {lines_table} l WHERE l.order_id = o.id)
+        """)
+        if cur.rowcount > 0:
+            print(f"[DB] Converted {cur.rowcount} '{table}' rows to order lines")
+    conn.commit()
+
+def _migrate_reservations(conn):
+    """Add items.reserved_quantity and reserve stock for orders that are already pending"""
+    cur = conn.cursor()
+    cols = _existing_cols(cur, "items")
+    if "reserved_quantity" not in cols:
+        cur.execute("ALTER TABLE items ADD COLUMN reserved_quantity INTEGER NOT NULL DEFAULT 0")
+        cur.execute("""
+            UPDATE items SET reserved_quantity = COALESCE((
+                SELECT SUM(l.quantity)
+                FROM sales_order_lines l
+                JOIN sales_orders so ON l.order_id = so.id
+                WHERE so.status = 'PENDING' AND l.item_id = items.id
+            ), 0)
+        """)
+        print("[DB] Added 'reserved_quantity' column to items table")
+    conn.commit()
+
+def _migrate_movements(conn):
+    """Index the movement ledger, store its times in UTC and take an opening snapshot of current stock"""
+    cur = conn.cursor()
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS ix_inventory_movements_item_time
+        ON inventory_movements (item_id, created_at, id)
+    """)
+    cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'ix_inventory_movements_time'")
+    if cur.fetchone() is None:
+        # Early ledger rows were written as local ISO times ("T" separator)
+        cur.execute("UPDATE inventory_movements SET created_at = datetime(created_at, 'utc') WHERE created_at LIKE '%T%'")
+        cur.execute("UPDATE OR REPLACE inventory_snapshots SET snapshot_at = datetime(snapshot_at, 'utc') WHERE snapshot_at LIKE '%T%'")
+        cur.execute("CREATE INDEX ix_inventory_movements_time ON inventory_movements (created_at)")
+    cur.execute("SELECT 1 FROM inventory_snapshots LIMIT 1")
+    if cur.fetchone() is None:
+        cur.execute("""
+            INSERT INTO inventory_snapshots (item_id, snapshot_at, quantity)
+            SELECT id, datetime('now'), quantity FROM items
+        """)
+        if cur.rowcount > 0:
+            print(f"[DB] Took opening inventory snapshot of {cur.rowcount} items")
+    conn.commit()
+
+def _migrate_report_indexes(conn):
+    """Index completed orders by completion time for date-range reports"""
+    cur = conn.cursor()
+    for table in ("sales_orders", "purchase_orders"):
+        cur.execute(f"""
+            CREATE INDEX IF NOT EXISTS ix_{table}_status_completed
+            ON {table} (status, completed_at)
+        """)
+    conn.commit()
+
+def _migrate_rollups(conn):
+    """Create the daily rollup tables and backfill them from existing completed orders"""
+    from models.rollup_model import backfill_rollups
+    cur = conn.cursor()
+    cur.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'daily_customer_sales'")
+    row = cur.fetchone()
+    is_new = row is None
+    if row and "WITHOUT ROWID" not in row[0]:
+        # early rollup tables were rowid tables; rebuild them clustered on the primary key
+        for table in ("daily_item_sales", "daily_customer_sales", "daily_item_purchases", "daily_supplier_purchases"):
+            cur.execute(f"DROP TABLE IF EXISTS {table}")
+        is_new = True
+    for sql in BASE_ROLLUPS_SQL:
+        cur.execute(sql)
+    if is_new:
+        backfill_rollups(cur)
+        print("[DB] Backfilled daily sales/purchase rollups")
+    conn.commit()
+
+def _migrate_data_versions(conn):
+    """Count writes per table with triggers so cached reports know when they're stale"""
+    cur = conn.cursor()
+    cur.execute(BASE_DATA_VERSIONS_SQL)
+    for table in VERSIONED_TABLES:
+        cur.execute("INSERT OR IGNORE INTO data_versions (table_name, version) VALUES (?, 0)", (table,))
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            cur.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_version_{event.lower()}
+                AFTER {event} ON {table}
+                BEGIN
+                    UPDATE data_versions SET version = version + 1 WHERE table_name = '{table}';
+                END
+            """)
+    conn.commit()
+
+def _migrate_barcodes(conn):
+    """Store barcodes as full EAN-13 codes and enforce one item per barcode"""
+    from utils.barcode_utils import ean13_check_digit, normalize_barcode
+    cur = conn.cursor()
+    cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'ux_items_barcode'")
+    if cur.fetchone():
+        return
+
+    # Legacy generated codes were the zero-padded item ID plus 6 digits, without a check
+    # digit; other codes (e.g. UPC-A) are normalized. Keep the oldest item's copy of a duplicate
+    cur.execute("SELECT id, barcode FROM items WHERE barcode IS NOT NULL ORDER BY id")
+    seen, updates, cleared = set(), [], 0
+    for item_id, code in cur.fetchall():
+        if len(code) == 12 and code.isdigit() and code.startswith(str(item_id).zfill(6)):
+            new_code = code + ean13_check_digit(code)
+        else:
+            new_code = normalize_barcode(code) or None
+        if new_code in seen:
+            new_code = None
+            cleared += 1
+        elif new_code:
+            seen.add(new_code)
+        if new_code != code:
+            updates.append((new_code, item_id))
+    cur.executemany("UPDATE items SET barcode = ? WHERE id = ?", updates)
+    cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS ux_items_barcode ON items(barcode)")
+    conn.commit()
+    print(f"[DB] Normalized {len(updates) - cleared} barcodes, cleared {cleared} duplicates, added unique barcode index")
+
+def _migrate_barcode_index_version(conn):
+    """Count item inserts, deletes and barcode/name/SKU/price edits, but not stock changes"""
+    cur = conn.cursor()
+    cur.execute("INSERT OR IGNORE INTO data_versions (table_name, version) VALUES (?, 0)", (BARCODE_INDEX_VERSION,))
+    for event, name in (("INSERT", "insert"), ("DELETE", "delete"), ("UPDATE OF barcode, name, sku, price", "update")):
+        cur.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{BARCODE_INDEX_VERSION}_version_{name}
+            AFTER {event} ON items
+            BEGIN
+                UPDATE data_versions SET version = version + 1 WHERE table_name = '{BARCODE_INDEX_VERSION}';
+            END
+        """)
+    conn.commit()
+
+def _migrate_email_outbox(conn):
+    """Index the outbox and digest events on what the sender polls"""
+    cur = conn.cursor()
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS ix_email_outbox_due
+        ON email_outbox (status, next_attempt_at)
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS ix_email_digest_events_recipient
+        ON email_digest_events (to_email, created_at)
+    """)
+    conn.commit()
+
 def setup_database():
     conn = get_connection()
     cur = conn.cursor()
@@ -222,8 +557,16 @@ def setup_database():
     cur.execute(BASE_CUSTOMERS_SQL)
     cur.execute(BASE_PURCHASE_ORDERS_SQL)
     cur.execute(BASE_SALES_ORDERS_SQL)
+    cur.execute(BASE_PURCHASE_ORDER_LINES_SQL)
+    cur.execute(BASE_SALES_ORDER_LINES_SQL)
     cur.execute(BASE_STOCK_ALERTS_SQL)
     cur.execute(BASE_AUDIT_LOGS_SQL)
+    cur.execute(BASE_SEQUENCES_SQL)
+    cur.execute(BASE_INVENTORY_MOVEMENTS_SQL)
+    cur.execute(BASE_INVENTORY_SNAPSHOTS_SQL)
+    cur.execute(BASE_DEMAND_FORECASTS_SQL)
+    cur.execute(BASE_EMAIL_OUTBOX_SQL)
+    cur.execute(BASE_EMAIL_DIGEST_EVENTS_SQL)
     conn.commit()
 
     # migrate users table to include any missing columns
@@ -234,6 +577,33 @@ def setup_database():
     
     # migrate old roles to new role system
     _migrate_roles(conn)
+    
+    # split orders into header + lines
+    _migrate_order_lines(conn)
+    
+    # reserve stock for pending sales orders
+    _migrate_reservations(conn)
+    
+    # inventory movement ledger + opening snapshot
+    _migrate_movements(conn)
+    
+    # date-range report indexes
+    _migrate_report_indexes(conn)
+    
+    # daily sales/purchase rollups
+    _migrate_rollups(conn)
+    
+    # per-table write counters for report caching
+    _migrate_data_versions(conn)
+    
+    # EAN-13 barcodes with a unique index
+    _migrate_barcodes(conn)
+    
+    # write counter for the in-memory barcode index
+    _migrate_barcode_index_version(conn)
+    
+    # queued email delivery and digests
+    _migrate_email_outbox(conn)
 
     conn.close()
     print("[DB] Setup/migration complete.")
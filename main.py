@@ -1,10 +1,22 @@
+import multiprocessing
+
 from database.db_setup import setup_database
+from models.movement_model import take_snapshot_if_due
+from models.scan_model import load_barcode_index
+from utils.email_notifications import is_email_configured, start_email_sender
 from views.app import App
 
 def InventoryApp():
     setup_database()
+    take_snapshot_if_due()
+    load_barcode_index()
+    # deliver anything left in the email outbox from the last run
+    if is_email_configured():
+        start_email_sender()
     app = App()
     app.run()
 
 if __name__ == "__main__":
+    # label printing uses a process pool; frozen Windows builds need this to spawn workers
+    multiprocessing.freeze_support()
     InventoryApp()
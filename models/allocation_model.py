@@ -0,0 +1,133 @@
+"""
+Stock allocation for pending sales orders
+
+items.reserved_quantity holds the total quantity promised to PENDING sales
+orders, so available-to-promise (ATP) is quantity - reserved_quantity: a
+primary-key lookup per item instead of summing pending orders every time.
+
+The reserve/release/consume helpers take a cursor and run inside the
+caller's transaction, so the reservation always commits or rolls back
+together with the order change that caused it.
+"""
+from database.db_connection import get_connection
+
+
+def _aggregate(lines):
+    """Sum line quantities per item -> list of (item_id, quantity)"""
+    totals = {}
+    for line in lines:
+        totals[line["item_id"]] = totals.get(line["item_id"], 0) + line["quantity"]
+    return list(totals.items())
+
+
+def reserve_lines(cur, lines):
+    """
+    Reserve stock for order lines with atomic conditional updates
+    
+    Args:
+        cur: Cursor inside an open transaction
+        lines (list): Dicts with item_id and quantity
+    
+    Returns:
+        list: (item_id, requested, available) for items that could not be reserved;
+              empty on success. On failure no item is reserved.
+    """
+    totals = _aggregate(lines)
+    cur.execute("SAVEPOINT reserve_lines")
+    cur.executemany("""
+        UPDATE items SET reserved_quantity = reserved_quantity + ?
+        WHERE id = ? AND quantity - reserved_quantity >= ?
+    """, [(qty, item_id, qty) for item_id, qty in totals])
+    if cur.rowcount == len(totals):
+        cur.execute("RELEASE reserve_lines")
+        return []
+    
+    # Undo the partial reservation, then work out which items were short
+    cur.execute("ROLLBACK TO reserve_lines")
+    cur.execute("RELEASE reserve_lines")
+    short = []
+    for item_id, qty in totals:
+        cur.execute("SELECT quantity - reserved_quantity FROM items WHERE id = ?", (item_id,))
+        row = cur.fetchone()
+        if row is None or row[0] < qty:
+            short.append((item_id, qty, row[0] if row else None))
+    return short
+
+
+def release_lines(cur, lines):
+    """Give back the stock reserved for order lines (cancel/delete)"""
+    cur.executemany("""
+        UPDATE items SET reserved_quantity = MAX(reserved_quantity - ?, 0)
+        WHERE id = ?
+    """, [(qty, item_id) for item_id, qty in _aggregate(lines)])
+
+
+def consume_lines(cur, lines):
+    """
+    Ship order lines: take quantity off stock and off the reservation together
+    
+    Returns:
+        bool: True if every item had enough stock; False means the caller must roll back
+    """
+    totals = _aggregate(lines)
+    cur.executemany("""
+        UPDATE items
+        SET quantity = quantity - ?, reserved_quantity = MAX(reserved_quantity - ?, 0)
+        WHERE id = ? AND quantity >= ?
+    """, [(qty, qty, item_id, qty) for item_id, qty in totals])
+    return cur.rowcount == len(totals)
+
+
+def order_lines(cur, order_id):
+    """Load a sales order's lines as dicts with item_id and quantity"""
+    cur.execute("SELECT item_id, quantity FROM sales_order_lines WHERE order_id = ?", (order_id,))
+    return [{"item_id": row[0], "quantity": row[1]} for row in cur.fetchall()]
+
+
+def get_available_to_promise(item_id):
+    """
+    Get on-hand, reserved and available-to-promise quantity for one item
+    
+    Returns:
+        dict: {"success", "item_id", "quantity", "reserved_quantity", "available"}
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT quantity, reserved_quantity FROM items WHERE id = ?", (item_id,))
+        row = cur.fetchone()
+        if not row:
+            return {"success": False, "message": "Item not found"}
+        return {
+            "success": True,
+            "item_id": item_id,
+            "quantity": row[0],
+            "reserved_quantity": row[1],
+            "available": row[0] - row[1]
+        }
+    except Exception as e:
+        return {"success": False, "message": f"Error fetching available stock: {e}"}
+    finally:
+        conn.close()
+
+
+def get_available_to_promise_bulk(item_ids):
+    """
+    Get available-to-promise quantity for many items in one query
+    
+    Returns:
+        dict: {"success", "available": {item_id: available}}
+    """
+    item_ids = list(item_ids)
+    if not item_ids:
+        return {"success": True, "available": {}}
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        placeholders = ",".join("?" * len(item_ids))
+        cur.execute(f"SELECT id, quantity - reserved_quantity FROM items WHERE id IN ({placeholders})", item_ids)
+        return {"success": True, "available": {row[0]: row[1] for row in cur.fetchall()}}
+    except Exception as e:
+        return {"success": False, "message": f"Error fetching available stock: {e}"}
+    finally:
+        conn.close()
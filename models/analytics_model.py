@@ -0,0 +1,283 @@
+"""
+Inventory KPI analytics over the whole catalog
+
+Item columns are read straight into preallocated NumPy arrays and per-item
+order totals (summed inside SQLite from the daily rollups) are scattered
+into matching arrays; every KPI is then computed with vectorized
+operations instead of Python work per item or per order line.
+
+KPIs for a period [start, end]:
+    abc_class          A/B/C by share of period revenue (80% / 95% cut-offs)
+    turnover           units sold / average units on hand
+    days_of_supply     units on hand / average units sold per day
+    sell_through       units sold / (units sold + units on hand), in percent
+    stock_to_sales     on-hand value at selling price / period revenue
+
+NumPy is optional: without it every function returns a failure message.
+"""
+from datetime import datetime, timedelta
+
+from database.db_connection import get_connection
+from models.rollup_model import ROLLUPS, completed_between, split_rollup_range
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+NUMPY_MISSING = {"success": False, "message": "Analytics require NumPy. Install numpy: pip install numpy"}
+
+DEFAULT_PERIOD_DAYS = 365
+ABC_CUTOFFS = (0.80, 0.95)
+FETCH_SIZE = 50_000
+# Numeric KPI columns kpi_rows can order by
+KPI_SORT_COLUMNS = ("quantity", "price", "units_sold", "revenue", "units_received",
+                    "turnover", "days_of_supply", "sell_through", "stock_to_sales")
+
+
+def load_columns(cur, count_query, query, params, dtypes):
+    """
+    Run a query and copy its columns into preallocated NumPy arrays
+
+    Args:
+        cur: Cursor
+        count_query (str): Query returning the number of rows `query` yields
+        query (str): Query whose columns match dtypes
+        params (list): Parameters for both queries
+        dtypes (list): One NumPy dtype per column
+
+    Returns:
+        list: One array per column
+    """
+    cur.execute(count_query, params)
+    count = cur.fetchone()[0]
+    arrays = [np.empty(count, dtype=dtype) for dtype in dtypes]
+    cur.execute(query, params)
+    pos = 0
+    while True:
+        rows = cur.fetchmany(FETCH_SIZE)
+        if not rows:
+            break
+        end = pos + len(rows)
+        for array, column in zip(arrays, zip(*rows)):
+            array[pos:end] = column
+        pos = end
+    # Rows committed between the two queries are ignored rather than overflowing
+    return [array[:pos] for array in arrays]
+
+
+def _period(start_date, end_date):
+    """Resolve the report period and its length in days"""
+    end = datetime.fromisoformat(str(end_date).replace(" ", "T")) if end_date else datetime.now()
+    if start_date:
+        start = datetime.fromisoformat(str(start_date).replace(" ", "T"))
+    else:
+        start = end - timedelta(days=DEFAULT_PERIOD_DAYS)
+    if end_date and len(str(end_date)) == 10:
+        end = end.replace(hour=23, minute=59, second=59, microsecond=999999)
+    days = max((end - start).total_seconds() / 86400, 1.0)
+    return start.isoformat(), end.isoformat(), days
+
+
+def _per_item(cur, item_ids, kind, start, end):
+    """
+    Sum completed order lines per item -> (units, amount) arrays aligned with item_ids
+
+    Whole days come from the daily item rollup and partial edge days from the
+    order lines, both grouped by item inside SQLite, so at most one row per
+    item and query crosses into Python.
+    """
+    orders, lines, _, item_rollup, _, amount = ROLLUPS[kind]
+    queries = []
+    days, edges = split_rollup_range(start, end)
+    if days is not None:
+        clause, params = "", []
+        if days[0]:
+            clause += " AND day >= ?"
+            params.append(days[0])
+        if days[1]:
+            clause += " AND day <= ?"
+            params.append(days[1])
+        queries.append((f"""
+            SELECT item_id, SUM(quantity), SUM({amount})
+            FROM {item_rollup} WHERE 1 = 1{clause}
+            GROUP BY item_id
+        """, params))
+    for edge_start, edge_end in edges:
+        clause, params = completed_between(edge_start, edge_end, "o.")
+        queries.append((f"""
+            SELECT l.item_id, SUM(l.quantity), SUM(l.total_price)
+            FROM {lines} l JOIN {orders} o ON l.order_id = o.id
+            WHERE o.status = 'COMPLETED'{clause}
+            GROUP BY l.item_id
+        """, params))
+
+    n = len(item_ids)
+    units, total = np.zeros(n), np.zeros(n)
+    for query, params in queries:
+        cur.execute(query, params)
+        rows = cur.fetchall()
+        if not rows or n == 0:
+            continue
+        block = np.array(rows, dtype=np.float64)
+        ids = block[:, 0].astype(np.int64)
+        idx = np.searchsorted(item_ids, ids)
+        idx[idx == n] = 0
+        known = item_ids[idx] == ids
+        np.add.at(units, idx[known], block[known, 1])
+        np.add.at(total, idx[known], block[known, 2])
+    return units, total
+
+
+def abc_classes(revenue, cutoffs=ABC_CUTOFFS):
+    """
+    Classify items A/B/C by cumulative share of revenue
+
+    Returns:
+        ndarray: dtype '<U1' of 'A', 'B' or 'C' aligned with revenue
+    """
+    classes = np.full(len(revenue), "C", dtype="<U1")
+    total = revenue.sum()
+    if total <= 0:
+        return classes
+    order = np.argsort(-revenue, kind="stable")
+    # share of revenue accumulated before each item, so the item that crosses a cut-off still gets the higher class
+    before = (np.cumsum(revenue[order]) - revenue[order]) / total
+    ranked = np.where(before < cutoffs[0], "A", np.where(before < cutoffs[1], "B", "C"))
+    ranked[revenue[order] <= 0] = "C"
+    classes[order] = ranked
+    return classes
+
+
+def compute_inventory_kpis(start_date=None, end_date=None):
+    """
+    Compute KPIs for every item as NumPy columns
+
+    Args:
+        start_date (str, optional): Period start in ISO format (default: end - 365 days)
+        end_date (str, optional): Period end in ISO format (default: now)
+
+    Returns:
+        dict: {"success", "period_days", "columns": {name: ndarray}, "summary": {...}}
+              columns: item_id, quantity, price, units_sold, revenue, units_received,
+              abc_class, turnover, days_of_supply, sell_through, stock_to_sales
+              (NaN where a ratio is undefined, e.g. no sales)
+    """
+    if not NUMPY_AVAILABLE:
+        return dict(NUMPY_MISSING)
+
+    conn = get_connection()
+    cur = conn.cursor()
+    # plain tuples: building sqlite3.Row objects would dominate the load
+    cur.row_factory = None
+    try:
+        start, end, days = _period(start_date, end_date)
+        item_ids, quantity, price = load_columns(
+            cur,
+            "SELECT COUNT(*) FROM items",
+            "SELECT id, quantity, COALESCE(price, 0) FROM items ORDER BY id",
+            [],
+            [np.int64, np.float64, np.float64]
+        )
+        units_sold, revenue = _per_item(cur, item_ids, "sales", start, end)
+        units_received, _ = _per_item(cur, item_ids, "purchases", start, end)
+    except Exception as e:
+        return {"success": False, "message": f"Error loading analytics data: {e}"}
+    finally:
+        conn.close()
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # stock at period start, reconstructed from orders in the period
+        opening = np.maximum(quantity + units_sold - units_received, 0)
+        average_on_hand = (opening + quantity) / 2
+        turnover = np.where(average_on_hand > 0, units_sold / average_on_hand, np.nan)
+        daily_demand = units_sold / days
+        days_of_supply = np.where(daily_demand > 0, quantity / daily_demand, np.nan)
+        available = units_sold + quantity
+        sell_through = np.where(available > 0, units_sold / available * 100, np.nan)
+        stock_to_sales = np.where(revenue > 0, quantity * price / revenue, np.nan)
+    classes = abc_classes(revenue)
+
+    total_revenue = float(revenue.sum())
+    total_on_hand = float(average_on_hand.sum())
+    summary = {
+        "item_count": int(len(item_ids)),
+        "total_units_sold": float(units_sold.sum()),
+        "total_revenue": round(total_revenue, 2),
+        "abc_counts": {c: int((classes == c).sum()) for c in "ABC"},
+        "overall_turnover": round(float(units_sold.sum()) / total_on_hand, 4) if total_on_hand > 0 else None,
+        "overall_stock_to_sales": round(float((quantity * price).sum()) / total_revenue, 4) if total_revenue > 0 else None,
+        "items_without_sales": int((units_sold == 0).sum())
+    }
+    return {
+        "success": True,
+        "start_date": start,
+        "end_date": end,
+        "period_days": days,
+        "columns": {
+            "item_id": item_ids,
+            "quantity": quantity,
+            "price": price,
+            "units_sold": units_sold,
+            "revenue": revenue,
+            "units_received": units_received,
+            "abc_class": classes,
+            "turnover": turnover,
+            "days_of_supply": days_of_supply,
+            "sell_through": sell_through,
+            "stock_to_sales": stock_to_sales
+        },
+        "summary": summary
+    }
+
+
+def kpi_rows(columns, limit=None, order_by="revenue", descending=True):
+    """
+    Turn (the top `limit` rows of) KPI columns into dicts for display/export
+
+    NaN ratios become None, and sort last either way. Item names and SKUs
+    are looked up only for the returned rows. order_by must be one of
+    KPI_SORT_COLUMNS; ties keep item order.
+    """
+    if order_by not in KPI_SORT_COLUMNS:
+        raise ValueError(f"Cannot order KPI rows by {order_by!r}; choose one of {', '.join(KPI_SORT_COLUMNS)}")
+    values = columns[order_by]
+    order = np.argsort(-values if descending else values, kind="stable")
+    if limit is not None:
+        order = order[:limit]
+
+    ids = [int(i) for i in columns["item_id"][order]]
+    names = {}
+    if ids:
+        conn = get_connection()
+        try:
+            for start in range(0, len(ids), 900):
+                chunk = ids[start:start + 900]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(f"SELECT id, name, sku FROM items WHERE id IN ({placeholders})", chunk).fetchall()
+                names.update({row[0]: (row[1], row[2]) for row in rows})
+        finally:
+            conn.close()
+
+    def ratio(value, digits):
+        return None if np.isnan(value) else round(float(value), digits)
+
+    rows = []
+    for pos, item_id in zip(order, ids):
+        name, sku = names.get(item_id, (None, None))
+        rows.append({
+            "item_id": item_id,
+            "name": name,
+            "sku": sku,
+            "quantity": int(columns["quantity"][pos]),
+            "units_sold": int(columns["units_sold"][pos]),
+            "revenue": round(float(columns["revenue"][pos]), 2),
+            "abc_class": str(columns["abc_class"][pos]),
+            "turnover": ratio(columns["turnover"][pos], 2),
+            "days_of_supply": ratio(columns["days_of_supply"][pos], 1),
+            "sell_through": ratio(columns["sell_through"][pos], 1),
+            "stock_to_sales": ratio(columns["stock_to_sales"][pos], 2)
+        })
+    return rows
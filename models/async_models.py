@@ -0,0 +1,76 @@
+"""
+Async facade over the model layer
+
+Usage:
+    async with AsyncModels(max_connections=4) as db:
+        items, customers = await db.gather(
+            db.inventory.get_items(50),
+            db.customers.list_all_customers(),
+        )
+"""
+import asyncio
+import functools
+
+from database.db_executor import DatabaseExecutor
+from models import (
+    inventory_model,
+    sales_order_model,
+    purchase_order_model,
+    customer_model,
+    supplier_model,
+    audit_log_model
+)
+
+
+class _AsyncModule:
+    """Exposes the functions defined in a model module as coroutines"""
+
+    def __init__(self, module, executor):
+        self._module = module
+        self._executor = executor
+
+    def __getattr__(self, name):
+        func = getattr(self._module, name, None)
+        # Only wrap the module's own public functions, not its imports
+        if (name.startswith("_") or not callable(func)
+                or getattr(func, "__module__", None) != self._module.__name__):
+            raise AttributeError(f"{self._module.__name__} has no model function '{name}'")
+
+        @functools.wraps(func)
+        async def call(*args, **kwargs):
+            return await self._executor.run(func, *args, **kwargs)
+
+        setattr(self, name, call)
+        return call
+
+
+class AsyncModels:
+    """
+    Async entry point to inventory, order, customer, supplier and audit models.
+
+    Every call is dispatched to a DatabaseExecutor with a fixed number of
+    connections, so thousands of concurrent requests share a handful of
+    SQLite connections instead of one thread each.
+    """
+
+    def __init__(self, max_connections=4):
+        self.executor = DatabaseExecutor(max_connections)
+        self.inventory = _AsyncModule(inventory_model, self.executor)
+        self.sales_orders = _AsyncModule(sales_order_model, self.executor)
+        self.purchase_orders = _AsyncModule(purchase_order_model, self.executor)
+        self.customers = _AsyncModule(customer_model, self.executor)
+        self.suppliers = _AsyncModule(supplier_model, self.executor)
+        self.audit = _AsyncModule(audit_log_model, self.executor)
+
+    async def gather(self, *calls):
+        """Run several facade calls concurrently and return their results in order"""
+        return list(await asyncio.gather(*calls))
+
+    def close(self):
+        self.executor.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
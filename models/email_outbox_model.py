@@ -0,0 +1,235 @@
+"""
+Persistent email outbox
+
+Notifications are written here and delivered later by the background
+sender in utils.email_notifications, so a slow or unreachable SMTP server
+never holds up the action that triggered the email. Failed sends are
+retried with exponential backoff until MAX_ATTEMPTS, then left as FAILED.
+
+Status flow: PENDING -> SENDING -> SENT, or back to PENDING (retry) / FAILED.
+
+Digest events wait in email_digest_events until the recipient's oldest
+one is a full window old; then all of that recipient's events become one
+outbox message in the same transaction that deletes them.
+"""
+import json
+from datetime import datetime, timedelta
+
+from database.db_connection import get_connection
+
+MAX_ATTEMPTS = 6
+RETRY_BASE_SECONDS = 60
+RETRY_MAX_SECONDS = 3600
+
+
+def retry_delay(attempts):
+    """Seconds to wait before the next try after `attempts` failures"""
+    return min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS)
+
+
+def enqueue_email(to_email, subject, body_html, body_text=None):
+    """
+    Add a message to the outbox
+
+    Returns:
+        dict: {"success": bool, "id": int} or {"success": False, "message": str}
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        now = datetime.now().isoformat()
+        cur.execute("""
+            INSERT INTO email_outbox (to_email, subject, body_html, body_text, next_attempt_at, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (to_email, subject, body_html, body_text, now, now))
+        conn.commit()
+        return {"success": True, "id": cur.lastrowid}
+    except Exception as e:
+        conn.rollback()
+        return {"success": False, "message": f"Error queueing email: {e}"}
+    finally:
+        conn.close()
+
+
+def claim_due_emails(limit=50):
+    """
+    Mark up to `limit` due messages as SENDING and return them, oldest first
+
+    Returns:
+        list: dicts with id, to_email, subject, body_html, body_text, attempts
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("BEGIN IMMEDIATE")
+        cur.execute("""
+            SELECT id, to_email, subject, body_html, body_text, attempts
+            FROM email_outbox
+            WHERE status = 'PENDING' AND next_attempt_at <= ?
+            ORDER BY next_attempt_at, id
+            LIMIT ?
+        """, (datetime.now().isoformat(), limit))
+        rows = [dict(row) for row in cur.fetchall()]
+        cur.executemany("UPDATE email_outbox SET status = 'SENDING' WHERE id = ?", [(row["id"],) for row in rows])
+        conn.commit()
+        return rows
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def mark_emails_sent(ids):
+    """Record successful delivery"""
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.executemany("""
+            UPDATE email_outbox SET status = 'SENT', sent_at = ?, last_error = NULL WHERE id = ?
+        """, [(datetime.now().isoformat(), email_id) for email_id in ids])
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def mark_email_failed(email_id, attempts, error):
+    """
+    Record a failed attempt: schedule a retry with backoff, or give up
+    after MAX_ATTEMPTS
+
+    Args:
+        email_id (int): Outbox id
+        attempts (int): Attempts made so far, including this one
+        error (str): Reason for the failure
+    """
+    status = "FAILED" if attempts >= MAX_ATTEMPTS else "PENDING"
+    next_attempt_at = (datetime.now() + timedelta(seconds=retry_delay(attempts))).isoformat()
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            UPDATE email_outbox
+            SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ?
+            WHERE id = ?
+        """, (status, attempts, next_attempt_at, str(error)[:500], email_id))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def requeue_interrupted_emails():
+    """Put messages left SENDING by a crashed sender back in the queue (they may go out twice)"""
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("UPDATE email_outbox SET status = 'PENDING' WHERE status = 'SENDING'")
+        conn.commit()
+        return cur.rowcount
+    finally:
+        conn.close()
+
+
+def next_email_due():
+    """When the earliest pending message is due (ISO string), or None if the queue is empty"""
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT MIN(next_attempt_at) FROM email_outbox WHERE status = 'PENDING'")
+        return cur.fetchone()[0]
+    finally:
+        conn.close()
+
+
+def get_outbox_counts():
+    """Number of messages per status"""
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT status, COUNT(*) FROM email_outbox GROUP BY status")
+        return {row[0]: row[1] for row in cur.fetchall()}
+    finally:
+        conn.close()
+
+
+def add_digest_event(to_email, kind, payload):
+    """
+    Record a notification for the recipient's next digest
+
+    Returns:
+        dict: {"success": bool, "id": int} or {"success": False, "message": str}
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            INSERT INTO email_digest_events (to_email, kind, payload, created_at)
+            VALUES (?, ?, ?, ?)
+        """, (to_email, kind, json.dumps(payload), datetime.now().isoformat()))
+        conn.commit()
+        return {"success": True, "id": cur.lastrowid}
+    except Exception as e:
+        conn.rollback()
+        return {"success": False, "message": f"Error recording notification: {e}"}
+    finally:
+        conn.close()
+
+
+def flush_digests(window_seconds, render):
+    """
+    Turn each recipient's events into one outbox message once the oldest
+    has waited window_seconds
+
+    Args:
+        window_seconds (float): Digest window
+        render (callable): render(events) -> (subject, body_html, body_text), where
+            events are dicts with kind, payload (decoded) and created_at, oldest first
+
+    Returns:
+        int: Number of digests queued
+    """
+    cutoff = (datetime.now() - timedelta(seconds=window_seconds)).isoformat()
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("BEGIN IMMEDIATE")
+        cur.execute("""
+            SELECT to_email FROM email_digest_events
+            GROUP BY to_email HAVING MIN(created_at) <= ?
+        """, (cutoff,))
+        recipients = [row[0] for row in cur.fetchall()]
+        now = datetime.now().isoformat()
+        for to_email in recipients:
+            cur.execute("""
+                SELECT id, kind, payload, created_at FROM email_digest_events
+                WHERE to_email = ? ORDER BY id
+            """, (to_email,))
+            rows = cur.fetchall()
+            events = [{"kind": row[1], "payload": json.loads(row[2]), "created_at": row[3]} for row in rows]
+            subject, body_html, body_text = render(events)
+            cur.execute("""
+                INSERT INTO email_outbox (to_email, subject, body_html, body_text, next_attempt_at, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (to_email, subject, body_html, body_text, now, now))
+            cur.execute("DELETE FROM email_digest_events WHERE to_email = ? AND id <= ?", (to_email, rows[-1][0]))
+        conn.commit()
+        return len(recipients)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def next_digest_due(window_seconds):
+    """When the next digest is due (ISO string), or None if no events are waiting"""
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT MIN(created_at) FROM email_digest_events")
+        oldest = cur.fetchone()[0]
+        if oldest is None:
+            return None
+        return (datetime.fromisoformat(oldest) + timedelta(seconds=window_seconds)).isoformat()
+    finally:
+        conn.close()
@@ -0,0 +1,193 @@
+"""
+Demand forecasting and automatic reorder points
+
+A nightly job reads per-item daily sales from the daily_item_sales rollup
+for the last `history_days` whole days and estimates, for every item at
+once (weighted sums in SQLite, the rest in NumPy):
+
+    daily demand   exponentially weighted (or simple) moving average,
+                   counting days without sales as zero demand
+    variability    standard deviation of daily demand under the same weights
+
+and derives
+    safety stock   z(service level) * sd * sqrt(lead time)
+    reorder point  demand * lead time + safety stock
+
+Results go to demand_forecasts and items.min_stock_level / reorder_point in
+one transaction. Items with no sales in the window keep their manual values.
+
+Run nightly with: python -m models.forecast_model
+"""
+import math
+from datetime import date, datetime, timedelta
+from statistics import NormalDist
+
+from database.db_connection import get_connection
+from models.analytics_model import NUMPY_AVAILABLE, NUMPY_MISSING
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+
+HISTORY_DAYS = 90
+LEAD_TIME_DAYS = 7
+SERVICE_LEVEL = 0.95
+ALPHA = 0.1
+
+
+def day_weights(history_days, method="ewma", alpha=ALPHA):
+    """
+    Weight of each day of the window by age, 0 = most recent day
+
+    "ewma" weights days alpha * (1 - alpha) ** age, "sma" weights them equally.
+    Days without sales still carry their weight as zero demand.
+    """
+    ages = np.arange(history_days, dtype=np.float64)
+    if method == "ewma":
+        return alpha * (1 - alpha) ** ages
+    if method == "sma":
+        return np.ones(history_days)
+    raise ValueError(f"Unknown forecast method: {method}")
+
+
+def demand_statistics(weighted_sum, weighted_sum_sq, total_weight):
+    """
+    Vectorized demand rate and standard deviation from weighted sums
+
+    Args:
+        weighted_sum (ndarray): Per item sum of weight * quantity over sale days
+        weighted_sum_sq (ndarray): Per item sum of weight * quantity ** 2
+        total_weight (float): Sum of weights over every day of the window
+
+    Returns:
+        tuple: (mean daily demand, daily demand standard deviation) arrays
+    """
+    mean = weighted_sum / total_weight
+    variance = np.maximum(weighted_sum_sq / total_weight - mean * mean, 0)
+    return mean, np.sqrt(variance)
+
+
+def run_reorder_job(history_days=HISTORY_DAYS, lead_time_days=LEAD_TIME_DAYS,
+                    service_level=SERVICE_LEVEL, method="ewma", alpha=ALPHA,
+                    as_of=None, dry_run=False):
+    """
+    Forecast demand for every item and update reorder points in bulk
+
+    Args:
+        history_days (int): Whole days of sales history to use
+        lead_time_days (float): Replenishment lead time
+        service_level (float): Target probability of not stocking out during lead time
+        method (str): "ewma" or "sma"
+        alpha (float): Smoothing factor for "ewma"
+        as_of (date|str, optional): Last day of history (default: yesterday)
+        dry_run (bool): Compute and return results without writing them
+
+    Returns:
+        dict: {"success", "message", "items_forecast", "items_updated", "forecasts": {item_id: {...}} (dry run only)}
+    """
+    if not NUMPY_AVAILABLE:
+        return dict(NUMPY_MISSING)
+
+    last_day = date.fromisoformat(str(as_of)[:10]) if as_of else date.today() - timedelta(days=1)
+    z = NormalDist().inv_cdf(service_level)
+
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.row_factory = None
+    try:
+        weights = day_weights(history_days, method, alpha)
+        days = [(last_day - timedelta(days=age)).isoformat() for age in range(history_days)]
+        # weights are bound as a tiny VALUES table so SQLite sums per item and
+        # only one row per item crosses into Python
+        cur.execute(f"""
+            WITH w(day, weight) AS (VALUES {", ".join(["(?, ?)"] * history_days)})
+            SELECT s.item_id, SUM(w.weight * s.quantity), SUM(w.weight * s.quantity * s.quantity)
+            FROM daily_item_sales s JOIN w ON s.day = w.day
+            GROUP BY s.item_id
+        """, [value for pair in zip(days, weights.tolist()) for value in pair])
+        sums = np.array(cur.fetchall(), dtype=np.float64).reshape(-1, 3)
+
+        forecast_ids = sums[:, 0].astype(np.int64)
+        mean, sd = demand_statistics(sums[:, 1], sums[:, 2], weights.sum())
+        # round away float noise first so exact demand doesn't ceil up a unit
+        safety_stock = np.ceil(np.round(z * sd * math.sqrt(lead_time_days), 6))
+        reorder_point = np.ceil(np.round(mean * lead_time_days, 6) + safety_stock)
+        active = mean > 0
+        forecast_ids, mean, sd = forecast_ids[active], mean[active], sd[active]
+        safety_stock, reorder_point = safety_stock[active], reorder_point[active]
+
+        if dry_run:
+            return {
+                "success": True,
+                "message": f"Forecast {len(forecast_ids)} items (dry run)",
+                "items_forecast": int(len(forecast_ids)),
+                "items_updated": 0,
+                "forecasts": {
+                    int(i): {"daily_demand": float(m), "demand_std": float(s),
+                             "safety_stock": int(ss), "reorder_point": int(rp)}
+                    for i, m, s, ss, rp in zip(forecast_ids, mean, sd, safety_stock, reorder_point)
+                }
+            }
+
+        computed_at = datetime.now().isoformat()
+        ids = forecast_ids.tolist()
+        stock = safety_stock.astype(np.int64).tolist()
+        points = reorder_point.astype(np.int64).tolist()
+        cur.execute("BEGIN IMMEDIATE")
+        cur.executemany("""
+            INSERT OR REPLACE INTO demand_forecasts
+                (item_id, daily_demand, demand_std, safety_stock, reorder_point, method, history_days, computed_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, zip(ids, mean.tolist(), sd.tolist(), stock, points,
+                 [method] * len(ids), [history_days] * len(ids), [computed_at] * len(ids)))
+        cur.executemany("""
+            UPDATE items SET min_stock_level = ?, reorder_point = ?
+            WHERE id = ? AND (min_stock_level IS NOT ? OR reorder_point IS NOT ?)
+        """, zip(stock, points, ids, stock, points))
+        updated = cur.rowcount
+        conn.commit()
+        return {
+            "success": True,
+            "message": f"Forecast {len(ids)} items, updated reorder points on {updated}",
+            "items_forecast": len(ids),
+            "items_updated": updated
+        }
+    except Exception as e:
+        conn.rollback()
+        return {"success": False, "message": f"Error running reorder job: {e}"}
+    finally:
+        conn.close()
+
+
+def get_demand_forecast(item_id):
+    """Get the latest stored forecast for an item"""
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            SELECT daily_demand, demand_std, safety_stock, reorder_point, method, history_days, computed_at
+            FROM demand_forecasts WHERE item_id = ?
+        """, (item_id,))
+        row = cur.fetchone()
+        if not row:
+            return {"success": False, "message": "No forecast for this item"}
+        return {
+            "success": True,
+            "forecast": {
+                "item_id": item_id,
+                "daily_demand": row[0],
+                "demand_std": row[1],
+                "safety_stock": row[2],
+                "reorder_point": row[3],
+                "method": row[4],
+                "history_days": row[5],
+                "computed_at": row[6]
+            }
+        }
+    except Exception as e:
+        return {"success": False, "message": f"Error fetching forecast: {e}"}
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    print(run_reorder_job()["message"])
@@ -1,4 +1,6 @@
 from database.db_connection import get_connection
+from models.movement_model import record_movements
+from utils.barcode_utils import normalize_barcode
 
 def add_item(payload: dict) -> int:
     conn = get_connection(); cur = conn.cursor()
@@ -6,26 +8,40 @@ def add_item(payload: dict) -> int:
         "INSERT INTO items (name, sku, quantity, price, min_stock_level, reorder_point, barcode) VALUES (?,?,?,?,?,?,?)",
         (payload.get("name"), payload.get("sku"), int(payload.get("quantity", 0)), 
          float(payload.get("price", 0.0)), int(payload.get("min_stock_level", 10)), 
-         int(payload.get("reorder_point", 20)), payload.get("barcode"))
+         int(payload.get("reorder_point", 20)), normalize_barcode(payload.get("barcode")) or None)
     )
-    conn.commit()
     iid = cur.lastrowid
+    record_movements(cur, [(iid, int(payload.get("quantity", 0)))], "INITIAL")
+    conn.commit()
     conn.close()
     return iid
 
 def update_item(item_id: int, payload: dict) -> bool:
+    """Update item fields; raises ValueError if quantity would drop below the reserved quantity"""
     fields, vals = [], []
     for k in ("name", "sku", "quantity", "price", "min_stock_level", "reorder_point", "barcode"):
         if k in payload and payload[k] is not None:
             fields.append(f"{k}=?")
-            vals.append(payload[k])
+            vals.append(normalize_barcode(payload[k]) or None if k == "barcode" else payload[k])
     if not fields:
         return False
     vals.append(item_id)
     conn = get_connection(); cur = conn.cursor()
+    old_quantity = None
+    if payload.get("quantity") is not None:
+        cur.execute("BEGIN IMMEDIATE")
+        cur.execute("SELECT quantity, reserved_quantity FROM items WHERE id = ?", (item_id,))
+        row = cur.fetchone()
+        if row and int(payload["quantity"]) < row[1]:
+            conn.rollback()
+            conn.close()
+            raise ValueError(f"Quantity cannot be below the {row[1]} units reserved by pending sales orders")
+        old_quantity = row[0] if row else None
     cur.execute(f"UPDATE items SET {', '.join(fields)} WHERE id = ?", vals)
-    conn.commit()
     ok = cur.rowcount > 0
+    if ok and old_quantity is not None:
+        record_movements(cur, [(item_id, int(payload["quantity"]) - old_quantity)], "ADJUSTMENT")
+    conn.commit()
     conn.close()
     return ok
 
@@ -88,14 +104,23 @@ def get_item(item_id: int):
         conn.close()
 
 def update_item_quantity(item_id: int, new_quantity: int):
-    """Update item quantity"""
+    """Update item quantity (never below what pending sales orders have reserved)"""
     conn = get_connection()
     cur = conn.cursor()
     try:
+        cur.execute("BEGIN IMMEDIATE")
+        cur.execute("SELECT quantity, reserved_quantity FROM items WHERE id = ?", (item_id,))
+        row = cur.fetchone()
+        if not row:
+            conn.rollback()
+            return {"success": False, "message": "Item not found"}
+        if new_quantity < row[1]:
+            conn.rollback()
+            return {"success": False,
+                    "message": f"Quantity cannot be below the {row[1]} units reserved by pending sales orders"}
         cur.execute("UPDATE items SET quantity = ? WHERE id = ?", (new_quantity, item_id))
+        record_movements(cur, [(item_id, new_quantity - row[0])], "ADJUSTMENT")
         conn.commit()
-        if cur.rowcount == 0:
-            return {"success": False, "message": "Item not found"}
         return {"success": True, "message": "Quantity updated successfully"}
     except Exception as e:
         conn.rollback()
@@ -0,0 +1,236 @@
+"""
+Inventory movement ledger and point-in-time stock
+
+Every change to items.quantity appends a row to inventory_movements in the
+same transaction, carrying the signed change and the quantity after it.
+Stock as of a moment is therefore the quantity_after of the item's last
+movement at or before that moment: one seek on the (item_id, created_at)
+index, O(log n) no matter how long the history is. Periodic snapshots in
+inventory_snapshots cover items that had no movement since the last one.
+Times are stored in UTC like the rest of the schema; arguments are local.
+"""
+from datetime import date, datetime, timedelta, timezone
+
+from database.db_connection import get_connection
+
+SNAPSHOT_INTERVAL = timedelta(days=1)
+# Same as the schema's datetime('now') defaults: UTC, to the second
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _timestamp(value, end_of_day=True):
+    """
+    Normalise a datetime/date/ISO string to the stored UTC format
+
+    Naive values are local time. A bare date means the end of that day, or
+    its start with end_of_day=False.
+    """
+    if value is None:
+        return datetime.now(timezone.utc).strftime(TIMESTAMP_FORMAT)
+    if isinstance(value, datetime):
+        moment = value
+    else:
+        text = value.isoformat() if isinstance(value, date) else str(value)
+        moment = datetime.fromisoformat(text)
+        if len(text) == 10 and end_of_day:
+            moment = moment.replace(hour=23, minute=59, second=59)
+    return moment.astimezone(timezone.utc).strftime(TIMESTAMP_FORMAT)
+
+
+def movements_between(start_date=None, end_date=None, alias=""):
+    """
+    Build the created_at range condition for reports over the ledger
+
+    Returns:
+        tuple: (sql fragment starting with " AND", params list)
+    """
+    clause, params = "", []
+    if start_date:
+        clause += f" AND {alias}created_at >= ?"
+        params.append(_timestamp(start_date, end_of_day=False))
+    if end_date:
+        clause += f" AND {alias}created_at <= ?"
+        params.append(_timestamp(end_date))
+    return clause, params
+
+
+def record_movements(cur, changes, reason, reference_type=None, reference_id=None, created_at=None):
+    """
+    Append ledger rows for quantity changes that were just applied to items
+
+    Must run on the same cursor/transaction as the UPDATE it records, after
+    that UPDATE, so quantity_after is read from the new row.
+
+    Args:
+        cur: Cursor inside an open transaction
+        changes (list): (item_id, change) pairs; zero changes are skipped
+        reason (str): INITIAL, ADJUSTMENT, SALE, PURCHASE, ...
+        reference_type (str, optional): e.g. SALES_ORDER
+        reference_id (int, optional): Id of the referenced record
+        created_at (str, optional): Local time (see _timestamp); defaults to now
+    """
+    created_at = _timestamp(created_at)
+    cur.executemany("""
+        INSERT INTO inventory_movements
+            (item_id, change, quantity_after, reason, reference_type, reference_id, created_at)
+        SELECT id, ?, quantity, ?, ?, ?, ? FROM items WHERE id = ?
+    """, [(change, reason, reference_type, reference_id, created_at, item_id)
+          for item_id, change in changes if change])
+
+
+def _stock_as_of(cur, item_id, as_of):
+    """Quantity of one item at as_of, or None if the item is unknown"""
+    cur.execute("""
+        SELECT quantity_after, created_at FROM inventory_movements
+        WHERE item_id = ? AND created_at <= ?
+        ORDER BY created_at DESC, id DESC LIMIT 1
+    """, (item_id, as_of))
+    movement = cur.fetchone()
+    cur.execute("""
+        SELECT quantity, snapshot_at FROM inventory_snapshots
+        WHERE item_id = ? AND snapshot_at <= ?
+        ORDER BY snapshot_at DESC LIMIT 1
+    """, (item_id, as_of))
+    snapshot = cur.fetchone()
+
+    if movement and (not snapshot or movement[1] > snapshot[1]):
+        return movement[0]
+    if snapshot:
+        return snapshot[0]
+
+    # Nothing recorded before as_of: stock was whatever the next movement started from
+    cur.execute("""
+        SELECT quantity_after - change FROM inventory_movements
+        WHERE item_id = ? AND created_at > ?
+        ORDER BY created_at, id LIMIT 1
+    """, (item_id, as_of))
+    row = cur.fetchone()
+    if row:
+        return row[0]
+    cur.execute("SELECT quantity FROM items WHERE id = ?", (item_id,))
+    row = cur.fetchone()
+    return row[0] if row else None
+
+
+def get_stock_as_of(item_id, as_of):
+    """
+    Get an item's stock level at a point in time
+
+    Args:
+        item_id (int): Item ID
+        as_of (datetime|date|str): Moment to look up; a date means end of that day
+
+    Returns:
+        dict: {"success", "item_id", "as_of", "quantity"}
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        as_of = _timestamp(as_of)
+        quantity = _stock_as_of(cur, item_id, as_of)
+        if quantity is None:
+            return {"success": False, "message": "Item not found"}
+        return {"success": True, "item_id": item_id, "as_of": as_of, "quantity": quantity}
+    except Exception as e:
+        return {"success": False, "message": f"Error fetching stock: {e}"}
+    finally:
+        conn.close()
+
+
+def get_stock_as_of_bulk(item_ids, as_of):
+    """
+    Get stock levels for many items at a point in time over one connection
+
+    Returns:
+        dict: {"success", "as_of", "quantities": {item_id: quantity}}
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        as_of = _timestamp(as_of)
+        quantities = {}
+        for item_id in item_ids:
+            quantity = _stock_as_of(cur, item_id, as_of)
+            if quantity is not None:
+                quantities[item_id] = quantity
+        return {"success": True, "as_of": as_of, "quantities": quantities}
+    except Exception as e:
+        return {"success": False, "message": f"Error fetching stock: {e}"}
+    finally:
+        conn.close()
+
+
+def get_item_movements(item_id, start_date=None, end_date=None, limit=100):
+    """
+    Get an item's ledger rows, newest first
+
+    Returns:
+        dict: {"success", "movements": [...]}
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        query = """
+            SELECT id, change, quantity_after, reason, reference_type, reference_id, created_at
+            FROM inventory_movements WHERE item_id = ?
+        """
+        dates, date_params = movements_between(start_date, end_date)
+        params = [item_id] + date_params
+        query += dates + " ORDER BY created_at DESC, id DESC LIMIT ?"
+        params.append(limit)
+        cur.execute(query, params)
+        movements = [
+            {
+                "id": row[0],
+                "change": row[1],
+                "quantity_after": row[2],
+                "reason": row[3],
+                "reference_type": row[4],
+                "reference_id": row[5],
+                "created_at": row[6]
+            }
+            for row in cur.fetchall()
+        ]
+        return {"success": True, "movements": movements}
+    except Exception as e:
+        return {"success": False, "message": f"Error fetching movements: {e}"}
+    finally:
+        conn.close()
+
+
+def take_snapshot(snapshot_at=None):
+    """
+    Record every item's current quantity as a snapshot row
+
+    Returns:
+        dict: {"success", "snapshot_at", "items"}
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        snapshot_at = _timestamp(snapshot_at)
+        cur.execute("""
+            INSERT OR REPLACE INTO inventory_snapshots (item_id, snapshot_at, quantity)
+            SELECT id, ?, quantity FROM items
+        """, (snapshot_at,))
+        conn.commit()
+        return {"success": True, "snapshot_at": snapshot_at, "items": cur.rowcount}
+    except Exception as e:
+        conn.rollback()
+        return {"success": False, "message": f"Error taking snapshot: {e}"}
+    finally:
+        conn.close()
+
+
+def take_snapshot_if_due(interval=SNAPSHOT_INTERVAL):
+    """Take a snapshot when the latest one is older than interval (run at startup)"""
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT MAX(snapshot_at) FROM inventory_snapshots")
+        latest = cur.fetchone()[0]
+    finally:
+        conn.close()
+    if latest and datetime.fromisoformat(latest).replace(tzinfo=timezone.utc) > datetime.now(timezone.utc) - interval:
+        return {"success": True, "snapshot_at": latest, "items": 0}
+    return take_snapshot()
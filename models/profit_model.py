@@ -0,0 +1,101 @@
+"""
+Profit engine
+
+Gross margin per item = revenue - quantity sold * unit cost, where the unit
+cost is the item's weighted average purchase price over every completed
+purchase up to the end of the period. Purchases of stock that has not been
+sold yet therefore no longer count as a loss in the period they were bought.
+
+Everything comes from the daily rollups in one pass per table: sales per
+item in the period, purchase quantity/cost per item up to the period end,
+and purchase totals for the period.
+"""
+from database.db_connection import get_connection
+from models.rollup_model import aggregate_orders
+
+
+def _unit_costs(cur, end_date=None):
+    """Weighted average purchase unit price per item up to end_date -> {item_id: unit_cost}"""
+    query = """
+        SELECT item_id, SUM(cost) / SUM(quantity)
+        FROM daily_item_purchases
+    """
+    params = []
+    if end_date:
+        query += " WHERE day <= ?"
+        params.append(str(end_date)[:10])
+    query += " GROUP BY item_id HAVING SUM(quantity) > 0"
+    cur.execute(query, params)
+    return dict(cur.fetchall())
+
+
+def get_profit_breakdown(start_date=None, end_date=None):
+    """
+    Compute revenue, cost of goods sold and gross margin, in total and per item
+
+    Args:
+        start_date (str, optional): Start date in ISO format
+        end_date (str, optional): End date in ISO format
+
+    Returns:
+        dict: {"success", "total_revenue", "total_cogs", "gross_profit",
+               "profit_margin_percent", "total_purchases", "total_sales_orders",
+               "total_purchase_orders", "uncosted_revenue", "items": [...]}
+              Items without any purchase history have unit_cost None and are
+              left out of COGS; their revenue is reported as uncosted_revenue.
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        (sales_orders, _, total_revenue), sold, _ = aggregate_orders(cur, "sales", start_date, end_date)
+        (purchase_orders, _, total_purchases), _, _ = aggregate_orders(cur, "purchases", start_date, end_date)
+        unit_costs = _unit_costs(cur, end_date)
+
+        names = {}
+        if sold:
+            cur.execute("SELECT id, name, sku FROM items")
+            names = {row[0]: (row[1], row[2]) for row in cur.fetchall()}
+
+        items = []
+        total_cogs = uncosted_revenue = 0.0
+        for item_id, (quantity, revenue) in sold.items():
+            unit_cost = unit_costs.get(item_id)
+            if unit_cost is None:
+                cogs = None
+                uncosted_revenue += revenue
+            else:
+                cogs = quantity * unit_cost
+                total_cogs += cogs
+            profit = revenue - cogs if cogs is not None else None
+            name, sku = names.get(item_id, (None, None))
+            items.append({
+                "item_id": item_id,
+                "name": name,
+                "sku": sku,
+                "quantity_sold": quantity,
+                "revenue": round(revenue, 2),
+                "unit_cost": round(unit_cost, 4) if unit_cost is not None else None,
+                "cogs": round(cogs, 2) if cogs is not None else None,
+                "gross_profit": round(profit, 2) if profit is not None else None,
+                "margin_percent": round(profit / revenue * 100, 2) if profit is not None and revenue else None
+            })
+        items.sort(key=lambda i: (i["gross_profit"] is None, -(i["gross_profit"] or 0)))
+
+        costed_revenue = total_revenue - uncosted_revenue
+        gross_profit = costed_revenue - total_cogs
+        return {
+            "success": True,
+            "total_revenue": round(total_revenue, 2),
+            "total_cogs": round(total_cogs, 2),
+            "gross_profit": round(gross_profit, 2),
+            "profit_margin_percent": round(gross_profit / costed_revenue * 100, 2) if costed_revenue > 0 else 0,
+            "total_purchases": round(total_purchases, 2),
+            "total_sales_orders": sales_orders,
+            "total_purchase_orders": purchase_orders,
+            "uncosted_revenue": round(uncosted_revenue, 2),
+            "items": items
+        }
+    except Exception as e:
+        return {"success": False, "message": f"Error computing profit: {e}"}
+    finally:
+        conn.close()
@@ -1,34 +1,117 @@
 from database.db_connection import get_connection
+from models.sequence_model import next_order_number
+from models.movement_model import record_movements
+from models.rollup_model import apply_purchase_order
+from utils.order_lines import check_order_lines
 from datetime import datetime
 
 def generate_order_number(prefix="PO"):
-    """Generate unique order number with timestamp"""
-    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-    return f"{prefix}-{timestamp}"
+    """Generate unique order number from the per-prefix order sequence"""
+    return next_order_number(prefix)
 
 def create_purchase_order(supplier_id, item_id, quantity, unit_price, created_by, notes=None):
-    """Create a new purchase order"""
+    """Create a new single-line purchase order"""
+    return create_purchase_order_with_lines(
+        supplier_id,
+        [{"item_id": item_id, "quantity": quantity, "unit_price": unit_price}],
+        created_by,
+        notes
+    )
+
+def insert_purchase_order(cur, order_number, supplier_id, lines, created_by, notes=None):
+    """
+    Insert a PENDING purchase order and its lines on cur, without committing
+
+    Returns:
+        int: The new order's ID
+    """
+    rows = [(int(l["item_id"]), int(l["quantity"]), float(l["unit_price"])) for l in lines]
+    total_quantity = sum(qty for _, qty, _ in rows)
+    total_price = sum(qty * price for _, qty, price in rows)
+    
+    # Single-line orders keep the item on the header for older readers
+    header_item_id, header_unit_price = (rows[0][0], rows[0][2]) if len(rows) == 1 else (None, None)
+    
+    cur.execute("""
+        INSERT INTO purchase_orders 
+        (order_number, supplier_id, item_id, quantity, unit_price, total_price, notes, created_by, status)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'PENDING')
+    """, (order_number, supplier_id, header_item_id, total_quantity, header_unit_price, total_price, notes, created_by))
+    order_id = cur.lastrowid
+    
+    cur.executemany("""
+        INSERT INTO purchase_order_lines (order_id, line_no, item_id, quantity, unit_price, total_price)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, [(order_id, line_no, item_id, qty, price, qty * price)
+          for line_no, (item_id, qty, price) in enumerate(rows, start=1)])
+    return order_id
+
+def create_purchase_order_with_lines(supplier_id, lines, created_by, notes=None):
+    """
+    Create a purchase order with any number of lines in one transaction
+    
+    Args:
+        supplier_id (int): Supplier ID
+        lines (list): Dicts with item_id, quantity and unit_price
+        created_by (int): User ID creating the order
+        notes (str, optional): Order notes
+    
+    Returns:
+        dict: {"success", "id", "order_number", "line_count", "message"}
+    """
+    if not lines:
+        return {"success": False, "message": "Purchase order must have at least one line"}
+    error = check_order_lines(lines)
+    if error:
+        return {"success": False, "message": error}
+    
     conn = get_connection()
     cur = conn.cursor()
     try:
         order_number = generate_order_number("PO")
-        total_price = quantity * unit_price
-        
-        cur.execute("""
-            INSERT INTO purchase_orders 
-            (order_number, supplier_id, item_id, quantity, unit_price, total_price, notes, created_by, status)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'PENDING')
-        """, (order_number, supplier_id, item_id, quantity, unit_price, total_price, notes, created_by))
+        order_id = insert_purchase_order(cur, order_number, supplier_id, lines, created_by, notes)
         conn.commit()
         
-        order_id = cur.lastrowid
-        return {"success": True, "id": order_id, "order_number": order_number, "message": "Purchase order created successfully"}
+        return {"success": True, "id": order_id, "order_number": order_number, "line_count": len(lines),
+                "message": "Purchase order created successfully"}
     except Exception as e:
         conn.rollback()
         return {"success": False, "message": f"Error creating purchase order: {e}"}
     finally:
         conn.close()
 
+def _fetch_order_lines(cur, order_id):
+    cur.execute("""
+        SELECT l.line_no, l.item_id, i.name, i.sku, l.quantity, l.unit_price, l.total_price
+        FROM purchase_order_lines l
+        LEFT JOIN items i ON l.item_id = i.id
+        WHERE l.order_id = ?
+        ORDER BY l.line_no
+    """, (order_id,))
+    return [
+        {
+            "line_no": row[0],
+            "item_id": row[1],
+            "item_name": row[2],
+            "sku": row[3],
+            "quantity": row[4],
+            "unit_price": row[5],
+            "total_price": row[6]
+        }
+        for row in cur.fetchall()
+    ]
+
+def get_purchase_order_lines(order_id):
+    """Get the lines of a purchase order"""
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        return {"success": True, "lines": _fetch_order_lines(cur, order_id)}
+    except Exception as e:
+        return {"success": False, "message": f"Error fetching purchase order lines: {e}"}
+    finally:
+        conn.close()
+
 def get_purchase_order(order_id):
     """Get purchase order by ID with related data"""
     conn = get_connection()
@@ -36,10 +119,11 @@ def get_purchase_order(order_id):
     try:
         cur.execute("""
             SELECT po.*, s.name as supplier_name, i.name as item_name, i.sku,
-                   u.username as created_by_name
+                   u.username as created_by_name,
+                   (SELECT COUNT(*) FROM purchase_order_lines l WHERE l.order_id = po.id) as line_count
             FROM purchase_orders po
             JOIN suppliers s ON po.supplier_id = s.id
-            JOIN items i ON po.item_id = i.id
+            LEFT JOIN items i ON po.item_id = i.id
             JOIN users u ON po.created_by = u.id
             WHERE po.id = ?
         """, (order_id,))
@@ -62,9 +146,11 @@ def get_purchase_order(order_id):
                     "created_at": row[10],
                     "completed_at": row[11],
                     "supplier_name": row[12],
-                    "item_name": row[13],
+                    "item_name": row[13] if row[3] is not None else f"{row[16]} items",
                     "sku": row[14],
-                    "created_by_name": row[15]
+                    "created_by_name": row[15],
+                    "line_count": row[16],
+                    "lines": _fetch_order_lines(cur, order_id)
                 }
             }
         return {"success": False, "message": "Purchase order not found"}
@@ -81,10 +167,11 @@ def list_all_purchase_orders(status=None):
         if status:
             query = """
                 SELECT po.*, s.name as supplier_name, i.name as item_name, i.sku,
-                       u.username as created_by_name
+                       u.username as created_by_name,
+                       (SELECT COUNT(*) FROM purchase_order_lines l WHERE l.order_id = po.id) as line_count
                 FROM purchase_orders po
                 JOIN suppliers s ON po.supplier_id = s.id
-                JOIN items i ON po.item_id = i.id
+                LEFT JOIN items i ON po.item_id = i.id
                 JOIN users u ON po.created_by = u.id
                 WHERE po.status = ?
                 ORDER BY po.created_at DESC
@@ -93,10 +180,11 @@ def list_all_purchase_orders(status=None):
         else:
             query = """
                 SELECT po.*, s.name as supplier_name, i.name as item_name, i.sku,
-                       u.username as created_by_name
+                       u.username as created_by_name,
+                       (SELECT COUNT(*) FROM purchase_order_lines l WHERE l.order_id = po.id) as line_count
                 FROM purchase_orders po
                 JOIN suppliers s ON po.supplier_id = s.id
-                JOIN items i ON po.item_id = i.id
+                LEFT JOIN items i ON po.item_id = i.id
                 JOIN users u ON po.created_by = u.id
                 ORDER BY po.created_at DESC
             """
@@ -119,9 +207,10 @@ def list_all_purchase_orders(status=None):
                 "created_at": row[10],
                 "completed_at": row[11],
                 "supplier_name": row[12],
-                "item_name": row[13],
+                "item_name": row[13] if row[3] is not None else f"{row[16]} items",
                 "sku": row[14],
-                "created_by_name": row[15]
+                "created_by_name": row[15],
+                "line_count": row[16]
             })
         return {"success": True, "orders": orders}
     except Exception as e:
@@ -140,16 +229,25 @@ def update_purchase_order_status(order_id, status, completed_at=None):
         if status == 'COMPLETED' and not completed_at:
             completed_at = datetime.now().isoformat()
         
+        cur.execute("BEGIN IMMEDIATE")
+        cur.execute("SELECT status FROM purchase_orders WHERE id = ?", (order_id,))
+        row = cur.fetchone()
+        if not row:
+            conn.rollback()
+            return {"success": False, "message": "Purchase order not found"}
+        
+        # Keep the daily rollups in step with what counts as completed
+        if row[0] == 'COMPLETED':
+            apply_purchase_order(cur, order_id, -1)
         cur.execute("""
             UPDATE purchase_orders 
             SET status = ?, completed_at = ?
             WHERE id = ?
         """, (status, completed_at, order_id))
+        if status == 'COMPLETED':
+            apply_purchase_order(cur, order_id)
         conn.commit()
         
-        if cur.rowcount == 0:
-            return {"success": False, "message": "Purchase order not found"}
-        
         return {"success": True, "message": f"Purchase order status updated to {status}"}
     except Exception as e:
         conn.rollback()
@@ -157,6 +255,78 @@ def update_purchase_order_status(order_id, status, completed_at=None):
     finally:
         conn.close()
 
+def complete_purchase_order(order_id, completed_at=None):
+    """
+    Receive every line of a pending purchase order into inventory and mark it COMPLETED
+    
+    Stock for all lines is incremented with one executemany in the same
+    transaction as the status change, so either every line is applied or none.
+    
+    Returns:
+        dict: {"success", "message", "line_count",
+               "items": [{"item_id", "quantity", "old_quantity", "new_quantity"}]}
+            with one entry per distinct item, its quantity summed over the
+            order's lines; line_count is the number of order lines
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("BEGIN IMMEDIATE")
+        cur.execute("SELECT status FROM purchase_orders WHERE id = ?", (order_id,))
+        row = cur.fetchone()
+        if not row:
+            conn.rollback()
+            return {"success": False, "message": "Purchase order not found"}
+        if row[0] != 'PENDING':
+            conn.rollback()
+            return {"success": False, "message": f"Cannot complete order with status: {row[0]}"}
+        
+        cur.execute("""
+            SELECT l.item_id, SUM(l.quantity), i.quantity, COUNT(*)
+            FROM purchase_order_lines l
+            LEFT JOIN items i ON l.item_id = i.id
+            WHERE l.order_id = ?
+            GROUP BY l.item_id
+        """, (order_id,))
+        received = cur.fetchall()
+        if not received:
+            conn.rollback()
+            return {"success": False, "message": "Purchase order has no lines"}
+        
+        for item_id, _, current_qty, _ in received:
+            if current_qty is None:
+                conn.rollback()
+                return {"success": False, "message": f"Item {item_id} not found"}
+        
+        cur.executemany(
+            "UPDATE items SET quantity = quantity + ? WHERE id = ?",
+            [(qty, item_id) for item_id, qty, _, _ in received]
+        )
+        record_movements(cur, [(item_id, qty) for item_id, qty, _, _ in received],
+                         "PURCHASE", "PURCHASE_ORDER", order_id, completed_at)
+        
+        cur.execute("""
+            UPDATE purchase_orders SET status = 'COMPLETED', completed_at = ?
+            WHERE id = ?
+        """, (completed_at or datetime.now().isoformat(), order_id))
+        apply_purchase_order(cur, order_id)
+        conn.commit()
+        
+        return {
+            "success": True,
+            "message": "Purchase order completed",
+            "line_count": sum(row[3] for row in received),
+            "items": [
+                {"item_id": item_id, "quantity": qty, "old_quantity": current_qty, "new_quantity": current_qty + qty}
+                for item_id, qty, current_qty, _ in received
+            ]
+        }
+    except Exception as e:
+        conn.rollback()
+        return {"success": False, "message": f"Error completing purchase order: {e}"}
+    finally:
+        conn.close()
+
 def delete_purchase_order(order_id):
     """Delete a purchase order (only if PENDING)"""
     conn = get_connection()
@@ -171,6 +341,7 @@ def delete_purchase_order(order_id):
         if row[0] != 'PENDING':
             return {"success": False, "message": "Cannot delete non-pending purchase order"}
         
+        cur.execute("DELETE FROM purchase_order_lines WHERE order_id = ?", (order_id,))
         cur.execute("DELETE FROM purchase_orders WHERE id = ?", (order_id,))
         conn.commit()
         return {"success": True, "message": "Purchase order deleted successfully"}
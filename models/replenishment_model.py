@@ -0,0 +1,160 @@
+"""
+Replenishment planner: turns reorder conditions into draft purchase orders
+
+An item needs replenishing when its inventory position (on hand, minus
+stock reserved for pending sales orders, plus quantity on pending purchase
+orders) is at or below its reorder point. For each such item the planner
+picks the supplier of its most recent completed purchase, at that
+purchase's unit price, with the average lead time of that supplier for the
+item, then sizes the order:
+
+    "eoq"     economic order quantity sqrt(2 * annual demand * ordering cost
+              / (unit cost * holding rate)), at least enough to lift the
+              position above the reorder point
+    "up_to"   order up to reorder point + forecast daily demand * cover days
+
+Lines are grouped into one PENDING purchase order per supplier, all created
+in a single transaction. Items never purchased before are reported as
+skipped, since there is no supplier to order from.
+"""
+import math
+
+from database.db_connection import get_connection
+from models.sequence_model import next_order_numbers
+from models.purchase_order_model import insert_purchase_order
+
+ORDERING_COST = 50.0
+HOLDING_RATE = 0.25
+COVER_DAYS = 30
+PLANNER_NOTE = "Auto-generated by replenishment planner"
+
+# One row per item at or below its reorder point, with the last supplier it was bought from
+_PLAN_SQL = """
+    WITH on_order AS (
+        SELECT l.item_id, SUM(l.quantity) AS quantity
+        FROM purchase_order_lines l JOIN purchase_orders o ON l.order_id = o.id
+        WHERE o.status = 'PENDING'
+        GROUP BY l.item_id
+    ),
+    candidates AS (
+        SELECT i.id, i.quantity - i.reserved_quantity + COALESCE(oo.quantity, 0) AS position,
+               i.reorder_point, COALESCE(f.daily_demand, 0) AS daily_demand
+        FROM items i
+        LEFT JOIN on_order oo ON oo.item_id = i.id
+        LEFT JOIN demand_forecasts f ON f.item_id = i.id
+        WHERE i.quantity - i.reserved_quantity + COALESCE(oo.quantity, 0) <= i.reorder_point
+    ),
+    purchases AS (
+        SELECT l.item_id, o.supplier_id, l.unit_price, o.completed_at,
+               -- created_at defaults to UTC, completed_at is written in local time
+               julianday(o.completed_at) - julianday(o.created_at, 'localtime') AS lead_time
+        FROM purchase_order_lines l JOIN purchase_orders o ON l.order_id = o.id
+        WHERE o.status = 'COMPLETED' AND l.item_id IN (SELECT id FROM candidates)
+    ),
+    -- SQLite fills bare columns from the row holding MAX(), i.e. the latest purchase
+    last_purchase AS (
+        SELECT item_id, supplier_id, unit_price, MAX(completed_at) FROM purchases GROUP BY item_id
+    ),
+    lead_times AS (
+        SELECT item_id, supplier_id, AVG(lead_time) AS lead_time FROM purchases GROUP BY item_id, supplier_id
+    )
+    SELECT c.id, c.position, c.reorder_point, c.daily_demand, lp.supplier_id, lp.unit_price, lt.lead_time
+    FROM candidates c
+    LEFT JOIN last_purchase lp ON lp.item_id = c.id
+    LEFT JOIN lead_times lt ON lt.item_id = c.id AND lt.supplier_id = lp.supplier_id
+    ORDER BY lp.supplier_id, c.id
+"""
+
+
+def order_quantity(position, reorder_point, daily_demand, unit_cost, method="eoq",
+                   ordering_cost=ORDERING_COST, holding_rate=HOLDING_RATE, cover_days=COVER_DAYS):
+    """
+    Units to order for one item
+
+    Args:
+        position (int): Inventory position (on hand - reserved + on order)
+        reorder_point (int): Reorder point
+        daily_demand (float): Forecast daily demand (0 when unknown)
+        unit_cost (float): Expected unit cost
+        method (str): "eoq" or "up_to"
+
+    Returns:
+        int: Quantity, always enough to lift the position above the reorder point
+    """
+    shortfall = reorder_point - position + 1
+    if method == "eoq":
+        holding_cost = unit_cost * holding_rate
+        eoq = math.sqrt(2 * daily_demand * 365 * ordering_cost / holding_cost) if holding_cost > 0 else 0
+        return max(math.ceil(eoq), shortfall)
+    if method == "up_to":
+        return max(reorder_point + math.ceil(daily_demand * cover_days) - position, shortfall)
+    raise ValueError(f"Unknown order quantity method: {method}")
+
+
+def plan_replenishment(created_by, method="eoq", dry_run=False, **quantity_options):
+    """
+    Plan replenishment for the whole catalog and create draft purchase orders
+
+    Args:
+        created_by (int): User ID recorded on the purchase orders
+        method (str): "eoq" or "up_to"
+        dry_run (bool): Return the plan without creating orders
+        **quantity_options: ordering_cost, holding_rate, cover_days overrides
+
+    Returns:
+        dict: {"success", "message", "orders": [{supplier_id, lines, total_price, id, order_number}],
+               "line_count", "skipped": [item ids without purchase history]}
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.row_factory = None
+    try:
+        if not dry_run:
+            # Plan and write under one write lock so concurrent runs can't order twice
+            cur.execute("BEGIN IMMEDIATE")
+        cur.execute(_PLAN_SQL)
+
+        orders, skipped = [], []
+        for item_id, position, reorder_point, daily_demand, supplier_id, unit_price, lead_time in cur.fetchall():
+            if supplier_id is None:
+                skipped.append(item_id)
+                continue
+            if not orders or orders[-1]["supplier_id"] != supplier_id:
+                orders.append({"supplier_id": supplier_id, "lines": [], "total_price": 0.0, "lead_time_days": 0.0})
+            order = orders[-1]
+            quantity = order_quantity(position, reorder_point, daily_demand, unit_price or 0.0,
+                                      method, **quantity_options)
+            order["lines"].append({"item_id": item_id, "quantity": quantity, "unit_price": unit_price})
+            order["total_price"] += quantity * unit_price
+            order["lead_time_days"] = max(order["lead_time_days"], round(lead_time or 0.0, 1))
+        line_count = sum(len(o["lines"]) for o in orders)
+
+        if dry_run:
+            return {
+                "success": True,
+                "message": f"Planned {len(orders)} purchase orders with {line_count} lines (dry run)",
+                "orders": orders,
+                "line_count": line_count,
+                "skipped": skipped
+            }
+
+        for order, order_number in zip(orders, next_order_numbers(cur, "PO", len(orders))):
+            order["id"] = insert_purchase_order(
+                cur, order_number, order["supplier_id"], order["lines"], created_by,
+                f"{PLANNER_NOTE}; expected lead time {order['lead_time_days']} days"
+            )
+            order["order_number"] = order_number
+        conn.commit()
+
+        return {
+            "success": True,
+            "message": f"Created {len(orders)} purchase orders with {line_count} lines",
+            "orders": orders,
+            "line_count": line_count,
+            "skipped": skipped
+        }
+    except Exception as e:
+        conn.rollback()
+        return {"success": False, "message": f"Error planning replenishment: {e}"}
+    finally:
+        conn.close()
@@ -3,6 +3,27 @@ Reports Model for generating analytics and insights
 """
 from database.db_connection import get_connection
 from datetime import datetime, timedelta
+from models.rollup_model import ROLLUPS, aggregate_orders, completed_between
+from models.profit_model import get_profit_breakdown
+from models.movement_model import movements_between
+
+
+def _top(cur, table, values, key, limit=10):
+    """Rank aggregated values and attach names, skipping rows whose record was deleted"""
+    columns = "name, sku" if table == "items" else "name"
+    ranked = sorted(values.items(), key=lambda kv: key(kv[1]), reverse=True)
+    top = []
+    for start in range(0, len(ranked), limit * 2):
+        chunk = ranked[start:start + limit * 2]
+        placeholders = ",".join("?" * len(chunk))
+        cur.execute(f"SELECT id, {columns} FROM {table} WHERE id IN ({placeholders})", [k for k, _ in chunk])
+        names = {row[0]: tuple(row[1:]) for row in cur.fetchall()}
+        for record_id, value in chunk:
+            if record_id in names:
+                top.append((names[record_id], value))
+                if len(top) == limit:
+                    return top
+    return top
 
 
 def get_inventory_summary():
@@ -65,106 +86,29 @@ def get_sales_report(start_date=None, end_date=None):
     conn = get_connection()
     cur = conn.cursor()
     
-    # Build query with date filters
-    query = """
-        SELECT 
-            COUNT(*) as total_orders,
-            SUM(quantity) as total_quantity_sold,
-            SUM(quantity * unit_price) as total_revenue,
-            AVG(quantity * unit_price) as avg_order_value
-        FROM sales_orders
-        WHERE status = 'COMPLETED'
-    """
-    params = []
-    
-    if start_date:
-        query += " AND order_date >= ?"
-        params.append(start_date)
-    
-    if end_date:
-        query += " AND order_date <= ?"
-        params.append(end_date)
-    
-    cur.execute(query, params)
-    row = cur.fetchone()
-    
-    total_orders = row[0] or 0
-    total_quantity = row[1] or 0
-    total_revenue = row[2] or 0.0
-    avg_order_value = row[3] or 0.0
+    totals, items, customers = aggregate_orders(cur, "sales", start_date, end_date)
+    total_orders, total_quantity, total_revenue = totals
+    avg_order_value = total_revenue / total_orders if total_orders else 0.0
     
     # Top selling items
-    top_items_query = """
-        SELECT 
-            i.name,
-            i.sku,
-            SUM(so.quantity) as total_sold,
-            SUM(so.quantity * so.unit_price) as revenue
-        FROM sales_orders so
-        JOIN items i ON so.item_id = i.id
-        WHERE so.status = 'COMPLETED'
-    """
-    top_params = []
-    
-    if start_date:
-        top_items_query += " AND so.order_date >= ?"
-        top_params.append(start_date)
-    
-    if end_date:
-        top_items_query += " AND so.order_date <= ?"
-        top_params.append(end_date)
-    
-    top_items_query += """
-        GROUP BY i.id, i.name, i.sku
-        ORDER BY total_sold DESC
-        LIMIT 10
-    """
-    
-    cur.execute(top_items_query, top_params)
     top_items = [
         {
-            'name': row[0],
-            'sku': row[1],
-            'total_sold': row[2],
-            'revenue': round(row[3], 2)
+            'name': name,
+            'sku': sku,
+            'total_sold': qty,
+            'revenue': round(revenue, 2)
         }
-        for row in cur.fetchall()
+        for (name, sku), (qty, revenue) in _top(cur, "items", items, key=lambda v: v[0])
     ]
     
     # Sales by customer
-    customer_query = """
-        SELECT 
-            c.name,
-            COUNT(so.id) as order_count,
-            SUM(so.quantity * so.unit_price) as total_spent
-        FROM sales_orders so
-        JOIN customers c ON so.customer_id = c.id
-        WHERE so.status = 'COMPLETED'
-    """
-    customer_params = []
-    
-    if start_date:
-        customer_query += " AND so.order_date >= ?"
-        customer_params.append(start_date)
-    
-    if end_date:
-        customer_query += " AND so.order_date <= ?"
-        customer_params.append(end_date)
-    
-    customer_query += """
-        GROUP BY c.id, c.name
-        ORDER BY total_spent DESC
-        LIMIT 10
-    """
-    
-    cur.execute(customer_query, customer_params)
     top_customers = [
         {
-            'name': row[0],
-            'order_count': row[1],
-            'total_spent': round(row[2], 2)
+            'name': name,
+            'order_count': count,
+            'total_spent': round(spent, 2)
         }
-        for row in cur.fetchall()
+        for (name,), (count, spent) in _top(cur, "customers", customers, key=lambda v: v[1])
     ]
     
     conn.close()
@@ -193,106 +137,29 @@ def get_purchase_report(start_date=None, end_date=None):
     conn = get_connection()
     cur = conn.cursor()
     
-    # Build query with date filters
-    query = """
-        SELECT 
-            COUNT(*) as total_orders,
-            SUM(quantity) as total_quantity_purchased,
-            SUM(quantity * unit_price) as total_cost,
-            AVG(quantity * unit_price) as avg_order_cost
-        FROM purchase_orders
-        WHERE status = 'COMPLETED'
-    """
-    params = []
-    
-    if start_date:
-        query += " AND order_date >= ?"
-        params.append(start_date)
-    
-    if end_date:
-        query += " AND order_date <= ?"
-        params.append(end_date)
-    
-    cur.execute(query, params)
-    row = cur.fetchone()
-    
-    total_orders = row[0] or 0
-    total_quantity = row[1] or 0
-    total_cost = row[2] or 0.0
-    avg_order_cost = row[3] or 0.0
+    totals, items, suppliers = aggregate_orders(cur, "purchases", start_date, end_date)
+    total_orders, total_quantity, total_cost = totals
+    avg_order_cost = total_cost / total_orders if total_orders else 0.0
     
     # Most purchased items
-    top_items_query = """
-        SELECT 
-            i.name,
-            i.sku,
-            SUM(po.quantity) as total_purchased,
-            SUM(po.quantity * po.unit_price) as total_cost
-        FROM purchase_orders po
-        JOIN items i ON po.item_id = i.id
-        WHERE po.status = 'COMPLETED'
-    """
-    top_params = []
-    
-    if start_date:
-        top_items_query += " AND po.order_date >= ?"
-        top_params.append(start_date)
-    
-    if end_date:
-        top_items_query += " AND po.order_date <= ?"
-        top_params.append(end_date)
-    
-    top_items_query += """
-        GROUP BY i.id, i.name, i.sku
-        ORDER BY total_purchased DESC
-        LIMIT 10
-    """
-    
-    cur.execute(top_items_query, top_params)
     top_items = [
         {
-            'name': row[0],
-            'sku': row[1],
-            'total_purchased': row[2],
-            'total_cost': round(row[3], 2)
+            'name': name,
+            'sku': sku,
+            'total_purchased': qty,
+            'total_cost': round(cost, 2)
         }
-        for row in cur.fetchall()
+        for (name, sku), (qty, cost) in _top(cur, "items", items, key=lambda v: v[0])
     ]
     
     # Purchases by supplier
-    supplier_query = """
-        SELECT 
-            s.name,
-            COUNT(po.id) as order_count,
-            SUM(po.quantity * po.unit_price) as total_cost
-        FROM purchase_orders po
-        JOIN suppliers s ON po.supplier_id = s.id
-        WHERE po.status = 'COMPLETED'
-    """
-    supplier_params = []
-    
-    if start_date:
-        supplier_query += " AND po.order_date >= ?"
-        supplier_params.append(start_date)
-    
-    if end_date:
-        supplier_query += " AND po.order_date <= ?"
-        supplier_params.append(end_date)
-    
-    supplier_query += """
-        GROUP BY s.id, s.name
-        ORDER BY total_cost DESC
-        LIMIT 10
-    """
-    
-    cur.execute(supplier_query, supplier_params)
     top_suppliers = [
         {
-            'name': row[0],
-            'order_count': row[1],
-            'total_cost': round(row[2], 2)
+            'name': name,
+            'order_count': count,
+            'total_cost': round(cost, 2)
         }
-        for row in cur.fetchall()
+        for (name,), (count, cost) in _top(cur, "suppliers", suppliers, key=lambda v: v[1])
     ]
     
     conn.close()
@@ -321,55 +188,37 @@ def get_stock_movement_report(start_date=None, end_date=None):
     conn = get_connection()
     cur = conn.cursor()
     
-    # Get items with purchase and sales activity
-    query = """
+    dates, params = movements_between(start_date, end_date, "m.")
+    
+    # Every recorded quantity change: purchases and sales, plus manual
+    # adjustments, scans and opening stock
+    query = f"""
         SELECT 
             i.id,
             i.name,
             i.sku,
             i.quantity as current_stock,
-            COALESCE(purchases.total_in, 0) as total_purchased,
-            COALESCE(sales.total_out, 0) as total_sold,
-            COALESCE(purchases.total_in, 0) - COALESCE(sales.total_out, 0) as net_change
-        FROM items i
-        LEFT JOIN (
-            SELECT item_id, SUM(quantity) as total_in
-            FROM purchase_orders
-            WHERE status = 'COMPLETED'
-    """
-    
-    purchase_conditions = []
-    if start_date:
-        purchase_conditions.append(f" AND order_date >= '{start_date}'")
-    if end_date:
-        purchase_conditions.append(f" AND order_date <= '{end_date}'")
-    
-    query += ''.join(purchase_conditions)
-    query += """
-            GROUP BY item_id
-        ) purchases ON i.id = purchases.item_id
-        LEFT JOIN (
-            SELECT item_id, SUM(quantity) as total_out
-            FROM sales_orders
-            WHERE status = 'COMPLETED'
-    """
-    
-    sales_conditions = []
-    if start_date:
-        sales_conditions.append(f" AND order_date >= '{start_date}'")
-    if end_date:
-        sales_conditions.append(f" AND order_date <= '{end_date}'")
-    
-    query += ''.join(sales_conditions)
-    query += """
-            GROUP BY item_id
-        ) sales ON i.id = sales.item_id
-        WHERE COALESCE(purchases.total_in, 0) > 0 OR COALESCE(sales.total_out, 0) > 0
-        ORDER BY (COALESCE(purchases.total_in, 0) + COALESCE(sales.total_out, 0)) DESC
+            moved.total_purchased,
+            moved.total_sold,
+            moved.total_adjusted,
+            moved.net_change
+        FROM (
+            SELECT m.item_id,
+                   SUM(CASE WHEN m.reason = 'PURCHASE' THEN m.change ELSE 0 END) as total_purchased,
+                   SUM(CASE WHEN m.reason = 'SALE' THEN -m.change ELSE 0 END) as total_sold,
+                   SUM(CASE WHEN m.reason NOT IN ('PURCHASE', 'SALE') THEN m.change ELSE 0 END) as total_adjusted,
+                   SUM(m.change) as net_change,
+                   SUM(ABS(m.change)) as activity
+            FROM inventory_movements m
+            WHERE 1 = 1{dates}
+            GROUP BY m.item_id
+        ) moved
+        JOIN items i ON i.id = moved.item_id
+        ORDER BY moved.activity DESC
         LIMIT 50
     """
     
-    cur.execute(query)
+    cur.execute(query, params)
     
     movements = [
         {
@@ -379,7 +228,8 @@ def get_stock_movement_report(start_date=None, end_date=None):
             'current_stock': row[3],
             'total_purchased': row[4],
             'total_sold': row[5],
-            'net_change': row[6]
+            'total_adjusted': row[6],
+            'net_change': row[7]
         }
         for row in cur.fetchall()
     ]
@@ -471,7 +321,10 @@ def get_low_stock_report():
 
 def get_profit_analysis(start_date=None, end_date=None):
     """
-    Calculate profit/loss by comparing purchase costs and sales revenue
+    Calculate profit/loss from revenue and the cost of the goods actually sold
+    
+    Cost is per-item COGS at average purchase price (see profit_model), not
+    the total spent on purchases in the period.
     
     Args:
         start_date (str, optional): Start date in ISO format
@@ -480,19 +333,148 @@ def get_profit_analysis(start_date=None, end_date=None):
     Returns:
         dict: Profit analysis metrics
     """
-    sales_report = get_sales_report(start_date, end_date)
-    purchase_report = get_purchase_report(start_date, end_date)
-    
-    total_revenue = sales_report['total_revenue']
-    total_cost = purchase_report['total_cost']
-    gross_profit = total_revenue - total_cost
-    profit_margin = (gross_profit / total_revenue * 100) if total_revenue > 0 else 0
+    result = get_profit_breakdown(start_date, end_date)
+    if not result.get("success"):
+        raise RuntimeError(result.get("message"))
     
     return {
-        'total_revenue': total_revenue,
-        'total_cost': total_cost,
-        'gross_profit': round(gross_profit, 2),
-        'profit_margin_percent': round(profit_margin, 2),
-        'total_sales_orders': sales_report['total_orders'],
-        'total_purchase_orders': purchase_report['total_orders']
+        'total_revenue': result['total_revenue'],
+        'total_cost': result['total_cogs'],
+        'gross_profit': result['gross_profit'],
+        'profit_margin_percent': result['profit_margin_percent'],
+        'total_purchases': result['total_purchases'],
+        'uncosted_revenue': result['uncosted_revenue'],
+        'total_sales_orders': result['total_sales_orders'],
+        'total_purchase_orders': result['total_purchase_orders'],
+        'top_items': result['items'][:10]
     }
+
+
+def get_data_versions(tables):
+    """Get the write counters of the given tables as a tuple, in the order given"""
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        placeholders = ",".join("?" * len(tables))
+        cur.execute(f"SELECT table_name, version FROM data_versions WHERE table_name IN ({placeholders})", tables)
+        versions = {row[0]: row[1] for row in cur.fetchall()}
+        return tuple(versions.get(table) for table in tables)
+    finally:
+        conn.close()
+
+
+DETAIL_CHUNK_SIZE = 5000
+
+DETAIL_HEADERS = {
+    "inventory_summary": ["SKU", "Name", "Quantity", "Reserved", "Price", "Stock Value",
+                          "Min Stock Level", "Reorder Point"],
+    "sales_report": ["Order Number", "Completed At", "Customer", "SKU", "Name",
+                     "Quantity", "Unit Price", "Line Total"],
+    "purchase_report": ["Order Number", "Completed At", "Supplier", "SKU", "Name",
+                        "Quantity", "Unit Price", "Line Total"],
+    "stock_movement": ["Time (UTC)", "SKU", "Name", "Reason", "Reference", "Reference ID", "Change", "Quantity After"],
+    "low_stock": ["Status", "SKU", "Name", "Quantity", "Min Stock Level", "Reorder Point", "Price"],
+}
+
+
+def _detail_query(report_type, start_date=None, end_date=None):
+    """
+    Uncapped query behind a full-detail export
+    
+    Rows come back in index order (item id, completion time for order
+    lines, or ledger time for movements) so SQLite can stream them without
+    sorting the whole result.
+    
+    Returns:
+        tuple: (select sql, count sql, params)
+    """
+    if report_type == "inventory_summary":
+        return """
+            SELECT sku, name, quantity, reserved_quantity, price, quantity * price,
+                   min_stock_level, reorder_point
+            FROM items ORDER BY id
+        """, "SELECT COUNT(*) FROM items", []
+    
+    if report_type in ("sales_report", "purchase_report"):
+        kind, party_table = ("sales", "customers") if report_type == "sales_report" else ("purchases", "suppliers")
+        orders, lines, party = ROLLUPS[kind][:3]
+        dates, params = completed_between(start_date, end_date, "o.")
+        return f"""
+            SELECT o.order_number, o.completed_at, p.name, i.sku, i.name,
+                   l.quantity, l.unit_price, l.total_price
+            FROM {orders} o
+            JOIN {lines} l ON l.order_id = o.id
+            LEFT JOIN {party_table} p ON p.id = o.{party}
+            LEFT JOIN items i ON i.id = l.item_id
+            WHERE o.status = 'COMPLETED'{dates}
+            ORDER BY o.completed_at, o.id, l.line_no
+        """, f"""
+            SELECT COUNT(*) FROM {orders} o JOIN {lines} l ON l.order_id = o.id
+            WHERE o.status = 'COMPLETED'{dates}
+        """, params
+    
+    if report_type == "stock_movement":
+        dates, params = movements_between(start_date, end_date, "m.")
+        return f"""
+            SELECT m.created_at, i.sku, i.name, m.reason, m.reference_type, m.reference_id,
+                   m.change, m.quantity_after
+            FROM inventory_movements m
+            LEFT JOIN items i ON i.id = m.item_id
+            WHERE 1 = 1{dates}
+            ORDER BY m.created_at, m.id
+        """, f"SELECT COUNT(*) FROM inventory_movements m WHERE 1 = 1{dates}", params
+    
+    if report_type == "low_stock":
+        return """
+            SELECT CASE
+                       WHEN quantity = 0 THEN 'OUT OF STOCK'
+                       WHEN quantity <= COALESCE(min_stock_level, 10) THEN 'LOW STOCK'
+                       ELSE 'REORDER'
+                   END,
+                   sku, name, quantity, COALESCE(min_stock_level, 10), COALESCE(reorder_point, 20), price
+            FROM items
+            WHERE quantity <= MAX(COALESCE(min_stock_level, 10), COALESCE(reorder_point, 20))
+            ORDER BY id
+        """, """
+            SELECT COUNT(*) FROM items
+            WHERE quantity <= MAX(COALESCE(min_stock_level, 10), COALESCE(reorder_point, 20))
+        """, []
+    
+    raise ValueError(f"No full-detail export for report type: {report_type}")
+
+
+def count_report_detail(report_type, start_date=None, end_date=None):
+    """Number of rows a full-detail export will write (stock movement counts every item)"""
+    _, count_sql, params = _detail_query(report_type, start_date, end_date)
+    conn = get_connection()
+    try:
+        return conn.execute(count_sql, params).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def iter_report_detail(report_type, start_date=None, end_date=None, chunk_size=DETAIL_CHUNK_SIZE):
+    """
+    Stream a report's full detail in chunks straight from the cursor
+    
+    Args:
+        report_type (str): Key of DETAIL_HEADERS
+        start_date, end_date (str, optional): Range for order-based reports
+        chunk_size (int): Rows per chunk
+    
+    Yields:
+        list: Up to chunk_size row tuples, in DETAIL_HEADERS column order
+    """
+    sql, _, params = _detail_query(report_type, start_date, end_date)
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.row_factory = None
+    try:
+        cur.execute(sql, params)
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        conn.close()
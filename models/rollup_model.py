@@ -0,0 +1,250 @@
+"""
+Daily sales/purchase rollups
+
+Completed orders are pre-aggregated per day into four tables:
+
+    daily_item_sales         (day, item_id)     quantity, revenue, order_count
+    daily_customer_sales     (day, customer_id) quantity, revenue, order_count
+    daily_item_purchases     (day, item_id)     quantity, cost, order_count
+    daily_supplier_purchases (day, supplier_id) quantity, cost, order_count
+
+apply_*_order() is called in the same transaction that moves an order into
+or out of COMPLETED, so the rollups always match the order tables;
+backfill_rollups() rebuilds them from scratch. aggregate_orders() answers
+arbitrary date ranges from them.
+"""
+from datetime import date, timedelta
+
+from database.db_connection import get_connection
+
+# kind -> (orders table, lines table, party column, item rollup, party rollup, amount column)
+ROLLUPS = {
+    "sales": ("sales_orders", "sales_order_lines", "customer_id",
+              "daily_item_sales", "daily_customer_sales", "revenue"),
+    "purchases": ("purchase_orders", "purchase_order_lines", "supplier_id",
+                  "daily_item_purchases", "daily_supplier_purchases", "cost"),
+}
+
+
+def _apply_order(cur, kind, order_id, sign):
+    orders, lines, party, item_rollup, party_rollup, amount = ROLLUPS[kind]
+    cur.execute(f"""
+        INSERT INTO {item_rollup} (day, item_id, quantity, {amount}, order_count)
+        SELECT substr(o.completed_at, 1, 10), l.item_id, ? * SUM(l.quantity), ? * SUM(l.total_price), ?
+        FROM {lines} l JOIN {orders} o ON l.order_id = o.id
+        WHERE o.id = ? AND o.completed_at IS NOT NULL
+        GROUP BY l.item_id
+        ON CONFLICT (day, item_id) DO UPDATE SET
+            quantity = quantity + excluded.quantity,
+            {amount} = {amount} + excluded.{amount},
+            order_count = order_count + excluded.order_count
+    """, (sign, sign, sign, order_id))
+    cur.execute(f"""
+        INSERT INTO {party_rollup} (day, {party}, quantity, {amount}, order_count)
+        SELECT substr(completed_at, 1, 10), {party}, ? * quantity, ? * total_price, ?
+        FROM {orders}
+        WHERE id = ? AND completed_at IS NOT NULL
+        ON CONFLICT (day, {party}) DO UPDATE SET
+            quantity = quantity + excluded.quantity,
+            {amount} = {amount} + excluded.{amount},
+            order_count = order_count + excluded.order_count
+    """, (sign, sign, sign, order_id))
+
+
+def apply_sales_order(cur, order_id, sign=1):
+    """
+    Add (sign=1) or remove (sign=-1) a completed sales order from the rollups
+
+    Call after the order is marked COMPLETED, or before it leaves COMPLETED,
+    on the cursor of that same transaction.
+    """
+    _apply_order(cur, "sales", order_id, sign)
+
+
+def apply_purchase_order(cur, order_id, sign=1):
+    """Add (sign=1) or remove (sign=-1) a completed purchase order from the rollups"""
+    _apply_order(cur, "purchases", order_id, sign)
+
+
+def backfill_rollups(cur):
+    """Rebuild every rollup table from the completed orders"""
+    for orders, lines, party, item_rollup, party_rollup, amount in ROLLUPS.values():
+        cur.execute(f"DELETE FROM {item_rollup}")
+        cur.execute(f"""
+            INSERT INTO {item_rollup} (day, item_id, quantity, {amount}, order_count)
+            SELECT substr(o.completed_at, 1, 10), l.item_id, SUM(l.quantity), SUM(l.total_price),
+                   COUNT(DISTINCT o.id)
+            FROM {lines} l JOIN {orders} o ON l.order_id = o.id
+            WHERE o.status = 'COMPLETED' AND o.completed_at IS NOT NULL
+            GROUP BY 1, 2
+        """)
+        cur.execute(f"DELETE FROM {party_rollup}")
+        cur.execute(f"""
+            INSERT INTO {party_rollup} (day, {party}, quantity, {amount}, order_count)
+            SELECT substr(completed_at, 1, 10), {party}, SUM(quantity), SUM(total_price), COUNT(*)
+            FROM {orders}
+            WHERE status = 'COMPLETED' AND completed_at IS NOT NULL
+            GROUP BY 1, 2
+        """)
+
+
+def rebuild_rollups():
+    """
+    Backfill job: recompute all rollups in one transaction
+
+    Returns:
+        dict: {"success", "message"}
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("BEGIN IMMEDIATE")
+        backfill_rollups(cur)
+        conn.commit()
+        return {"success": True, "message": "Rollups rebuilt"}
+    except Exception as e:
+        conn.rollback()
+        return {"success": False, "message": f"Error rebuilding rollups: {e}"}
+    finally:
+        conn.close()
+
+
+def completed_between(start_date=None, end_date=None, alias=""):
+    """
+    Build the completed_at range condition for reports over completed orders
+    
+    Dates are bound as parameters so the statement text stays the same for
+    every range, and the (status, completed_at) index serves the filter.
+    A bare YYYY-MM-DD end date includes that whole day.
+    
+    Returns:
+        tuple: (sql fragment starting with " AND", params list)
+    """
+    clause, params = "", []
+    if start_date:
+        clause += f" AND {alias}completed_at >= ?"
+        params.append(str(start_date).replace(" ", "T"))
+    if end_date:
+        end_date = str(end_date).replace(" ", "T")
+        if len(end_date) == 10:
+            end_date += "T23:59:59.999999"
+        clause += f" AND {alias}completed_at <= ?"
+        params.append(end_date)
+    return clause, params
+
+
+def split_rollup_range(start_date=None, end_date=None):
+    """
+    Split a report range into whole days and partial-day edges
+    
+    Whole days are answered from the daily rollup tables; the partial first
+    and last day (when the range starts or ends mid-day) are read from the
+    orders themselves through the completed_at index.
+    
+    Returns:
+        tuple: ((first_day, last_day) or None, [(edge_start, edge_end), ...])
+               days are YYYY-MM-DD, None meaning unbounded
+    """
+    start = str(start_date).replace(" ", "T") if start_date else None
+    end = str(end_date).replace(" ", "T") if end_date else None
+    if start and end and start > end and end[:10] != start[:10]:
+        return None, []
+    
+    first_day, last_day, edges = None, None, []
+    start_partial = bool(start) and start[10:].rstrip("0:.") not in ("", "T")
+    end_partial = bool(end) and len(end) > 10 and not end[10:].startswith("T23:59:59.999")
+    
+    if start and end and start[:10] == end[:10] and (start_partial or end_partial):
+        return None, [(start, end)]
+    
+    if start:
+        first_day = start[:10]
+        if start_partial:
+            edges.append((start, f"{first_day}T23:59:59.999999"))
+            first_day = (date.fromisoformat(first_day) + timedelta(days=1)).isoformat()
+    if end:
+        last_day = end[:10]
+        if end_partial:
+            edges.append((f"{last_day}T00:00:00", end))
+            last_day = (date.fromisoformat(last_day) - timedelta(days=1)).isoformat()
+    
+    if first_day and last_day and first_day > last_day:
+        return None, edges
+    return (first_day, last_day), edges
+
+
+def aggregate_orders(cur, kind, start_date=None, end_date=None):
+    """
+    Aggregate completed orders over a date range from the daily rollups
+    
+    kind is "sales" or "purchases"; party is the customer or supplier.
+    
+    Returns:
+        tuple: ((order_count, quantity, amount),
+                {item_id: [quantity, amount]},
+                {party_id: [order_count, amount]})
+    """
+    orders, lines, party, item_rollup, party_rollup, amount = ROLLUPS[kind]
+    totals = [0, 0, 0.0]
+    items, parties = {}, {}
+    
+    def add(target, key, a, b):
+        row = target.setdefault(key, [0, 0.0])
+        row[0] += a or 0
+        row[1] += b or 0.0
+    
+    days, edges = split_rollup_range(start_date, end_date)
+    if days is not None:
+        clause, params = "", []
+        if days[0]:
+            clause += " AND day >= ?"
+            params.append(days[0])
+        if days[1]:
+            clause += " AND day <= ?"
+            params.append(days[1])
+        
+        cur.execute(f"""
+            SELECT {party}, SUM(order_count), SUM(quantity), SUM({amount})
+            FROM {party_rollup} WHERE 1 = 1{clause}
+            GROUP BY {party}
+        """, params)
+        for party_id, count, qty, total in cur.fetchall():
+            totals[0] += count or 0
+            totals[1] += qty or 0
+            totals[2] += total or 0.0
+            add(parties, party_id, count, total)
+        
+        cur.execute(f"""
+            SELECT item_id, SUM(quantity), SUM({amount})
+            FROM {item_rollup} WHERE 1 = 1{clause}
+            GROUP BY item_id
+        """, params)
+        for item_id, qty, total in cur.fetchall():
+            add(items, item_id, qty, total)
+    
+    for edge_start, edge_end in edges:
+        clause, params = completed_between(edge_start, edge_end, "o.")
+        cur.execute(f"""
+            SELECT o.{party}, COUNT(*), SUM(o.quantity), SUM(o.total_price)
+            FROM {orders} o WHERE o.status = 'COMPLETED'{clause}
+            GROUP BY o.{party}
+        """, params)
+        for party_id, count, qty, total in cur.fetchall():
+            totals[0] += count or 0
+            totals[1] += qty or 0
+            totals[2] += total or 0.0
+            add(parties, party_id, count, total)
+        
+        cur.execute(f"""
+            SELECT l.item_id, SUM(l.quantity), SUM(l.total_price)
+            FROM {orders} o JOIN {lines} l ON l.order_id = o.id
+            WHERE o.status = 'COMPLETED'{clause}
+            GROUP BY l.item_id
+        """, params)
+        for item_id, qty, total in cur.fetchall():
+            add(items, item_id, qty, total)
+    
+    # Fully cancelled-out rollup rows (order completed, then reopened) carry no orders
+    parties = {k: v for k, v in parties.items() if v[0]}
+    items = {k: v for k, v in items.items() if v[0]}
+    return tuple(totals), items, parties
@@ -1,34 +1,117 @@
 from database.db_connection import get_connection
+from models.sequence_model import next_order_number
+from models.movement_model import record_movements
+from models.rollup_model import apply_sales_order
+from models.allocation_model import reserve_lines, release_lines, consume_lines, order_lines
+from utils.order_lines import check_order_lines
 from datetime import datetime
 
 def generate_order_number(prefix="SO"):
-    """Generate unique order number with timestamp"""
-    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-    return f"{prefix}-{timestamp}"
+    """Generate unique order number from the per-prefix order sequence"""
+    return next_order_number(prefix)
 
 def create_sales_order(customer_id, item_id, quantity, unit_price, created_by, notes=None):
-    """Create a new sales order"""
+    """Create a new single-line sales order"""
+    return create_sales_order_with_lines(
+        customer_id,
+        [{"item_id": item_id, "quantity": quantity, "unit_price": unit_price}],
+        created_by,
+        notes
+    )
+
+def create_sales_order_with_lines(customer_id, lines, created_by, notes=None):
+    """
+    Create a sales order with any number of lines in one transaction
+    
+    Args:
+        customer_id (int): Customer ID
+        lines (list): Dicts with item_id, quantity and unit_price
+        created_by (int): User ID creating the order
+        notes (str, optional): Order notes
+    
+    Returns:
+        dict: {"success", "id", "order_number", "line_count", "message"}
+    """
+    if not lines:
+        return {"success": False, "message": "Sales order must have at least one line"}
+    error = check_order_lines(lines)
+    if error:
+        return {"success": False, "message": error}
+    
     conn = get_connection()
     cur = conn.cursor()
     try:
         order_number = generate_order_number("SO")
-        total_price = quantity * unit_price
+        rows = [(int(l["item_id"]), int(l["quantity"]), float(l["unit_price"])) for l in lines]
+        total_quantity = sum(qty for _, qty, _ in rows)
+        total_price = sum(qty * price for _, qty, price in rows)
+        
+        # Single-line orders keep the item on the header for older readers
+        header_item_id, header_unit_price = (rows[0][0], rows[0][2]) if len(rows) == 1 else (None, None)
         
         cur.execute("""
             INSERT INTO sales_orders 
             (order_number, customer_id, item_id, quantity, unit_price, total_price, notes, created_by, status)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'PENDING')
-        """, (order_number, customer_id, item_id, quantity, unit_price, total_price, notes, created_by))
+        """, (order_number, customer_id, header_item_id, total_quantity, header_unit_price, total_price, notes, created_by))
+        order_id = cur.lastrowid
+        
+        cur.executemany("""
+            INSERT INTO sales_order_lines (order_id, line_no, item_id, quantity, unit_price, total_price)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, [(order_id, line_no, item_id, qty, price, qty * price)
+              for line_no, (item_id, qty, price) in enumerate(rows, start=1)])
+        
+        # Reserve stock in the same transaction so pending orders can't oversell
+        short = reserve_lines(cur, [{"item_id": item_id, "quantity": qty} for item_id, qty, _ in rows])
+        if short:
+            conn.rollback()
+            item_id, requested, available = short[0]
+            if available is None:
+                return {"success": False, "message": f"Item {item_id} not found"}
+            return {"success": False, "message": f"Insufficient available stock for item {item_id}. Available: {available}, Requested: {requested}"}
         conn.commit()
         
-        order_id = cur.lastrowid
-        return {"success": True, "id": order_id, "order_number": order_number, "message": "Sales order created successfully"}
+        return {"success": True, "id": order_id, "order_number": order_number, "line_count": len(rows),
+                "message": "Sales order created successfully"}
     except Exception as e:
         conn.rollback()
         return {"success": False, "message": f"Error creating sales order: {e}"}
     finally:
         conn.close()
 
+def _fetch_order_lines(cur, order_id):
+    cur.execute("""
+        SELECT l.line_no, l.item_id, i.name, i.sku, l.quantity, l.unit_price, l.total_price
+        FROM sales_order_lines l
+        LEFT JOIN items i ON l.item_id = i.id
+        WHERE l.order_id = ?
+        ORDER BY l.line_no
+    """, (order_id,))
+    return [
+        {
+            "line_no": row[0],
+            "item_id": row[1],
+            "item_name": row[2],
+            "sku": row[3],
+            "quantity": row[4],
+            "unit_price": row[5],
+            "total_price": row[6]
+        }
+        for row in cur.fetchall()
+    ]
+
+def get_sales_order_lines(order_id):
+    """Get the lines of a sales order"""
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        return {"success": True, "lines": _fetch_order_lines(cur, order_id)}
+    except Exception as e:
+        return {"success": False, "message": f"Error fetching sales order lines: {e}"}
+    finally:
+        conn.close()
+
 def get_sales_order(order_id):
     """Get sales order by ID with related data"""
     conn = get_connection()
@@ -36,10 +119,11 @@ def get_sales_order(order_id):
     try:
         cur.execute("""
             SELECT so.*, c.name as customer_name, i.name as item_name, i.sku,
-                   u.username as created_by_name
+                   u.username as created_by_name,
+                   (SELECT COUNT(*) FROM sales_order_lines l WHERE l.order_id = so.id) as line_count
             FROM sales_orders so
             JOIN customers c ON so.customer_id = c.id
-            JOIN items i ON so.item_id = i.id
+            LEFT JOIN items i ON so.item_id = i.id
             JOIN users u ON so.created_by = u.id
             WHERE so.id = ?
         """, (order_id,))
@@ -62,9 +146,11 @@ def get_sales_order(order_id):
                     "created_at": row[10],
                     "completed_at": row[11],
                     "customer_name": row[12],
-                    "item_name": row[13],
+                    "item_name": row[13] if row[3] is not None else f"{row[16]} items",
                     "sku": row[14],
-                    "created_by_name": row[15]
+                    "created_by_name": row[15],
+                    "line_count": row[16],
+                    "lines": _fetch_order_lines(cur, order_id)
                 }
             }
         return {"success": False, "message": "Sales order not found"}
@@ -81,10 +167,11 @@ def list_all_sales_orders(status=None):
         if status:
             query = """
                 SELECT so.*, c.name as customer_name, i.name as item_name, i.sku,
-                       u.username as created_by_name
+                       u.username as created_by_name,
+                       (SELECT COUNT(*) FROM sales_order_lines l WHERE l.order_id = so.id) as line_count
                 FROM sales_orders so
                 JOIN customers c ON so.customer_id = c.id
-                JOIN items i ON so.item_id = i.id
+                LEFT JOIN items i ON so.item_id = i.id
                 JOIN users u ON so.created_by = u.id
                 WHERE so.status = ?
                 ORDER BY so.created_at DESC
@@ -93,10 +180,11 @@ def list_all_sales_orders(status=None):
         else:
             query = """
                 SELECT so.*, c.name as customer_name, i.name as item_name, i.sku,
-                       u.username as created_by_name
+                       u.username as created_by_name,
+                       (SELECT COUNT(*) FROM sales_order_lines l WHERE l.order_id = so.id) as line_count
                 FROM sales_orders so
                 JOIN customers c ON so.customer_id = c.id
-                JOIN items i ON so.item_id = i.id
+                LEFT JOIN items i ON so.item_id = i.id
                 JOIN users u ON so.created_by = u.id
                 ORDER BY so.created_at DESC
             """
@@ -119,9 +207,10 @@ def list_all_sales_orders(status=None):
                 "created_at": row[10],
                 "completed_at": row[11],
                 "customer_name": row[12],
-                "item_name": row[13],
+                "item_name": row[13] if row[3] is not None else f"{row[16]} items",
                 "sku": row[14],
-                "created_by_name": row[15]
+                "created_by_name": row[15],
+                "line_count": row[16]
             })
         return {"success": True, "orders": orders}
     except Exception as e:
@@ -130,7 +219,13 @@ def list_all_sales_orders(status=None):
         conn.close()
 
 def update_sales_order_status(order_id, status, completed_at=None):
-    """Update sales order status"""
+    """
+    Update sales order status
+    
+    Leaving PENDING releases the order's stock reservation; returning to
+    PENDING reserves it again (and fails if the stock is no longer available).
+    Use complete_sales_order to actually ship an order.
+    """
     conn = get_connection()
     cur = conn.cursor()
     try:
@@ -140,16 +235,33 @@ def update_sales_order_status(order_id, status, completed_at=None):
         if status == 'COMPLETED' and not completed_at:
             completed_at = datetime.now().isoformat()
         
+        cur.execute("BEGIN IMMEDIATE")
+        cur.execute("SELECT status FROM sales_orders WHERE id = ?", (order_id,))
+        row = cur.fetchone()
+        if not row:
+            conn.rollback()
+            return {"success": False, "message": "Sales order not found"}
+        
+        old_status = row[0]
+        if old_status == 'PENDING' and status != 'PENDING':
+            release_lines(cur, order_lines(cur, order_id))
+        elif old_status != 'PENDING' and status == 'PENDING':
+            if reserve_lines(cur, order_lines(cur, order_id)):
+                conn.rollback()
+                return {"success": False, "message": "Insufficient available stock to reopen sales order"}
+        
+        # Keep the daily rollups in step with what counts as completed
+        if old_status == 'COMPLETED':
+            apply_sales_order(cur, order_id, -1)
         cur.execute("""
             UPDATE sales_orders 
             SET status = ?, completed_at = ?
             WHERE id = ?
         """, (status, completed_at, order_id))
+        if status == 'COMPLETED':
+            apply_sales_order(cur, order_id)
         conn.commit()
         
-        if cur.rowcount == 0:
-            return {"success": False, "message": "Sales order not found"}
-        
         return {"success": True, "message": f"Sales order status updated to {status}"}
     except Exception as e:
         conn.rollback()
@@ -157,20 +269,101 @@ def update_sales_order_status(order_id, status, completed_at=None):
     finally:
         conn.close()
 
+def complete_sales_order(order_id, completed_at=None):
+    """
+    Apply every line of a pending sales order to inventory and mark it COMPLETED
+    
+    Stock (and the order's reservation) for all lines is decremented with one
+    executemany in the same transaction as the status change, so either every
+    line is applied or none.
+    
+    Returns:
+        dict: {"success", "message", "line_count",
+               "items": [{"item_id", "quantity", "old_quantity", "new_quantity"}]}
+            with one entry per distinct item, its quantity summed over the
+            order's lines; line_count is the number of order lines
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("BEGIN IMMEDIATE")
+        cur.execute("SELECT status FROM sales_orders WHERE id = ?", (order_id,))
+        row = cur.fetchone()
+        if not row:
+            conn.rollback()
+            return {"success": False, "message": "Sales order not found"}
+        if row[0] != 'PENDING':
+            conn.rollback()
+            return {"success": False, "message": f"Cannot complete order with status: {row[0]}"}
+        
+        cur.execute("""
+            SELECT l.item_id, SUM(l.quantity), i.quantity, i.name, COUNT(*)
+            FROM sales_order_lines l
+            LEFT JOIN items i ON l.item_id = i.id
+            WHERE l.order_id = ?
+            GROUP BY l.item_id
+        """, (order_id,))
+        needed = cur.fetchall()
+        if not needed:
+            conn.rollback()
+            return {"success": False, "message": "Sales order has no lines"}
+        
+        for item_id, qty, current_qty, name, _ in needed:
+            if current_qty is None:
+                conn.rollback()
+                return {"success": False, "message": f"Item {item_id} not found"}
+            if current_qty < qty:
+                conn.rollback()
+                return {"success": False, "message": f"Insufficient inventory for '{name}'. Available: {current_qty}, Required: {qty}"}
+        
+        # Decrement stock and consume the reservation made at creation
+        if not consume_lines(cur, [{"item_id": item_id, "quantity": qty} for item_id, qty, _, _, _ in needed]):
+            conn.rollback()
+            return {"success": False, "message": "Inventory changed while completing the order, please retry"}
+        record_movements(cur, [(item_id, -qty) for item_id, qty, _, _, _ in needed],
+                         "SALE", "SALES_ORDER", order_id, completed_at)
+        
+        cur.execute("""
+            UPDATE sales_orders SET status = 'COMPLETED', completed_at = ?
+            WHERE id = ?
+        """, (completed_at or datetime.now().isoformat(), order_id))
+        apply_sales_order(cur, order_id)
+        conn.commit()
+        
+        return {
+            "success": True,
+            "message": "Sales order completed",
+            "line_count": sum(row[4] for row in needed),
+            "items": [
+                {"item_id": item_id, "quantity": qty, "old_quantity": current_qty, "new_quantity": current_qty - qty}
+                for item_id, qty, current_qty, _, _ in needed
+            ]
+        }
+    except Exception as e:
+        conn.rollback()
+        return {"success": False, "message": f"Error completing sales order: {e}"}
+    finally:
+        conn.close()
+
 def delete_sales_order(order_id):
     """Delete a sales order (only if PENDING)"""
     conn = get_connection()
     cur = conn.cursor()
     try:
         # Check status first
+        cur.execute("BEGIN IMMEDIATE")
         cur.execute("SELECT status FROM sales_orders WHERE id = ?", (order_id,))
         row = cur.fetchone()
         if not row:
+            conn.rollback()
             return {"success": False, "message": "Sales order not found"}
         
         if row[0] != 'PENDING':
+            conn.rollback()
             return {"success": False, "message": "Cannot delete non-pending sales order"}
         
+        release_lines(cur, order_lines(cur, order_id))
+        cur.execute("DELETE FROM sales_order_lines WHERE order_id = ?", (order_id,))
         cur.execute("DELETE FROM sales_orders WHERE id = ?", (order_id,))
         conn.commit()
         return {"success": True, "message": "Sales order deleted successfully"}
@@ -0,0 +1,219 @@
+"""
+Scanner lookups and scan sessions
+
+Handheld scanners can fire several scans a second, so barcode lookups are
+served from an in-memory barcode -> item dict rather than a connection and
+query per scan. The index keeps one connection open and, on every lookup,
+reads the item_barcodes write counter (bumped by triggers on item inserts,
+deletes and barcode/name/SKU/price edits); it reloads only when that has
+moved, so a stale entry is never served and stock changes cost nothing.
+
+A ScanSession counts scans in memory and applies the totals as stock
+changes, with their ledger rows, in one transaction when committed.
+"""
+import sqlite3
+import threading
+
+from database import db_connection
+from database.db_connection import get_connection
+from database.db_setup import BARCODE_INDEX_VERSION
+from models.movement_model import record_movements
+from utils.barcode_utils import normalize_barcode
+
+# mode -> sign of the stock change
+SCAN_MODES = {"receive": 1, "remove": -1}
+
+_index = {}
+_index_version = None
+_index_conn = None
+_index_db_path = None
+_index_lock = threading.Lock()
+
+
+def _index_connection():
+    """The index's own long-lived connection, reopened if DB_PATH changes"""
+    global _index_conn, _index_db_path, _index_version
+    if _index_conn is None or _index_db_path != db_connection.DB_PATH:
+        if _index_conn is not None:
+            _index_conn.close()
+        _index_conn = sqlite3.connect(db_connection.DB_PATH, check_same_thread=False, isolation_level=None)
+        _index_db_path = db_connection.DB_PATH
+        _index_version = None
+    return _index_conn
+
+
+def _refresh_index():
+    """Reload the index if items changed since it was built (caller holds the lock)"""
+    global _index, _index_version
+    conn = _index_connection()
+    row = conn.execute("SELECT version FROM data_versions WHERE table_name = ?", (BARCODE_INDEX_VERSION,)).fetchone()
+    version = row[0] if row else None
+    if version is not None and version == _index_version:
+        return
+
+    # Counter and items read in one snapshot, so a write in between forces another reload
+    conn.execute("BEGIN")
+    try:
+        row = conn.execute("SELECT version FROM data_versions WHERE table_name = ?", (BARCODE_INDEX_VERSION,)).fetchone()
+        rows = conn.execute("""
+            SELECT barcode, id, name, sku, price FROM items
+            WHERE barcode IS NOT NULL AND barcode != ''
+        """).fetchall()
+    finally:
+        conn.execute("COMMIT")
+    _index = {code: (item_id, name, sku, price) for code, item_id, name, sku, price in rows}
+    _index_version = row[0] if row else None
+
+
+def load_barcode_index():
+    """
+    Build the barcode index now rather than on the first scan
+
+    Returns:
+        int: Number of barcodes indexed
+    """
+    with _index_lock:
+        _refresh_index()
+        return len(_index)
+
+
+def lookup_barcode(barcode_number):
+    """
+    Find the item for a scanned barcode without querying the items table
+
+    Args:
+        barcode_number (str): Scanned code, with or without check digit
+
+    Returns:
+        dict: {"id", "name", "sku", "price", "barcode"} or None if unknown
+    """
+    code = normalize_barcode(barcode_number)
+    with _index_lock:
+        _refresh_index()
+        entry = _index.get(code)
+    if entry is None:
+        return None
+    item_id, name, sku, price = entry
+    return {"id": item_id, "name": name, "sku": sku, "price": price, "barcode": code}
+
+
+def close_barcode_index():
+    """Drop the index and close its connection"""
+    global _index, _index_version, _index_conn
+    with _index_lock:
+        if _index_conn is not None:
+            _index_conn.close()
+        _index, _index_version, _index_conn = {}, None, None
+
+
+class ScanSession:
+    """
+    Scanned quantities for one receiving or removal pass
+
+    Scans only touch memory; commit() applies every item's total in one
+    transaction, so a session is all-or-nothing.
+    """
+
+    def __init__(self, mode="receive"):
+        if mode not in SCAN_MODES:
+            raise ValueError(f"Unknown scan mode: {mode}")
+        self.mode = mode
+        self.counts = {}
+        self.items = {}
+        self.unknown = []
+
+    def scan(self, barcode_number, quantity=1):
+        """
+        Count a scan (a negative quantity takes scans back)
+
+        Returns:
+            dict: {"success", "item", "scanned"} or {"success": False, "message"}
+        """
+        item = lookup_barcode(barcode_number)
+        if item is None:
+            self.unknown.append(barcode_number)
+            return {"success": False, "message": f"Unknown barcode: {barcode_number}"}
+
+        scanned = self.counts.get(item["id"], 0) + quantity
+        if scanned > 0:
+            self.counts[item["id"]] = scanned
+            self.items[item["id"]] = item
+        else:
+            self.counts.pop(item["id"], None)
+            self.items.pop(item["id"], None)
+        return {"success": True, "item": item, "scanned": max(scanned, 0)}
+
+    def summary(self):
+        """Scanned items with their totals, in first-scan order"""
+        return [dict(self.items[item_id], quantity=quantity) for item_id, quantity in self.counts.items()]
+
+    def clear(self):
+        self.counts.clear()
+        self.items.clear()
+        self.unknown.clear()
+
+    def commit(self):
+        """
+        Apply the scanned totals to stock in one transaction
+
+        Removal never takes stock reserved for pending orders; if any item
+        is short, or was deleted since it was scanned, nothing is applied.
+
+        Returns:
+            dict: {"success", "message", "items", "units"}
+        """
+        if not self.counts:
+            return {"success": False, "message": "Nothing scanned"}
+
+        sign = SCAN_MODES[self.mode]
+        changes = [(item_id, sign * quantity) for item_id, quantity in self.counts.items()]
+        conn = get_connection()
+        cur = conn.cursor()
+        try:
+            cur.execute("BEGIN IMMEDIATE")
+            if sign > 0:
+                cur.executemany("UPDATE items SET quantity = quantity + ? WHERE id = ?",
+                                [(change, item_id) for item_id, change in changes])
+            else:
+                cur.executemany("""
+                    UPDATE items SET quantity = quantity + ?
+                    WHERE id = ? AND quantity - reserved_quantity >= ?
+                """, [(change, item_id, -change) for item_id, change in changes])
+
+            if cur.rowcount != len(changes):
+                conn.rollback()
+                return {"success": False, "message": self._shortfall_message()}
+
+            record_movements(cur, changes, "SCAN", "SCAN_SESSION")
+            conn.commit()
+            units = sum(self.counts.values())
+            result = {
+                "success": True,
+                "message": f"{'Received' if sign > 0 else 'Removed'} {units} units of {len(changes)} items",
+                "items": len(changes),
+                "units": units
+            }
+            self.clear()
+            return result
+        except Exception as e:
+            conn.rollback()
+            return {"success": False, "message": f"Error applying scans: {e}"}
+        finally:
+            conn.close()
+
+    def _shortfall_message(self):
+        """Describe which scanned items can't be applied"""
+        conn = get_connection()
+        cur = conn.cursor()
+        try:
+            problems = []
+            for item_id, quantity in self.counts.items():
+                cur.execute("SELECT name, quantity - reserved_quantity FROM items WHERE id = ?", (item_id,))
+                row = cur.fetchone()
+                if row is None:
+                    problems.append(f"'{self.items[item_id]['name']}' no longer exists")
+                elif self.mode == "remove" and row[1] < quantity:
+                    problems.append(f"'{row[0]}' has {row[1]} available, {quantity} scanned")
+            return "Scans not applied: " + ("; ".join(problems) or "inventory changed, please retry")
+        finally:
+            conn.close()
@@ -0,0 +1,88 @@
+"""
+Sequence Model for collision-free, high-rate identifiers
+
+Values come from the `sequences` counter table. Each process reserves a
+block of values with one atomic UPDATE and hands them out from memory, so
+the database is touched once per block rather than once per value and
+concurrent processes never receive the same number. Values left in a block
+when a process exits are skipped, so sequences are unique but may have gaps.
+"""
+import os
+import threading
+from datetime import datetime
+
+from database import db_connection
+from database.db_connection import get_connection
+
+BLOCK_SIZE = 100
+
+# (database path, pid, sequence name) -> [next value, last value in block]
+_blocks = {}
+_lock = threading.Lock()
+
+
+def allocate_block(name, size=BLOCK_SIZE):
+    """
+    Atomically reserve `size` consecutive values from a named counter
+    
+    Args:
+        name (str): Sequence name
+        size (int): Number of values to reserve
+    
+    Returns:
+        tuple: (first, last) reserved values, inclusive
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        # IMMEDIATE takes the write lock up front so readers of the counter can't interleave
+        cur.execute("BEGIN IMMEDIATE")
+        block = reserve_values(cur, name, size)
+        conn.commit()
+        return block
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def reserve_values(cur, name, size):
+    """Reserve `size` values inside the caller's write transaction; returns (first, last)"""
+    cur.execute("INSERT OR IGNORE INTO sequences (name, value) VALUES (?, 0)", (name,))
+    cur.execute("UPDATE sequences SET value = value + ? WHERE name = ?", (size, name))
+    cur.execute("SELECT value FROM sequences WHERE name = ?", (name,))
+    last = cur.fetchone()[0]
+    return last - size + 1, last
+
+
+def next_value(name, block_size=BLOCK_SIZE):
+    """
+    Get the next value of a named sequence, refilling this process's block when empty
+    
+    Thread-safe; blocks are tracked per database and per process so forked
+    workers and test databases never reuse each other's values.
+    """
+    key = (db_connection.DB_PATH, os.getpid(), name)
+    with _lock:
+        block = _blocks.get(key)
+        if block is None or block[0] > block[1]:
+            block = list(allocate_block(name, block_size))
+            _blocks[key] = block
+        value = block[0]
+        block[0] += 1
+        return value
+
+
+def next_order_number(prefix):
+    """Generate a unique order number like SO-20250101-00000042"""
+    return f"{prefix}-{datetime.now().strftime('%Y%m%d')}-{next_value(f'order_number:{prefix}'):08d}"
+
+
+def next_order_numbers(cur, prefix, count):
+    """Reserve `count` order numbers inside the caller's write transaction, for bulk order creation"""
+    if count <= 0:
+        return []
+    first, last = reserve_values(cur, f"order_number:{prefix}", count)
+    day = datetime.now().strftime('%Y%m%d')
+    return [f"{prefix}-{day}-{value:08d}" for value in range(first, last + 1)]
@@ -246,7 +246,7 @@ def send_low_stock_email_alerts():
         if not admin_users:
             return {"success": False, "message": "No admin users to notify"}
         
-        # Send email to each admin with a valid email
+        # Queue an email to each admin with a valid email (delivered in the background)
         sent_count = 0
         for user in admin_users:
             if user.get("email"):
@@ -256,7 +256,7 @@ def send_low_stock_email_alerts():
         
         return {
             "success": True,
-            "message": f"Sent low stock alerts to {sent_count} admin(s)",
+            "message": f"Queued low stock alerts for {sent_count} admin(s)",
             "items_count": len(items),
             "recipients": sent_count
         }
@@ -0,0 +1,135 @@
+"""
+Time-bucketed sales and purchase trend series
+
+Each series is one GROUP BY over an indexed date column: whole-day buckets
+(day, week, month) group the daily rollups on their `day` primary key,
+hourly buckets group completed orders on the (status, completed_at)
+index. Buckets with no activity are filled with zeros in NumPy, so a
+chart over years of data never loops over days in Python.
+
+Day, week and month series cover whole days from the start date's day to
+the end date's day; weeks start on Monday and are labelled by that date.
+"""
+from datetime import date, datetime, timedelta
+
+from database.db_connection import get_connection
+from models.analytics_model import NUMPY_AVAILABLE, NUMPY_MISSING
+from models.rollup_model import ROLLUPS, completed_between
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+
+DEFAULT_PERIOD_DAYS = 365
+
+# bucket -> (NumPy unit, SQL expression over a YYYY-MM-DD day column)
+BUCKETS = {
+    "hour": ("h", None),
+    "day": ("D", "day"),
+    "week": ("D", "date(day, 'weekday 0', '-6 days')"),
+    "month": ("M", "substr(day, 1, 7)"),
+}
+
+
+def _bucket_index(bucket, start, end):
+    """Every bucket label from start to end as a datetime64 array"""
+    unit = BUCKETS[bucket][0]
+    first = np.datetime64(start, unit)
+    last = np.datetime64(end, unit)
+    if bucket == "week":
+        # numpy weeks are Thursday-aligned; step Mondays by hand (1970-01-05 was a Monday)
+        first -= (first - np.datetime64("1970-01-05")).astype(np.int64) % 7
+        return np.arange(first, last + 1, 7)
+    return np.arange(first, last + 1)
+
+
+def get_trend_series(kind="sales", bucket="day", start_date=None, end_date=None, item_id=None, party_id=None):
+    """
+    Quantity, amount and order count per time bucket, gaps filled with zeros
+
+    Args:
+        kind (str): "sales" or "purchases"
+        bucket (str): "hour", "day", "week" or "month"
+        start_date, end_date (str, optional): Range (default: the last 365 days)
+        item_id (int, optional): Only this item's lines
+        party_id (int, optional): Only this customer's (sales) or supplier's (purchases) orders
+
+    Returns:
+        dict: {"success", "bucket", "labels": [str], "quantity", "amount", "order_count" (ndarrays)}
+              amount is revenue for sales and cost for purchases
+    """
+    if not NUMPY_AVAILABLE:
+        return dict(NUMPY_MISSING)
+    if kind not in ROLLUPS:
+        return {"success": False, "message": f"Unknown series kind: {kind}"}
+    if bucket not in BUCKETS:
+        return {"success": False, "message": f"Unknown bucket: {bucket}"}
+
+    end = str(end_date).replace(" ", "T") if end_date else datetime.now().isoformat()
+    start = (str(start_date).replace(" ", "T") if start_date
+             else (date.fromisoformat(end[:10]) - timedelta(days=DEFAULT_PERIOD_DAYS - 1)).isoformat())
+    orders, lines, party, item_rollup, party_rollup, amount = ROLLUPS[kind]
+
+    if bucket == "hour":
+        clause, params = completed_between(start, end, "o.")
+        source = f"{orders} o"
+        if item_id is not None:
+            source += f" JOIN {lines} l ON l.order_id = o.id AND l.item_id = ?"
+            params = [item_id] + params
+            columns = "SUM(l.quantity), SUM(l.total_price), COUNT(DISTINCT o.id)"
+        else:
+            columns = "SUM(o.quantity), SUM(o.total_price), COUNT(*)"
+        if party_id is not None:
+            clause += f" AND o.{party} = ?"
+            params.append(party_id)
+        bucket_sql = "substr(o.completed_at, 1, 13)"
+        from_where = f"FROM {source} WHERE o.status = 'COMPLETED'{clause}"
+    else:
+        # item filters read the item rollup; totals and party filters the party rollup
+        table = item_rollup if item_id is not None else party_rollup
+        from_where = f"FROM {table} WHERE day >= ? AND day <= ?"
+        params = [start[:10], end[:10]]
+        if item_id is not None:
+            from_where += " AND item_id = ?"
+            params.append(item_id)
+        if party_id is not None:
+            if item_id is not None:
+                return {"success": False, "message": "Filter by item or by party for whole-day buckets, not both"}
+            from_where += f" AND {party} = ?"
+            params.append(party_id)
+        bucket_sql = BUCKETS[bucket][1]
+        columns = f"SUM(quantity), SUM({amount}), SUM(order_count)"
+
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.row_factory = None
+    try:
+        if bucket == "hour":
+            # a bare end date includes that whole day, as in the report filters
+            index = _bucket_index(bucket, start[:13], end[:13] if len(end) > 10 else end + "T23")
+        else:
+            index = _bucket_index(bucket, start[:10], end[:10])
+        # at most one row per bucket comes back, so there's nothing to stream
+        cur.execute(f"SELECT {bucket_sql}, {columns} {from_where} GROUP BY 1", params)
+        rows = cur.fetchall()
+
+        quantity = np.zeros(len(index))
+        total = np.zeros(len(index))
+        order_count = np.zeros(len(index), dtype=np.int64)
+        if rows:
+            keys, quantities, amounts, counts = zip(*rows)
+            positions = np.searchsorted(index, np.array(keys, dtype=f"datetime64[{BUCKETS[bucket][0]}]"))
+            quantity[positions] = np.array(quantities, dtype=np.float64)
+            total[positions] = np.array(amounts, dtype=np.float64)
+            order_count[positions] = counts
+        return {
+            "success": True,
+            "bucket": bucket,
+            "labels": np.datetime_as_string(index).tolist(),
+            "quantity": quantity,
+            "amount": total,
+            "order_count": order_count
+        }
+    except Exception as e:
+        return {"success": False, "message": f"Error building trend series: {e}"}
+    finally:
+        conn.close()
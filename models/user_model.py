@@ -1,5 +1,5 @@
 from database.db_connection import get_connection
-from utils.encryption import hash_password, verify_password
+from utils.encryption import hash_password, verify_password, needs_rehash
 import random
 
 # ---------- username generation ----------
@@ -14,22 +14,32 @@ def _initials(first_name: str | None, last_name: str | None) -> str:
         return ("x" + l[0]).lower()
     return "xx"
 
-def _random_digits(n: int = 4) -> str:
-    return f"{random.randint(0, 10**n - 1):0{n}d}"
+USERNAME_DIGITS = 4
+_USERNAME_SUFFIXES = [f"{n:0{USERNAME_DIGITS}d}" for n in range(10 ** USERNAME_DIGITS)]
 
 def generate_username(first_name: str | None, last_name: str | None) -> str:
     """Make unique username like ak0182."""
     prefix = _initials(first_name, last_name)
+    # one range scan of the username index finds every taken suffix for this prefix
     conn = get_connection(); cur = conn.cursor()
     try:
-        for _ in range(10000):
-            candidate = prefix + _random_digits(4)
-            cur.execute("SELECT 1 FROM users WHERE username = ?", (candidate,))
-            if not cur.fetchone():
-                return candidate
-        raise RuntimeError("Unable to generate a unique username.")
+        cur.execute("""
+            SELECT substr(username, ?) FROM users
+            WHERE username BETWEEN ? AND ? AND length(username) = ?
+        """, (len(prefix) + 1, prefix + _USERNAME_SUFFIXES[0], prefix + _USERNAME_SUFFIXES[-1],
+              len(prefix) + USERNAME_DIGITS))
+        taken = {row[0] for row in cur.fetchall()}
     finally:
         conn.close()
+    for _ in range(8):
+        suffix = random.choice(_USERNAME_SUFFIXES)
+        if suffix not in taken:
+            return prefix + suffix
+    # crowded prefix: choose among what's left
+    free = [suffix for suffix in _USERNAME_SUFFIXES if suffix not in taken]
+    if not free:
+        raise RuntimeError("Unable to generate a unique username.")
+    return prefix + random.choice(free)
 
 # ---------- auth ----------
 def authenticate(identifier: str, password: str):
@@ -45,6 +55,8 @@ def authenticate(identifier: str, password: str):
     conn.close()
     if not row or not verify_password(password, row["password"]):
         return None
+    if needs_rehash(row["password"]):
+        _upgrade_password_hash(row["id"], row["password"], password)
     return {
         "id": row["id"],
         "username": row["username"],
@@ -57,6 +69,19 @@ def authenticate(identifier: str, password: str):
         "is_active": row["is_active"]
     }
 
+def _upgrade_password_hash(user_id: int, old_hash: str, password: str):
+    """Re-hash with the current scheme and cost; skipped if the hash changed meanwhile."""
+    conn = get_connection(); cur = conn.cursor()
+    try:
+        cur.execute("UPDATE users SET password = ? WHERE id = ? AND password = ?",
+                    (hash_password(password), user_id, old_hash))
+        conn.commit()
+    except Exception as e:
+        # the login itself already succeeded
+        print(f"Password hash upgrade error: {e}")
+    finally:
+        conn.close()
+
 # ---------- user CRUD ----------
 def create_user(
     *,
@@ -121,6 +146,9 @@ def delete_user(user_id: int, requesting_user: dict) -> bool:
     conn.commit()
     ok = cur.rowcount > 0
     conn.close()
+    if ok:
+        from utils.auth_service import revoke_user_sessions
+        revoke_user_sessions(user_id)
     return ok
 
 def list_team_employees(manager_id: int):
@@ -175,4 +203,8 @@ def update_user(user_id: int, requesting_user: dict, **updates):
     conn.commit()
     ok = cur.rowcount > 0
     conn.close()
+    if ok and ("role" in fields_to_update or "is_active" in fields_to_update):
+        # cached sessions hold the old role / active flag
+        from utils.auth_service import revoke_user_sessions
+        revoke_user_sessions(user_id)
     return ok
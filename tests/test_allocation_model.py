@@ -0,0 +1,110 @@
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.allocation_model import get_available_to_promise, get_available_to_promise_bulk
+from models.sales_order_model import (
+    create_sales_order_with_lines, complete_sales_order,
+    update_sales_order_status, delete_sales_order
+)
+from models.customer_model import create_customer
+from models.inventory_model import add_item, get_item, update_item, update_item_quantity
+from database.db_setup import setup_database
+from database.db_connection import get_connection
+
+
+class TestAllocationModel(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Set up test database once for all tests"""
+        setup_database()
+
+    def setUp(self):
+        """Clear reservation test data before each test"""
+        conn = get_connection()
+        cur = conn.cursor()
+        try:
+            cur.execute("""
+                DELETE FROM sales_order_lines WHERE item_id IN
+                (SELECT id FROM items WHERE sku LIKE 'ATPTEST-%')
+            """)
+            cur.execute("DELETE FROM sales_orders WHERE customer_id IN (SELECT id FROM customers WHERE name LIKE 'Test ATP Customer%')")
+            cur.execute("DELETE FROM customers WHERE name LIKE 'Test ATP Customer%'")
+            cur.execute("DELETE FROM items WHERE sku LIKE 'ATPTEST-%'")
+            conn.commit()
+        finally:
+            conn.close()
+        self.customer_id = create_customer(name="Test ATP Customer", email="atp@test.com")["id"]
+        self.item_id = add_item({"sku": "ATPTEST-001", "name": "ATP Item", "quantity": 10, "price": 5.0})
+
+    def _order(self, quantity):
+        return create_sales_order_with_lines(
+            self.customer_id,
+            [{"item_id": self.item_id, "quantity": quantity, "unit_price": 5.0}],
+            created_by=1
+        )
+
+    def test_create_reserves_stock(self):
+        """Pending orders reduce available-to-promise but not on-hand quantity"""
+        self.assertTrue(self._order(4)["success"])
+
+        atp = get_available_to_promise(self.item_id)
+        self.assertEqual(atp["quantity"], 10)
+        self.assertEqual(atp["reserved_quantity"], 4)
+        self.assertEqual(atp["available"], 6)
+        self.assertEqual(get_available_to_promise_bulk([self.item_id])["available"], {self.item_id: 6})
+
+    def test_manual_quantity_edit_keeps_reservations(self):
+        """Manual edits can't set on-hand quantity below the reserved quantity"""
+        self.assertTrue(self._order(4)["success"])
+
+        result = update_item_quantity(self.item_id, 3)
+        self.assertFalse(result["success"])
+        self.assertIn("reserved", result["message"])
+        with self.assertRaises(ValueError):
+            update_item(self.item_id, {"quantity": 3, "price": 6.0})
+        self.assertEqual(get_item(self.item_id)["item"]["quantity"], 10)
+        self.assertEqual(get_item(self.item_id)["item"]["price"], 5.0)
+
+        self.assertTrue(update_item_quantity(self.item_id, 4)["success"])
+        self.assertTrue(update_item(self.item_id, {"quantity": 5}))
+        self.assertEqual(get_available_to_promise(self.item_id)["available"], 1)
+
+    def test_cannot_oversell_pending_stock(self):
+        """A second order beyond available-to-promise is rejected and reserves nothing"""
+        self.assertTrue(self._order(7)["success"])
+        result = self._order(4)
+
+        self.assertFalse(result["success"])
+        self.assertIn("Available: 3", result["message"])
+        self.assertEqual(get_available_to_promise(self.item_id)["reserved_quantity"], 7)
+
+    def test_cancel_and_delete_release_reservation(self):
+        """Cancelling or deleting a pending order gives its stock back"""
+        first = self._order(3)
+        second = self._order(5)
+
+        update_sales_order_status(first["id"], "CANCELLED")
+        self.assertEqual(get_available_to_promise(self.item_id)["available"], 5)
+
+        delete_sales_order(second["id"])
+        self.assertEqual(get_available_to_promise(self.item_id)["available"], 10)
+
+        # Reopening re-reserves
+        self.assertTrue(update_sales_order_status(first["id"], "PENDING")["success"])
+        self.assertEqual(get_available_to_promise(self.item_id)["reserved_quantity"], 3)
+
+    def test_complete_consumes_reservation(self):
+        """Completing an order takes stock off both on-hand and reserved"""
+        order = self._order(4)
+        self.assertTrue(complete_sales_order(order["id"])["success"])
+
+        atp = get_available_to_promise(self.item_id)
+        self.assertEqual(atp["quantity"], 6)
+        self.assertEqual(atp["reserved_quantity"], 0)
+        self.assertEqual(get_item(self.item_id)["item"]["quantity"], 6)
+
+
+if __name__ == "__main__":
+    unittest.main()
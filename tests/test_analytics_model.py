@@ -0,0 +1,86 @@
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.analytics_model import NUMPY_AVAILABLE, abc_classes, compute_inventory_kpis, kpi_rows
+from models.purchase_order_model import create_purchase_order, complete_purchase_order
+from models.sales_order_model import create_sales_order, complete_sales_order
+from models.supplier_model import create_supplier
+from models.customer_model import create_customer
+from models.inventory_model import add_item
+from database.db_setup import setup_database
+from database.db_connection import get_connection
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+
+
+@unittest.skipUnless(NUMPY_AVAILABLE, "numpy not installed")
+class TestAnalyticsModel(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Set up test database once for all tests"""
+        setup_database()
+
+    def setUp(self):
+        """Clear analytics test data before each test"""
+        conn = get_connection()
+        cur = conn.cursor()
+        try:
+            items = "(SELECT id FROM items WHERE sku LIKE 'KPITEST-%')"
+            for table in ("daily_item_sales", "daily_item_purchases", "sales_order_lines", "purchase_order_lines"):
+                cur.execute(f"DELETE FROM {table} WHERE item_id IN {items}")
+            cur.execute("DELETE FROM sales_orders WHERE item_id IN " + items)
+            cur.execute("DELETE FROM purchase_orders WHERE item_id IN " + items)
+            cur.execute("DELETE FROM customers WHERE name = 'Test KPI Customer'")
+            cur.execute("DELETE FROM suppliers WHERE name = 'Test KPI Supplier'")
+            cur.execute("DELETE FROM items WHERE sku LIKE 'KPITEST-%'")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def test_abc_classes(self):
+        """Items are A until 80% of revenue is covered, B until 95%, then C; no revenue is C"""
+        revenue = np.array([10.0, 700.0, 0.0, 150.0, 100.0, 40.0])
+        self.assertEqual(list(abc_classes(revenue)), ["C", "A", "C", "A", "B", "C"])
+        self.assertEqual(list(abc_classes(np.zeros(3))), ["C", "C", "C"])
+
+    def test_item_kpis(self):
+        """Turnover, days of supply, sell-through and stock-to-sales for a known history"""
+        supplier_id = create_supplier(name="Test KPI Supplier")["id"]
+        customer_id = create_customer(name="Test KPI Customer", email="kpi@test.com")["id"]
+        item_id = add_item({"sku": "KPITEST-A", "name": "KPI Item", "quantity": 20, "price": 10.0})
+        idle_id = add_item({"sku": "KPITEST-B", "name": "Idle Item", "quantity": 5, "price": 10.0})
+
+        po = create_purchase_order(supplier_id, item_id, 40, 4.0, created_by=1)
+        complete_purchase_order(po["id"], completed_at="2018-01-02T10:00:00")
+        so = create_sales_order(customer_id, item_id, 30, 10.0, created_by=1)
+        complete_sales_order(so["id"], completed_at="2018-01-20T10:00:00")
+
+        # 30 days; on hand 30 now, opened at 30 + 30 - 40 = 20
+        result = compute_inventory_kpis("2018-01-01", "2018-01-30")
+        self.assertTrue(result["success"])
+        rows = {r["item_id"]: r for r in kpi_rows(result["columns"])}
+        row = rows[item_id]
+        self.assertEqual(row["units_sold"], 30)
+        self.assertEqual(row["revenue"], 300.0)
+        self.assertEqual(row["turnover"], 1.2)
+        self.assertEqual(row["days_of_supply"], 30.0)
+        self.assertEqual(row["sell_through"], 50.0)
+        self.assertEqual(row["stock_to_sales"], 1.0)
+
+        idle = rows[idle_id]
+        self.assertEqual(idle["abc_class"], "C")
+        self.assertIsNone(idle["days_of_supply"])
+        self.assertIsNone(idle["stock_to_sales"])
+
+        by_supply = kpi_rows(result["columns"], order_by="days_of_supply")
+        self.assertIsNone(by_supply[-1]["days_of_supply"])
+        for order_by in ("abc_class", "margin"):
+            with self.assertRaises(ValueError):
+                kpi_rows(result["columns"], order_by=order_by)
+
+
+if __name__ == "__main__":
+    unittest.main()
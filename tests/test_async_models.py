@@ -0,0 +1,104 @@
+import unittest
+import asyncio
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.async_models import AsyncModels
+from models.inventory_model import add_item, get_item
+from database.db_setup import setup_database
+from database.db_connection import get_connection
+
+
+class TestAsyncModels(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Set up test database once for all tests"""
+        setup_database()
+    
+    def setUp(self):
+        """Clear async test data before each test"""
+        conn = get_connection()
+        cur = conn.cursor()
+        try:
+            cur.execute("DELETE FROM items WHERE sku LIKE 'ASYNC-%'")
+            cur.execute("DELETE FROM customers WHERE name LIKE 'Test Async Customer%'")
+            conn.commit()
+        finally:
+            conn.close()
+    
+    def test_gather_concurrent_reads(self):
+        """Test gathering many reads over a small connection pool"""
+        item_ids = [add_item({"sku": f"ASYNC-{i:03d}", "name": f"Async Item {i}", "quantity": i, "price": 1.0})
+                    for i in range(20)]
+        
+        async def run():
+            async with AsyncModels(max_connections=2) as db:
+                return await db.gather(*(db.inventory.get_item(i) for i in item_ids))
+        
+        results = asyncio.run(run())
+        self.assertEqual(len(results), 20)
+        self.assertTrue(all(r["success"] for r in results))
+        self.assertEqual([r["item"]["id"] for r in results], item_ids)
+    
+    def test_connection_count_is_fixed(self):
+        """Test that the executor never opens more connections than configured"""
+        async def run():
+            db = AsyncModels(max_connections=3)
+            try:
+                await db.gather(*(db.customers.list_all_customers() for _ in range(50)))
+                return len(db.executor._connections)
+            finally:
+                db.close()
+        
+        self.assertLessEqual(asyncio.run(run()), 3)
+    
+    def test_write_then_read(self):
+        """Test that writes through the facade are committed"""
+        async def run():
+            async with AsyncModels(max_connections=2) as db:
+                created = await db.customers.create_customer("Test Async Customer 1", email="async@test.com")
+                fetched = await db.customers.get_customer(created["id"])
+                return fetched
+        
+        result = asyncio.run(run())
+        self.assertTrue(result["success"])
+        self.assertEqual(result["customer"]["name"], "Test Async Customer 1")
+    
+    def test_nested_close_keeps_caller_transaction(self):
+        """A model call inside an open transaction on a worker doesn't roll it back"""
+        item_id = add_item({"sku": "ASYNC-NEST", "name": "Nested", "quantity": 1, "price": 1.0})
+        
+        def rename_around_lookup():
+            conn = get_connection()
+            try:
+                conn.execute("UPDATE items SET name = 'Nested Renamed' WHERE id = ?", (item_id,))
+                get_item(item_id)  # opens and closes the same pinned connection
+                conn.commit()
+            finally:
+                conn.close()
+        
+        def leave_open():
+            get_connection().execute("UPDATE items SET name = 'Never Committed' WHERE id = ?", (item_id,))
+        
+        db = AsyncModels(max_connections=1)
+        try:
+            db.executor.submit(rename_around_lookup).result(5)
+            db.executor.submit(leave_open).result(5)
+            # the next task starts clean: the unclosed transaction was rolled back
+            self.assertEqual(db.executor.submit(get_item, item_id).result(5)["item"]["name"], "Nested Renamed")
+        finally:
+            db.close()
+    
+    def test_only_model_functions_exposed(self):
+        """Test that imported helpers are not exposed through the facade"""
+        db = AsyncModels(max_connections=1)
+        try:
+            with self.assertRaises(AttributeError):
+                db.inventory.get_connection
+        finally:
+            db.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
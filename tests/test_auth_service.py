@@ -0,0 +1,111 @@
+import unittest
+import sys
+import os
+import threading
+from unittest.mock import patch
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import auth_service
+from utils.auth_service import (
+    MAX_LOGIN_ATTEMPTS, submit_login, login_with_password, validate_session, end_session,
+    shutdown_auth_service
+)
+from controllers.login_controller import login, resume_session
+from models.user_model import create_user, delete_user, update_user
+from database.db_setup import setup_database
+from database.db_connection import get_connection
+
+
+class TestAuthService(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Set up test database once for all tests"""
+        setup_database()
+
+    def setUp(self):
+        """Create a fresh test user"""
+        conn = get_connection()
+        cur = conn.cursor()
+        try:
+            cur.execute("DELETE FROM users WHERE email LIKE '%@authsvc.test'")
+            conn.commit()
+        finally:
+            conn.close()
+        self.user = create_user(password="secret123", role="STAFF", first_name="Auth",
+                                last_name="Service", email="staff@authsvc.test")
+        self.admin = {"id": -1, "role": "ADMIN"}
+
+    def tearDown(self):
+        shutdown_auth_service()
+
+    def test_session_token_skips_password(self):
+        """A login issues a token that resumes the session until logout"""
+        ok, user = login(self.user["username"], "secret123")
+        self.assertTrue(ok)
+        token = user["session_token"]
+
+        with patch.object(auth_service, "authenticate") as authenticate:
+            ok, resumed = resume_session(token)
+            authenticate.assert_not_called()
+        self.assertTrue(ok)
+        self.assertEqual((resumed["id"], resumed["session_token"]), (self.user["id"], token))
+
+        self.assertTrue(end_session(token))
+        self.assertEqual(resume_session(token), (False, None))
+
+        with patch.object(auth_service, "SESSION_SECONDS", -1):
+            expired = login_with_password("staff@authsvc.test", "secret123")["token"]
+        self.assertIsNone(validate_session(expired))
+
+    def test_sessions_revoked_on_role_change_and_delete(self):
+        """Cached sessions don't outlive the user's role or account"""
+        first = login_with_password(self.user["username"], "secret123")["token"]
+        update_user(self.user["id"], self.admin, phone="555-0100")
+        self.assertIsNotNone(validate_session(first))
+        update_user(self.user["id"], self.admin, role="VIEWER")
+        self.assertIsNone(validate_session(first))
+
+        second = login_with_password(self.user["username"], "secret123")
+        self.assertEqual(second["user"]["role"], "VIEWER")
+        delete_user(self.user["id"], self.admin)
+        self.assertIsNone(validate_session(second["token"]))
+
+    def test_rate_limit_per_identifier(self):
+        """Failed attempts lock out that identifier only; success resets the count"""
+        for _ in range(MAX_LOGIN_ATTEMPTS - 1):
+            self.assertFalse(login_with_password(self.user["username"], "wrong")["success"])
+        self.assertTrue(login_with_password(self.user["username"], "secret123")["success"])
+
+        for _ in range(MAX_LOGIN_ATTEMPTS):
+            login_with_password(self.user["username"], "wrong")
+        with patch.object(auth_service, "authenticate") as authenticate:
+            result = login_with_password(f" {self.user['username'].upper()} ", "secret123")
+            authenticate.assert_not_called()
+        self.assertIn("Too many", result["message"])
+        self.assertTrue(login_with_password("staff@authsvc.test", "secret123")["success"])
+
+    def test_verification_runs_on_bounded_pool(self):
+        """Checks run on auth workers, and logins beyond the queue limit are turned away"""
+        release = threading.Event()
+        threads = []
+
+        def slow_authenticate(identifier, password):
+            threads.append(threading.current_thread().name)
+            release.wait(5)
+            return None
+
+        with patch.object(auth_service, "authenticate", slow_authenticate), \
+                patch.object(auth_service, "_slots", threading.BoundedSemaphore(2)):
+            pending = [submit_login(f"user{i}@authsvc.test", "x") for i in range(2)]
+            busy = submit_login("user2@authsvc.test", "x").result(1)
+            self.assertIn("busy", busy["message"])
+            release.set()
+            self.assertEqual([future.result(5)["success"] for future in pending], [False, False])
+            self.assertTrue(all(name.startswith("auth-worker") for name in threads))
+            # slots come back once checks finish
+            self.assertFalse(submit_login("user3@authsvc.test", "x").result(5)["success"])
+            self.assertEqual(len(threads), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
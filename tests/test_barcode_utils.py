@@ -1,9 +1,21 @@
 import unittest
 import sys
 import os
+import sqlite3
+import tempfile
+from unittest.mock import patch
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from utils.barcode_utils import generate_barcode_number
+from utils import barcode_utils
+from utils.barcode_utils import (
+    generate_barcode_number, ean13_check_digit, assign_item_barcode, assign_missing_barcodes,
+    search_item_by_barcode, generate_barcode_image, barcode_display_image, save_barcode_image,
+    clear_image_cache, normalize_barcode
+)
+from models.inventory_model import add_item, update_item
+from models.scan_model import lookup_barcode
+from database.db_setup import setup_database, _migrate_barcodes
+from database.db_connection import get_connection
 
 
 class TestBarcodeUtils(unittest.TestCase):
@@ -23,6 +35,172 @@ class TestBarcodeUtils(unittest.TestCase):
             barcodes.add(barcode)
         
         self.assertGreater(len(barcodes), 90)
+    
+    def test_barcode_is_deterministic_ean13(self):
+        """Same item gives the same valid EAN-13 code; retries give another"""
+        barcode = generate_barcode_number(42, "SKU-42")
+        self.assertEqual(barcode, generate_barcode_number(42, "SKU-42"))
+        self.assertNotEqual(barcode, generate_barcode_number(42, "SKU-42", attempt=1))
+        self.assertEqual(len(barcode), 13)
+        self.assertTrue(barcode.isdigit())
+        self.assertEqual(barcode[-1], ean13_check_digit(barcode[:12]))
+        # Known GTIN
+        self.assertEqual(ean13_check_digit("400638133393"), "1")
+
+
+class TestBarcodeAssignment(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Set up test database once for all tests"""
+        setup_database()
+    
+    def setUp(self):
+        """Remove barcode test items"""
+        conn = get_connection()
+        cur = conn.cursor()
+        try:
+            cur.execute("DELETE FROM inventory_movements WHERE item_id IN (SELECT id FROM items WHERE sku LIKE 'BCTEST-%')")
+            cur.execute("DELETE FROM items WHERE sku LIKE 'BCTEST-%'")
+            conn.commit()
+        finally:
+            conn.close()
+    
+    def test_bulk_assignment_fills_missing(self):
+        """Items without barcodes get distinct codes in one pass"""
+        ids = [add_item({"sku": f"BCTEST-{c}", "name": "Barcode Item", "quantity": 1, "price": 1.0})
+               for c in "ABC"]
+        result = assign_missing_barcodes()
+        self.assertTrue(result["success"], result.get("message"))
+        self.assertGreaterEqual(result["assigned"], 3)
+        
+        conn = get_connection()
+        try:
+            codes = [conn.execute("SELECT barcode FROM items WHERE id = ?", (i,)).fetchone()[0] for i in ids]
+        finally:
+            conn.close()
+        self.assertEqual(len(set(codes)), 3)
+        self.assertEqual(codes[0], generate_barcode_number(ids[0], "BCTEST-A"))
+        
+        # Lookups accept the code with or without its check digit
+        self.assertEqual(search_item_by_barcode(codes[1][:12])["id"], ids[1])
+        self.assertEqual(assign_missing_barcodes()["assigned"], 0)
+    
+    def test_normalize_barcode(self):
+        """UPC-A gains a leading zero, EAN bodies their check digit, blanks become empty"""
+        self.assertEqual(normalize_barcode("036000291452"), "0036000291452")
+        self.assertEqual(normalize_barcode(" 200000000001 "), "2000000000015")
+        self.assertEqual(normalize_barcode("000007123456"), "000007123456" + ean13_check_digit("000007123456"))
+        self.assertEqual(normalize_barcode("ABC-12"), "ABC-12")
+        self.assertEqual(normalize_barcode("  "), "")
+        self.assertEqual(normalize_barcode(None), "")
+    
+    def test_writes_store_normalized_barcodes(self):
+        """Blank barcodes are stored as NULL and 12-digit codes can be looked up"""
+        blanks = [add_item({"sku": f"BCTEST-{c}", "name": "Barcode Item", "quantity": 1, "price": 1.0,
+                            "barcode": ""}) for c in "AB"]
+        upc = add_item({"sku": "BCTEST-C", "name": "Barcode Item", "quantity": 1, "price": 1.0,
+                        "barcode": "036000291452"})
+        self.assertEqual(search_item_by_barcode("036000291452")["id"], upc)
+        self.assertEqual(lookup_barcode("0036000291452")["id"], upc)
+        
+        self.assertTrue(update_item(blanks[0], {"barcode": "200000000001"}))
+        self.assertTrue(update_item(blanks[1], {"barcode": " "}))
+        conn = get_connection()
+        try:
+            codes = [conn.execute("SELECT barcode FROM items WHERE id = ?", (i,)).fetchone()[0] for i in blanks]
+        finally:
+            conn.close()
+        self.assertEqual(codes, ["2000000000015", None])
+    
+    def test_migration_keeps_upc_a(self):
+        """Legacy generated codes get a check digit; UPC-A codes keep their digits"""
+        conn = sqlite3.connect(":memory:")
+        try:
+            conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, barcode TEXT)")
+            conn.executemany("INSERT INTO items (id, barcode) VALUES (?, ?)",
+                             [(7, "000007123456"), (8, "036000291452"), (9, ""), (10, "ABC-12")])
+            with patch("builtins.print"):
+                _migrate_barcodes(conn)
+            codes = dict(conn.execute("SELECT id, barcode FROM items"))
+        finally:
+            conn.close()
+        self.assertEqual(codes, {7: "000007123456" + ean13_check_digit("000007123456"),
+                                 8: "0036000291452", 9: None, 10: "ABC-12"})
+    
+    def test_collision_skips_taken_code(self):
+        """A code held by another item is never reused"""
+        first = add_item({"sku": "BCTEST-A", "name": "Barcode Item", "quantity": 1, "price": 1.0})
+        second = add_item({"sku": "BCTEST-B", "name": "Barcode Item", "quantity": 1, "price": 1.0})
+        conn = get_connection()
+        try:
+            conn.execute("UPDATE items SET barcode = ? WHERE id = ?", (generate_barcode_number(second, "BCTEST-B"), first))
+            conn.commit()
+            with self.assertRaises(sqlite3.IntegrityError):
+                conn.execute("UPDATE items SET barcode = (SELECT barcode FROM items WHERE id = ?) WHERE id = ?",
+                             (first, second))
+        finally:
+            conn.close()
+        
+        self.assertEqual(assign_item_barcode(second, "BCTEST-B"),
+                         generate_barcode_number(second, "BCTEST-B", attempt=1))
+
+
+class TestBarcodeImageCache(unittest.TestCase):
+    
+    def setUp(self):
+        """Point the disk cache at a temporary folder"""
+        self.folder = tempfile.TemporaryDirectory()
+        self.dir_patch = patch.object(barcode_utils, "IMAGE_CACHE_DIR", os.path.join(self.folder.name, "cache"))
+        self.dir_patch.start()
+        clear_image_cache(disk=True)
+    
+    def tearDown(self):
+        clear_image_cache(disk=True)
+        self.dir_patch.stop()
+        self.folder.cleanup()
+    
+    def _cache_files(self):
+        return [name for _, _, files in os.walk(barcode_utils.IMAGE_CACHE_DIR) for name in files]
+    
+    def test_images_are_rendered_once(self):
+        """Repeat requests hit memory, then disk after the memory cache is cleared"""
+        code = generate_barcode_number(7, "SKU-7")
+        with patch.object(barcode_utils, "_render_barcode_image",
+                          wraps=barcode_utils._render_barcode_image) as render:
+            first = barcode_display_image(code, "Cached Item", width=300)
+            second = barcode_display_image(code, "Cached Item", width=300)
+            self.assertEqual(render.call_count, 1)
+            self.assertEqual(first.tobytes(), second.tobytes())
+            self.assertEqual(first.width, 300)
+            
+            # Callers get copies
+            first.paste((255, 0, 0), (0, 0, 50, 50))
+            self.assertEqual(barcode_display_image(code, "Cached Item", width=300).tobytes(), second.tobytes())
+            
+            clear_image_cache()
+            generate_barcode_image(code, "Cached Item")
+            self.assertEqual(render.call_count, 1)
+            
+            # Different options are a different image
+            generate_barcode_image(code, "Other Name")
+            self.assertEqual(render.call_count, 2)
+        
+        output = os.path.join(self.folder.name, "out")
+        path = save_barcode_image(code, "Cached Item", output_dir=output)
+        self.assertTrue(os.path.exists(path))
+    
+    def test_disk_cache_evicts_by_size(self):
+        """The disk cache is trimmed to its byte budget, newest files kept"""
+        code = generate_barcode_number(1, "SKU-1")
+        generate_barcode_image(code)
+        one_file = os.path.getsize(barcode_utils._image_cache_file(barcode_utils._image_key("barcode", (code, ""))))
+        with patch.object(barcode_utils, "IMAGE_CACHE_DISK_BYTES", int(one_file * 3.5)):
+            for i in range(2, 8):
+                generate_barcode_image(generate_barcode_number(i, f"SKU-{i}"))
+            self.assertLessEqual(len(self._cache_files()), 3)
+            latest = barcode_utils._image_cache_file(
+                barcode_utils._image_key("barcode", (generate_barcode_number(7, "SKU-7"), "")))
+            self.assertTrue(os.path.exists(latest))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,232 @@
+import unittest
+import sys
+import os
+import socketserver
+import smtplib
+import threading
+import time
+from unittest.mock import patch
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models import email_outbox_model
+from models.email_outbox_model import MAX_ATTEMPTS, get_outbox_counts
+from utils import email_notifications
+from utils.email_notifications import (
+    queue_email, deliver_due_emails, stop_email_sender, send_low_stock_alert,
+    send_order_completion_notification, flush_due_digests
+)
+from database.db_setup import setup_database
+from database.db_connection import get_connection
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: EHLO, AUTH, MAIL, RCPT, DATA, RSET, NOOP, QUIT"""
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply("220 stand-in ready")
+        while True:
+            line = self.rfile.readline().decode().strip()
+            if not line:
+                return
+            command = line.split(" ", 1)[0].upper()
+            if command == "EHLO":
+                self.reply("250-stand-in")
+                self.reply("250 AUTH PLAIN LOGIN")
+            elif command == "AUTH":
+                self.reply("235 authenticated")
+            elif command == "RCPT" and "bounce" in line:
+                self.reply("550 no such mailbox")
+            elif command == "DATA":
+                self.reply("354 go ahead")
+                data = []
+                while (chunk := self.rfile.readline()) != b".\r\n":
+                    data.append(chunk)
+                self.server.messages.append(b"".join(data))
+                self.reply("250 queued")
+            elif command == "QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("250 ok")
+
+
+class _SMTPStandIn(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _SMTPHandler)
+        self.connections = 0
+        self.messages = []
+
+
+class TestEmailOutbox(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Set up test database once and start the SMTP stand-in"""
+        setup_database()
+        cls.smtp = _SMTPStandIn()
+        threading.Thread(target=cls.smtp.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.smtp.shutdown()
+        cls.smtp.server_close()
+
+    def setUp(self):
+        """Point email at the stand-in with an empty outbox"""
+        self._clear_outbox()
+        self.smtp.connections = 0
+        self.smtp.messages.clear()
+        config = {"smtp_server": "127.0.0.1", "smtp_port": self.smtp.server_address[1],
+                  "sender_email": "inventory@outbox.test", "sender_password": "secret",
+                  "use_tls": True, "enabled": True, "digest_minutes": 0}
+        for patcher in (patch.dict(email_notifications.EMAIL_CONFIG, config),
+                        patch.object(smtplib.SMTP, "starttls", lambda server: (220, b"ready"))):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        stop_email_sender()
+        self._clear_outbox()
+
+    def _clear_outbox(self):
+        conn = get_connection()
+        try:
+            conn.execute("DELETE FROM email_outbox WHERE to_email LIKE '%@outbox.test'")
+            conn.execute("DELETE FROM email_digest_events WHERE to_email LIKE '%@outbox.test'")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _outbox_row(self, email_id):
+        conn = get_connection()
+        try:
+            return dict(conn.execute("SELECT * FROM email_outbox WHERE id = ?", (email_id,)).fetchone())
+        finally:
+            conn.close()
+
+    def test_batch_shares_one_session(self):
+        """Every due message goes out over a single SMTP connection"""
+        with patch.object(email_notifications, "start_email_sender"):
+            ids = [queue_email(f"user{i}@outbox.test", f"Message {i}", f"<p>{i}</p>", str(i))["id"]
+                   for i in range(5)]
+        sent, server = deliver_due_emails()
+        self.assertEqual(sent, 5)
+        self.assertEqual(self.smtp.connections, 1)
+        self.assertEqual(len(self.smtp.messages), 5)
+        self.assertEqual({self._outbox_row(i)["status"] for i in ids}, {"SENT"})
+
+        # The open session is reused for the next batch
+        with patch.object(email_notifications, "start_email_sender"):
+            queue_email("late@outbox.test", "Late", "<p>late</p>")
+        self.assertEqual(deliver_due_emails(server)[0], 1)
+        self.assertEqual(self.smtp.connections, 1)
+        server.quit()
+
+    def test_refused_message_backs_off_then_fails(self):
+        """A refused recipient is retried with backoff and given up after MAX_ATTEMPTS"""
+        with patch.object(email_notifications, "start_email_sender"):
+            bounce = queue_email("bounce@outbox.test", "Bounce", "<p>x</p>")["id"]
+            good = queue_email("good@outbox.test", "Good", "<p>y</p>")["id"]
+        sent, server = deliver_due_emails()
+        self.assertEqual(sent, 1)
+        row = self._outbox_row(bounce)
+        self.assertEqual((row["status"], row["attempts"]), ("PENDING", 1))
+        self.assertIn("550", row["last_error"])
+        self.assertGreater(row["next_attempt_at"], row["created_at"])
+        self.assertEqual(self._outbox_row(good)["status"], "SENT")
+
+        # Not due yet
+        self.assertEqual(deliver_due_emails(server)[0], 0)
+        self.assertEqual(self._outbox_row(bounce)["attempts"], 1)
+
+        conn = get_connection()
+        try:
+            conn.execute("UPDATE email_outbox SET next_attempt_at = created_at WHERE id = ?", (bounce,))
+            conn.commit()
+        finally:
+            conn.close()
+        with patch.object(email_outbox_model, "RETRY_BASE_SECONDS", 0):
+            for _ in range(MAX_ATTEMPTS):
+                deliver_due_emails(server)
+        row = self._outbox_row(bounce)
+        self.assertEqual((row["status"], row["attempts"]), ("FAILED", MAX_ATTEMPTS))
+        server.quit()
+
+    def test_unreachable_server_keeps_mail_queued(self):
+        """A connection failure leaves messages pending for a later retry"""
+        with patch.object(email_notifications, "start_email_sender"):
+            email_id = queue_email("down@outbox.test", "Down", "<p>z</p>")["id"]
+        with patch.dict(email_notifications.EMAIL_CONFIG, {"smtp_port": 1}):
+            sent, server = deliver_due_emails()
+        self.assertEqual((sent, server), (0, None))
+        row = self._outbox_row(email_id)
+        self.assertEqual((row["status"], row["attempts"]), ("PENDING", 1))
+
+    def test_background_sender_delivers_queued_alert(self):
+        """Notifications return immediately and the sender thread delivers them"""
+        item = {"name": "Widget", "sku": "W-1", "quantity": 0, "min_stock_level": 5, "price": 2.0}
+        result = send_low_stock_alert("admin@outbox.test", [item])
+        self.assertTrue(result["success"], result.get("message"))
+
+        deadline = time.monotonic() + 5
+        while not self.smtp.messages and time.monotonic() < deadline:
+            time.sleep(0.02)
+        self.assertEqual(len(self.smtp.messages), 1)
+        self.assertIn(b"admin@outbox.test", self.smtp.messages[0])
+        stop_email_sender()
+        self.assertEqual(self._outbox_row(result["id"])["status"], "SENT")
+        self.assertNotIn("SENDING", get_outbox_counts())
+
+    def test_env_settings_tolerate_bad_values(self):
+        """Malformed integer settings fall back to the default; negatives are clamped"""
+        env_int = email_notifications._env_int
+        with patch("builtins.print"):
+            for raw, expected in (("30", 30), ("fifteen", 15), ("", 15), ("-5", 0)):
+                with patch.dict(os.environ, {"EMAIL_DIGEST_MINUTES": raw}):
+                    self.assertEqual(env_int("EMAIL_DIGEST_MINUTES", 15, 0), expected)
+
+    def test_notifications_coalesce_into_digests(self):
+        """Each recipient gets one email per window, rendered once, with the latest stock list"""
+        widget = {"name": "Widget", "sku": "W-1", "quantity": 3, "min_stock_level": 5, "price": 2.0}
+        gadget = {"name": "Gadget", "sku": "G-1", "quantity": 0, "min_stock_level": 2, "price": 9.5}
+        with patch.dict(email_notifications.EMAIL_CONFIG, {"digest_minutes": 15}), \
+                patch.object(email_notifications, "start_email_sender"):
+            for order_id in (101, 102, 103):
+                send_order_completion_notification("boss@outbox.test", "sales", order_id, 2)
+            send_low_stock_alert("boss@outbox.test", [widget])
+            send_low_stock_alert("boss@outbox.test", [widget, gadget])
+            send_low_stock_alert("clerk@outbox.test", [widget])
+
+            # Nothing goes out before the window has passed
+            self.assertEqual(flush_due_digests(), 0)
+            conn = get_connection()
+            try:
+                conn.execute("UPDATE email_digest_events SET created_at = '2000-01-01T00:00:00' "
+                             "WHERE to_email LIKE '%@outbox.test'")
+                conn.commit()
+            finally:
+                conn.close()
+            with patch.object(email_notifications, "_digest_content",
+                              wraps=email_notifications._digest_content) as render:
+                self.assertEqual(flush_due_digests(), 2)
+                self.assertEqual(render.call_count, 2)
+
+        self.assertEqual(deliver_due_emails()[0], 2)
+        self.assertEqual(self.smtp.connections, 1)
+        boss = next(m for m in self.smtp.messages if b"To: boss@outbox.test" in m).decode()
+        self.assertIn("Inventory Digest", boss)
+        for order_id in ("#101", "#102", "#103", "Gadget"):
+            self.assertIn(order_id, boss)
+        # The clerk's single alert keeps the regular layout
+        clerk = next(m for m in self.smtp.messages if b"To: clerk@outbox.test" in m).decode()
+        self.assertIn("Low Stock Alert", clerk)
+
+
+if __name__ == "__main__":
+    unittest.main()
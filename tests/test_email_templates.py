@@ -0,0 +1,57 @@
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.email_templates import EmailTemplate, get_template, render, render_each
+from utils.email_notifications import _low_stock_content, _digest_content
+
+
+class TestEmailTemplates(unittest.TestCase):
+    def test_email_template(self):
+        """Placeholders are filled, escaped unless _html, and $$ is a literal dollar"""
+        template = EmailTemplate("<p>${name} costs $$${price}</p>{css}${body_html}")
+        self.assertEqual(template.fields, ("name", "price", "body_html"))
+        self.assertEqual(template.render({"name": "Nuts & <Bolts>", "price": 1.5, "body_html": "<b>x</b>"}),
+                         "<p>Nuts &amp; &lt;Bolts&gt; costs $1.5</p>{css}<b>x</b>")
+        self.assertEqual(EmailTemplate("${a} & ${b}", escape=False).render({"a": "<", "b": 2}), "< & 2")
+        self.assertRaises(KeyError, template.render, {"name": "x"})
+        self.assertRaises(ValueError, EmailTemplate, "price: $5")
+
+    def test_templates_parsed_once(self):
+        """Named templates are parsed on first use and reused after"""
+        self.assertIs(get_template("low_stock_item"), get_template("low_stock_item"))
+        self.assertEqual(render("paragraph", text="a"), "        <p>a</p>\n")
+        self.assertEqual(render_each("paragraph", ({"text": t} for t in "ab")),
+                         "        <p>a</p>\n        <p>b</p>\n")
+
+    def test_low_stock_email(self):
+        """Every item gets a block; item text is escaped in HTML but not in plain text"""
+        items = [{"name": "Nuts & Bolts", "sku": "NB-1", "quantity": 0, "min_stock_level": 5, "price": 2},
+                 {"name": "Washers", "sku": "W-1", "quantity": 4, "price": 0.5}]
+        subject, html_body, text_body = _low_stock_content(items)
+        self.assertIn("2 Items", subject)
+        self.assertEqual(html_body.count('<div class="item">'), 2)
+        self.assertIn("Nuts &amp; Bolts (NB-1)", html_body)
+        self.assertIn("🔴 OUT OF STOCK", html_body)
+        self.assertIn("Min Stock Level: 10", html_body)
+        self.assertIn("Price: $0.50", html_body)
+        self.assertIn("- Nuts & Bolts (NB-1): 0 units\n", text_body)
+
+    def test_digest_email(self):
+        """Digest tables list every order and the latest stock"""
+        events = [
+            {"kind": "order_completed", "payload": {"order_type": "purchase", "order_id": 7, "items_count": 3,
+                                                    "completed_at": "2024-01-01 10:00:00"}},
+            {"kind": "low_stock", "payload": {"items": [{"name": "Washers", "sku": "W-1", "quantity": 4,
+                                                         "min_stock_level": 5, "price": 0.5}]}},
+        ]
+        subject, html_body, text_body = _digest_content(events)
+        self.assertIn("1 Orders Completed, 1 Items Low on Stock", subject)
+        self.assertIn("<td>Purchase Order</td><td>#7</td>", html_body)
+        self.assertIn("<td>Washers (W-1)</td><td>4</td><td>5</td><td>$0.50</td>", html_body)
+        self.assertIn("- Purchase order #7: 3 items\n", text_body)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,13 @@
 import unittest
 import sys
 import os
+from unittest.mock import patch
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from utils.encryption import hash_password, verify_password
+from utils import encryption
+from utils.encryption import (
+    hash_password, verify_password, needs_rehash, calibrate, time_hash, Pbkdf2Hasher, ScryptHasher
+)
 
 
 class TestEncryption(unittest.TestCase):
@@ -59,6 +63,43 @@ class TestEncryption(unittest.TestCase):
         self.assertTrue(verify_password("", hashed))
         self.assertFalse(verify_password("notempty", hashed))
 
+    def test_schemes_verify_side_by_side(self):
+        """Hashes of every registered scheme keep verifying whatever the default is"""
+        legacy = Pbkdf2Hasher(1000).encode("pw", b"salt" * 4)
+        self.assertTrue(verify_password("pw", legacy))
+        self.assertFalse(verify_password("other", legacy))
+        self.assertTrue(needs_rehash(legacy))
+        self.assertFalse(verify_password("pw", "md5$abc$def"))
+        
+        with patch.object(encryption, "DEFAULT_SCHEME", "pbkdf2"):
+            current = hash_password("pw")
+            self.assertFalse(needs_rehash(current))
+            with patch.dict(encryption.HASHERS, {"pbkdf2": Pbkdf2Hasher(200_000)}):
+                self.assertTrue(verify_password("pw", current))
+                self.assertTrue(needs_rehash(current))
+    
+    @unittest.skipUnless("scrypt" in encryption.HASHERS, "hashlib has no scrypt")
+    def test_scrypt_hasher(self):
+        """scrypt hashes record n, r, p and are flagged when the cost changes"""
+        with patch.dict(encryption.HASHERS, {"scrypt": ScryptHasher(2 ** 10)}), \
+                patch.object(encryption, "DEFAULT_SCHEME", "scrypt"):
+            hashed = hash_password("pw")
+            self.assertTrue(hashed.startswith("scrypt$1024$8$1$"))
+            self.assertTrue(verify_password("pw", hashed))
+            self.assertFalse(verify_password("wrong", hashed))
+            self.assertFalse(needs_rehash(hashed))
+            encryption.HASHERS["scrypt"] = ScryptHasher(2 ** 11)
+            self.assertTrue(needs_rehash(hashed))
+        self.assertRaises(ValueError, ScryptHasher, 1000)
+    
+    def test_calibrate_scales_cost_to_target(self):
+        """A bigger time target calibrates to a bigger cost"""
+        with patch.dict(encryption.HASHERS, {"pbkdf2": Pbkdf2Hasher(10_000)}):
+            fast = calibrate("pbkdf2", target_ms=5, rounds=1)
+            slow = calibrate("pbkdf2", target_ms=20, rounds=1)
+        self.assertGreater(slow.iterations, fast.iterations)
+        self.assertGreater(time_hash(slow, 1), time_hash(fast, 1))
+
 
 if __name__ == '__main__':
     unittest.main()
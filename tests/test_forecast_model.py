@@ -0,0 +1,100 @@
+import unittest
+import sys
+import os
+from datetime import date, timedelta
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.analytics_model import NUMPY_AVAILABLE
+from models.forecast_model import day_weights, demand_statistics, run_reorder_job, get_demand_forecast
+from models.inventory_model import add_item
+from database.db_setup import setup_database
+from database.db_connection import get_connection
+
+AS_OF = date(2019, 6, 30)
+
+
+@unittest.skipUnless(NUMPY_AVAILABLE, "numpy not installed")
+class TestForecastModel(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Set up test database once for all tests"""
+        setup_database()
+
+    def setUp(self):
+        """Clear forecast test data before each test"""
+        conn = get_connection()
+        cur = conn.cursor()
+        try:
+            items = "(SELECT id FROM items WHERE sku LIKE 'FCTEST-%')"
+            cur.execute(f"DELETE FROM daily_item_sales WHERE item_id IN {items}")
+            cur.execute(f"DELETE FROM demand_forecasts WHERE item_id IN {items}")
+            cur.execute(f"DELETE FROM inventory_movements WHERE item_id IN {items}")
+            cur.execute("DELETE FROM items WHERE sku LIKE 'FCTEST-%'")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _sales(self, item_id, quantities_by_age):
+        """Write daily rollup rows for an item, keyed by age in days before AS_OF"""
+        conn = get_connection()
+        conn.executemany(
+            "INSERT INTO daily_item_sales (day, item_id, quantity, revenue, order_count) VALUES (?, ?, ?, 0, 1)",
+            [((AS_OF - timedelta(days=age)).isoformat(), item_id, qty) for age, qty in quantities_by_age.items()]
+        )
+        conn.commit()
+        conn.close()
+
+    def test_constant_demand(self):
+        """Selling the same amount every day forecasts that rate with no variability"""
+        for method in ("ewma", "sma"):
+            weights = day_weights(30, method)
+            mean, sd = demand_statistics(weights.sum() * 4.0, weights.sum() * 16.0, weights.sum())
+            self.assertAlmostEqual(float(mean), 4.0)
+            self.assertAlmostEqual(float(sd), 0.0)
+
+        # Recent days weigh more under EWMA
+        self.assertGreater(day_weights(30)[0], day_weights(30)[29])
+        with self.assertRaises(ValueError):
+            day_weights(30, "median")
+
+    def test_days_without_sales_count_as_zero(self):
+        """Ten units on one of ten days is one unit a day on average"""
+        item_id = add_item({"sku": "FCTEST-A", "name": "Forecast Item", "quantity": 5, "price": 1.0})
+        self._sales(item_id, {3: 10})
+        result = run_reorder_job(history_days=10, method="sma", as_of=AS_OF, dry_run=True)
+        self.assertTrue(result["success"])
+        forecast = result["forecasts"][item_id]
+        self.assertAlmostEqual(forecast["daily_demand"], 1.0)
+        self.assertAlmostEqual(forecast["demand_std"], 3.0)
+
+        # Sales outside the window are ignored
+        result = run_reorder_job(history_days=3, method="sma", as_of=AS_OF, dry_run=True)
+        self.assertNotIn(item_id, result["forecasts"])
+
+    def test_job_updates_reorder_points(self):
+        """A real run stores forecasts and updates only items with sales"""
+        sold_id = add_item({"sku": "FCTEST-B", "name": "Selling Item", "quantity": 5, "price": 1.0,
+                            "min_stock_level": 1, "reorder_point": 2})
+        idle_id = add_item({"sku": "FCTEST-C", "name": "Idle Item", "quantity": 5, "price": 1.0,
+                            "min_stock_level": 1, "reorder_point": 2})
+        self._sales(sold_id, {age: 4 for age in range(30)})
+
+        result = run_reorder_job(history_days=30, lead_time_days=5, method="sma", as_of=AS_OF)
+        self.assertTrue(result["success"])
+        self.assertGreaterEqual(result["items_updated"], 1)
+
+        conn = get_connection()
+        rows = dict(((r[0], (r[1], r[2])) for r in conn.execute(
+            "SELECT id, min_stock_level, reorder_point FROM items WHERE id IN (?, ?)", (sold_id, idle_id))))
+        conn.close()
+        self.assertEqual(rows[sold_id], (0, 20))
+        self.assertEqual(rows[idle_id], (1, 2))
+
+        forecast = get_demand_forecast(sold_id)["forecast"]
+        self.assertAlmostEqual(forecast["daily_demand"], 4.0)
+        self.assertEqual(forecast["reorder_point"], 20)
+        self.assertFalse(get_demand_forecast(idle_id)["success"])
+
+
+if __name__ == "__main__":
+    unittest.main()
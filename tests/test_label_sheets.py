@@ -0,0 +1,90 @@
+import unittest
+import sys
+import os
+import tempfile
+from unittest.mock import patch
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PIL import Image, PdfParser
+
+from utils import barcode_utils, label_sheets
+from utils.barcode_utils import assign_item_barcode, clear_image_cache
+from utils.label_sheets import generate_label_sheets
+from models.inventory_model import add_item
+from database.db_setup import setup_database
+from database.db_connection import get_connection
+
+
+class TestLabelSheets(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Set up test database once for all tests"""
+        setup_database()
+
+    def setUp(self):
+        """Create five labelled items and one without a barcode"""
+        conn = get_connection()
+        cur = conn.cursor()
+        try:
+            cur.execute("DELETE FROM inventory_movements WHERE item_id IN (SELECT id FROM items WHERE sku LIKE 'LBLTEST-%')")
+            cur.execute("DELETE FROM items WHERE sku LIKE 'LBLTEST-%'")
+            conn.commit()
+        finally:
+            conn.close()
+
+        self.item_ids = []
+        for c in "ABCDE":
+            item_id = add_item({"sku": f"LBLTEST-{c}", "name": f"Label Item {c}", "quantity": 1, "price": 1.0})
+            assign_item_barcode(item_id, f"LBLTEST-{c}")
+            self.item_ids.append(item_id)
+        self.unlabelled = add_item({"sku": "LBLTEST-Z", "name": "Label Item Z", "quantity": 1, "price": 1.0})
+
+        self.folder = tempfile.TemporaryDirectory()
+        self.dir_patch = patch.object(barcode_utils, "IMAGE_CACHE_DIR", os.path.join(self.folder.name, "cache"))
+        self.dir_patch.start()
+
+    def tearDown(self):
+        clear_image_cache(disk=True)
+        self.dir_patch.stop()
+        self.folder.cleanup()
+
+    def test_png_pages(self):
+        """Labels fill pages in order, one PNG per page; items without barcodes are skipped"""
+        layout = {"page_mm": (100.0, 100.0), "columns": 2, "rows": 1, "margin_mm": (5.0, 5.0)}
+        progress = []
+        with patch.dict(label_sheets.LABEL_LAYOUTS, {"tiny": layout}):
+            result = generate_label_sheets(os.path.join(self.folder.name, "labels.png"),
+                                           self.item_ids + [self.unlabelled], page_size="tiny",
+                                           content="both", max_workers=1,
+                                           progress=lambda done, total: progress.append((done, total)))
+        self.assertTrue(result["success"], result.get("message"))
+        self.assertEqual((result["labels"], result["pages"], result["skipped"]), (5, 3, 1))
+        self.assertEqual([os.path.basename(f) for f in result["files"]],
+                         ["labels_001.png", "labels_002.png", "labels_003.png"])
+        self.assertEqual(progress, [(2, 5), (4, 5), (5, 5)])
+
+        # The last page has only its left label
+        page = Image.open(result["files"][-1]).convert("L")
+        self.assertEqual(page.size, (1181, 1181))
+        self.assertLess(page.crop((0, 0, 590, 1181)).getextrema()[0], 128)
+        self.assertEqual(page.crop((600, 0, 1181, 1181)).getextrema(), (255, 255))
+
+    def test_pdf_with_process_pool(self):
+        """Workers render labels for a multi-page PDF"""
+        layout = {"page_mm": (100.0, 50.0), "columns": 1, "rows": 2, "margin_mm": (5.0, 5.0)}
+        path = os.path.join(self.folder.name, "labels.pdf")
+        with patch.dict(label_sheets.LABEL_LAYOUTS, {"tiny": layout}):
+            result = generate_label_sheets(path, self.item_ids, page_size="tiny", content="qr", max_workers=2)
+        self.assertTrue(result["success"], result.get("message"))
+        self.assertEqual(result["files"], [path])
+        self.assertEqual(result["pages"], 3)
+        pdf = PdfParser.PdfParser(path)
+        self.assertEqual(len(pdf.pages), 3)
+        pdf.close()
+
+        self.assertFalse(generate_label_sheets(path, page_size="A5")["success"])
+        self.assertFalse(generate_label_sheets(os.path.join(self.folder.name, "labels.tif"))["success"])
+
+
+if __name__ == "__main__":
+    unittest.main()
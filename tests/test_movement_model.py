@@ -0,0 +1,93 @@
+import unittest
+import sys
+import os
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.movement_model import (
+    get_stock_as_of, get_stock_as_of_bulk, get_item_movements, take_snapshot
+)
+from models.inventory_model import add_item, update_item, update_item_quantity
+from models.customer_model import create_customer
+from models.sales_order_model import create_sales_order_with_lines, complete_sales_order
+from database.db_setup import setup_database
+from database.db_connection import get_connection
+
+
+class TestMovementModel(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Set up test database once for all tests"""
+        setup_database()
+
+    def setUp(self):
+        """Clear ledger test data before each test"""
+        conn = get_connection()
+        cur = conn.cursor()
+        try:
+            for table in ("inventory_movements", "inventory_snapshots", "sales_order_lines"):
+                cur.execute(f"DELETE FROM {table} WHERE item_id IN (SELECT id FROM items WHERE sku LIKE 'LEDGERTEST-%')")
+            cur.execute("DELETE FROM sales_orders WHERE customer_id IN (SELECT id FROM customers WHERE name = 'Test Ledger Customer')")
+            cur.execute("DELETE FROM customers WHERE name = 'Test Ledger Customer'")
+            cur.execute("DELETE FROM items WHERE sku LIKE 'LEDGERTEST-%'")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _backdate(self, item_id, created_at):
+        """Move every ledger row for an item to a fixed time"""
+        conn = get_connection()
+        conn.execute("UPDATE inventory_movements SET created_at = ? WHERE item_id = ?", (created_at, item_id))
+        conn.commit()
+        conn.close()
+
+    def test_every_quantity_change_is_recorded(self):
+        """Creation, manual edits and sales each append a ledger row"""
+        item_id = add_item({"sku": "LEDGERTEST-A", "name": "Ledger Item", "quantity": 10, "price": 2.0})
+        update_item_quantity(item_id, 15)
+        update_item(item_id, {"quantity": 12, "price": 3.0})
+        update_item(item_id, {"price": 4.0})
+
+        customer_id = create_customer(name="Test Ledger Customer", email="ledger@test.com")["id"]
+        order = create_sales_order_with_lines(customer_id, [{"item_id": item_id, "quantity": 2, "unit_price": 4.0}], created_by=1)
+        complete_sales_order(order["id"])
+
+        movements = get_item_movements(item_id)["movements"]
+        self.assertEqual([m["change"] for m in reversed(movements)], [10, 5, -3, -2])
+        self.assertEqual([m["quantity_after"] for m in reversed(movements)], [10, 15, 12, 10])
+        self.assertEqual(movements[0]["reason"], "SALE")
+        self.assertEqual(movements[0]["reference_id"], order["id"])
+        # stored like the schema's datetime('now') defaults
+        self.assertRegex(movements[0]["created_at"], r"^\d{4}-\d\d-\d\d \d\d:\d\d:\d\d$")
+
+    def test_stock_as_of(self):
+        """Stock as of a moment is the quantity after the last movement before it"""
+        item_id = add_item({"sku": "LEDGERTEST-B", "name": "History Item", "quantity": 5, "price": 1.0})
+        self._backdate(item_id, "2024-01-01 09:00:00")
+        update_item_quantity(item_id, 8)
+
+        self.assertEqual(get_stock_as_of(item_id, "2023-12-31")["quantity"], 0)
+        self.assertEqual(get_stock_as_of(item_id, "2024-01-01")["quantity"], 5)
+        self.assertEqual(get_stock_as_of(item_id, datetime.now() + timedelta(seconds=1))["quantity"], 8)
+        self.assertEqual(get_stock_as_of_bulk([item_id], "2024-06-01")["quantities"], {item_id: 5})
+        self.assertFalse(get_stock_as_of(-1, "2024-01-01")["success"])
+
+    def test_snapshot_covers_items_without_movements(self):
+        """A snapshot answers as-of queries when no movement is recorded"""
+        item_id = add_item({"sku": "LEDGERTEST-C", "name": "Snapshot Item", "quantity": 7, "price": 1.0})
+        conn = get_connection()
+        conn.execute("DELETE FROM inventory_movements WHERE item_id = ?", (item_id,))
+        conn.commit()
+        conn.close()
+
+        take_snapshot("2024-03-01T00:00:00")
+        conn = get_connection()
+        conn.execute("UPDATE items SET quantity = 99 WHERE id = ?", (item_id,))
+        conn.commit()
+        conn.close()
+
+        self.assertEqual(get_stock_as_of(item_id, "2024-03-02")["quantity"], 7)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.profit_model import get_profit_breakdown
+from models.purchase_order_model import create_purchase_order, complete_purchase_order
+from models.sales_order_model import create_sales_order, complete_sales_order
+from models.supplier_model import create_supplier
+from models.customer_model import create_customer
+from models.inventory_model import add_item
+from database.db_setup import setup_database
+from database.db_connection import get_connection
+
+
+class TestProfitModel(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Set up test database once for all tests"""
+        setup_database()
+
+    def setUp(self):
+        """Clear profit test data before each test"""
+        conn = get_connection()
+        cur = conn.cursor()
+        try:
+            items = "(SELECT id FROM items WHERE sku LIKE 'PROFITTEST-%')"
+            for table in ("daily_item_sales", "daily_item_purchases", "sales_order_lines", "purchase_order_lines"):
+                cur.execute(f"DELETE FROM {table} WHERE item_id IN {items}")
+            cur.execute("DELETE FROM sales_orders WHERE item_id IN " + items)
+            cur.execute("DELETE FROM purchase_orders WHERE item_id IN " + items)
+            cur.execute("DELETE FROM customers WHERE name = 'Test Profit Customer'")
+            cur.execute("DELETE FROM suppliers WHERE name = 'Test Profit Supplier'")
+            cur.execute("DELETE FROM items WHERE sku LIKE 'PROFITTEST-%'")
+            conn.commit()
+        finally:
+            conn.close()
+        self.supplier_id = create_supplier(name="Test Profit Supplier")["id"]
+        self.customer_id = create_customer(name="Test Profit Customer", email="profit@test.com")["id"]
+
+    def _buy(self, item_id, quantity, unit_price, completed_at):
+        order = create_purchase_order(self.supplier_id, item_id, quantity, unit_price, created_by=1)
+        complete_purchase_order(order["id"], completed_at=completed_at)
+
+    def _sell(self, item_id, quantity, unit_price, completed_at):
+        order = create_sales_order(self.customer_id, item_id, quantity, unit_price, created_by=1)
+        complete_sales_order(order["id"], completed_at=completed_at)
+
+    def test_cogs_uses_average_purchase_price(self):
+        """COGS is quantity sold at the weighted average purchase price, not total purchases"""
+        item_id = add_item({"sku": "PROFITTEST-A", "name": "Costed Item", "quantity": 0, "price": 10.0})
+        self._buy(item_id, 10, 4.0, "2019-01-05T10:00:00")
+        self._buy(item_id, 10, 6.0, "2019-01-06T10:00:00")
+        self._sell(item_id, 5, 10.0, "2019-01-10T10:00:00")
+
+        result = get_profit_breakdown("2019-01-01", "2019-01-31")
+        self.assertTrue(result["success"])
+        row = next(i for i in result["items"] if i["item_id"] == item_id)
+        self.assertEqual(row["unit_cost"], 5.0)
+        self.assertEqual(row["cogs"], 25.0)
+        self.assertEqual(row["gross_profit"], 25.0)
+        self.assertEqual(row["margin_percent"], 50.0)
+
+        # Purchases after the period end don't change its unit cost
+        self._buy(item_id, 10, 20.0, "2019-02-01T10:00:00")
+        row = next(i for i in get_profit_breakdown("2019-01-01", "2019-01-31")["items"] if i["item_id"] == item_id)
+        self.assertEqual(row["unit_cost"], 5.0)
+
+    def test_items_without_purchases_are_uncosted(self):
+        """Revenue from items never purchased is reported separately instead of as pure profit"""
+        item_id = add_item({"sku": "PROFITTEST-B", "name": "Uncosted Item", "quantity": 10, "price": 8.0})
+        self._sell(item_id, 2, 8.0, "2019-03-03T10:00:00")
+
+        result = get_profit_breakdown("2019-03-03", "2019-03-03")
+        row = next(i for i in result["items"] if i["item_id"] == item_id)
+        self.assertIsNone(row["cogs"])
+        self.assertGreaterEqual(result["uncosted_revenue"], 16.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
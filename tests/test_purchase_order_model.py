@@ -5,10 +5,11 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 
 from models.purchase_order_model import (
     create_purchase_order, get_purchase_order, 
-    update_purchase_order_status, list_all_purchase_orders
+    update_purchase_order_status, list_all_purchase_orders,
+    create_purchase_order_with_lines, complete_purchase_order
 )
 from models.supplier_model import create_supplier
-from models.inventory_model import add_item
+from models.inventory_model import add_item, get_item
 from database.db_setup import setup_database
 from database.db_connection import get_connection
 
@@ -48,6 +49,23 @@ class TestPurchaseOrderModel(unittest.TestCase):
         self.assertTrue(po_result["success"])
         self.assertIn("id", po_result)
     
+    def test_rejects_invalid_lines(self):
+        """Lines need a positive quantity and a non-negative unit price"""
+        supplier_result = create_supplier(name="Test PO Supplier 5")
+        item_id = add_item({"sku": "POTEST-201", "name": "Guarded", "quantity": 0, "price": 5.0})
+        
+        for quantity, unit_price in ((-2, 4.0), (0, 4.0), (3, -1.0), (3, None)):
+            result = create_purchase_order(supplier_result["id"], item_id, quantity, unit_price, created_by=1)
+            self.assertFalse(result["success"])
+            self.assertIn("Line 1", result["message"])
+        conn = get_connection()
+        try:
+            count = conn.execute("SELECT COUNT(*) FROM purchase_orders WHERE supplier_id = ?",
+                                 (supplier_result["id"],)).fetchone()[0]
+        finally:
+            conn.close()
+        self.assertEqual(count, 0)
+    
     def test_get_purchase_order(self):
         """Test retrieving a purchase order"""
         supplier_result = create_supplier(name="Test PO Supplier 2")
@@ -86,6 +104,37 @@ class TestPurchaseOrderModel(unittest.TestCase):
         # If none worked, just check the function returns a result
         self.assertIsInstance(update_result, dict)
 
+    
+    def test_complete_multi_line_purchase_order(self):
+        """Test receiving a multi-line purchase order in one transaction"""
+        supplier_result = create_supplier(name="Test PO Supplier 4")
+        first = add_item({"sku": "POTEST-101", "name": "First", "quantity": 1, "price": 5.0})
+        second = add_item({"sku": "POTEST-102", "name": "Second", "quantity": 0, "price": 5.0})
+        
+        po_result = create_purchase_order_with_lines(
+            supplier_result["id"],
+            [{"item_id": first, "quantity": 10, "unit_price": 4.0},
+             {"item_id": second, "quantity": 5, "unit_price": 3.0},
+             {"item_id": first, "quantity": 2, "unit_price": 4.0}],
+            created_by=1
+        )
+        self.assertTrue(po_result["success"])
+        
+        order = get_purchase_order(po_result["id"])["order"]
+        self.assertEqual(order["line_count"], 3)
+        self.assertEqual(order["total_price"], 63.0)
+        
+        result = complete_purchase_order(po_result["id"])
+        self.assertTrue(result["success"])
+        self.assertEqual(result["line_count"], 3)
+        self.assertEqual({i["item_id"]: i["quantity"] for i in result["items"]}, {first: 12, second: 5})
+        self.assertEqual(get_item(first)["item"]["quantity"], 13)
+        self.assertEqual(get_item(second)["item"]["quantity"], 5)
+        
+        # Completing twice must not apply stock again
+        self.assertFalse(complete_purchase_order(po_result["id"])["success"])
+        self.assertEqual(get_item(first)["item"]["quantity"], 13)
+
 
 if __name__ == '__main__':
     unittest.main()
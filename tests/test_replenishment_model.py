@@ -0,0 +1,121 @@
+import unittest
+import sys
+import os
+import time
+from unittest.mock import patch
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.replenishment_model import order_quantity, plan_replenishment
+from models.purchase_order_model import create_purchase_order, complete_purchase_order, get_purchase_order_lines
+from models.supplier_model import create_supplier
+from models.inventory_model import add_item
+from database.db_setup import setup_database
+from database.db_connection import get_connection
+
+
+class TestReplenishmentModel(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Set up test database once for all tests"""
+        setup_database()
+
+    def setUp(self):
+        """Clear replenishment test data before each test"""
+        self._clear()
+        self.supplier_id = create_supplier(name="Test Replenishment Supplier")["id"]
+        self.item_id = add_item({"sku": "RPTEST-A", "name": "Replenished Item", "quantity": 5,
+                                 "price": 9.0, "min_stock_level": 5, "reorder_point": 20})
+        order = create_purchase_order(self.supplier_id, self.item_id, 10, 4.0, created_by=1)
+        complete_purchase_order(order["id"])
+        self.created_orders = []
+
+    def tearDown(self):
+        """Drop purchase orders the planner created for other items in the shared database"""
+        conn = get_connection()
+        for order_id in self.created_orders:
+            conn.execute("DELETE FROM purchase_order_lines WHERE order_id = ?", (order_id,))
+            conn.execute("DELETE FROM purchase_orders WHERE id = ?", (order_id,))
+        conn.commit()
+        conn.close()
+        self._clear()
+
+    def _clear(self):
+        conn = get_connection()
+        cur = conn.cursor()
+        try:
+            items = "(SELECT id FROM items WHERE sku LIKE 'RPTEST-%')"
+            orders = "(SELECT id FROM purchase_orders WHERE supplier_id IN (SELECT id FROM suppliers WHERE name = 'Test Replenishment Supplier'))"
+            for table in ("daily_item_purchases", "demand_forecasts", "inventory_movements"):
+                cur.execute(f"DELETE FROM {table} WHERE item_id IN {items}")
+            cur.execute(f"DELETE FROM purchase_order_lines WHERE order_id IN {orders}")
+            cur.execute(f"DELETE FROM purchase_orders WHERE id IN {orders}")
+            cur.execute("DELETE FROM suppliers WHERE name = 'Test Replenishment Supplier'")
+            cur.execute("DELETE FROM items WHERE sku LIKE 'RPTEST-%'")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _plan(self, **options):
+        result = plan_replenishment(1, **options)
+        self.assertTrue(result["success"], result.get("message"))
+        self.created_orders.extend(o["id"] for o in result["orders"] if "id" in o)
+        return result
+
+    def _line_for(self, result, item_id):
+        return next((order, line) for order in result["orders"] for line in order["lines"] if line["item_id"] == item_id)
+
+    def test_order_quantity(self):
+        """EOQ and order-up-to sizing never leave the position at the reorder point"""
+        self.assertEqual(order_quantity(15, 20, 1.0, 4.0, "eoq"), 192)
+        self.assertEqual(order_quantity(15, 20, 0, 4.0, "eoq"), 6)
+        self.assertEqual(order_quantity(15, 20, 2.0, 4.0, "up_to"), 65)
+        with self.assertRaises(ValueError):
+            order_quantity(15, 20, 0, 4.0, "lifo")
+
+    def test_dry_run_plans_from_last_purchase(self):
+        """Dry runs use the last supplier and price and create nothing"""
+        never_bought = add_item({"sku": "RPTEST-B", "name": "Unsourced Item", "quantity": 0, "price": 1.0})
+        result = self._plan(dry_run=True)
+        order, line = self._line_for(result, self.item_id)
+        self.assertEqual(order["supplier_id"], self.supplier_id)
+        self.assertEqual(line["unit_price"], 4.0)
+        self.assertEqual(line["quantity"], 6)
+        self.assertNotIn("id", order)
+        self.assertIn(never_bought, result["skipped"])
+
+    def test_creates_pending_orders_once(self):
+        """Created orders count as on order, so a second run doesn't reorder"""
+        conn = get_connection()
+        conn.execute("INSERT INTO demand_forecasts (item_id, daily_demand, demand_std, safety_stock, reorder_point, method, history_days, computed_at) VALUES (?, 2.0, 0, 0, 20, 'sma', 30, '2019-01-01')", (self.item_id,))
+        conn.commit()
+        conn.close()
+
+        result = self._plan(method="up_to")
+        order, line = self._line_for(result, self.item_id)
+        self.assertEqual(line["quantity"], 65)
+        self.assertEqual(get_purchase_order_lines(order["id"])["lines"][0]["item_id"], order["lines"][0]["item_id"])
+
+        again = self._plan()
+        self.assertFalse(any(l["item_id"] == self.item_id for o in again["orders"] for l in o["lines"]))
+
+    def test_lead_time_uses_one_clock(self):
+        """Lead time compares created and completed times in the same time zone"""
+        if not hasattr(time, "tzset"):
+            self.skipTest("time.tzset is not available")
+        self._clear()
+        try:
+            with patch.dict(os.environ, {"TZ": "Etc/GMT-5"}):
+                time.tzset()
+                self.supplier_id = create_supplier(name="Test Replenishment Supplier")["id"]
+                self.item_id = add_item({"sku": "RPTEST-A", "name": "Replenished Item", "quantity": 5,
+                                         "price": 9.0, "reorder_point": 20})
+                order = create_purchase_order(self.supplier_id, self.item_id, 10, 4.0, created_by=1)
+                complete_purchase_order(order["id"])
+                planned, _ = self._line_for(self._plan(dry_run=True), self.item_id)
+        finally:
+            time.tzset()
+        self.assertEqual(planned["lead_time_days"], 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+import unittest
+import sys
+import os
+import tempfile
+from unittest.mock import patch
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from controllers import reports_controller
+from controllers.reports_controller import (
+    generate_inventory_summary, generate_sales_report, clear_report_cache, export_report_batch
+)
+from utils.import_export import EXCEL_AVAILABLE
+from utils.report_export import report_rows
+from models.inventory_model import add_item
+from database.db_setup import setup_database
+from database.db_connection import get_connection
+from views.dashboard_view import report_date_range
+
+ADMIN = {"id": 1, "username": "admin", "role": "ADMIN"}
+
+
+class TestReportsController(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Set up test database once for all tests"""
+        setup_database()
+
+    def setUp(self):
+        """Start each test with an empty report cache and no cache test items"""
+        clear_report_cache()
+        conn = get_connection()
+        cur = conn.cursor()
+        try:
+            cur.execute("DELETE FROM inventory_movements WHERE item_id IN (SELECT id FROM items WHERE sku LIKE 'CACHETEST-%')")
+            cur.execute("DELETE FROM items WHERE sku LIKE 'CACHETEST-%'")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def test_repeated_request_is_served_from_cache(self):
+        """The same report and range is computed once while the data is unchanged"""
+        with patch.object(reports_controller, "get_sales_report",
+                          wraps=reports_controller.get_sales_report) as model:
+            first = generate_sales_report(ADMIN, "2019-01-01", "2019-01-31")
+            second = generate_sales_report(ADMIN, "2019-01-01", "2019-01-31")
+            self.assertEqual(model.call_count, 1)
+            self.assertEqual(first, second)
+
+            # A different range is a different entry
+            generate_sales_report(ADMIN, "2019-02-01", "2019-02-28")
+            self.assertEqual(model.call_count, 2)
+
+        # Callers get copies, so mutating one can't corrupt the cache
+        second["total_orders"] = -1
+        self.assertEqual(generate_sales_report(ADMIN, "2019-01-01", "2019-01-31"), first)
+
+    def test_dashboard_range_reselected_is_cache_hit(self):
+        """Picking the same dashboard range again reuses the cached report"""
+        with patch.object(reports_controller, "get_sales_report",
+                          wraps=reports_controller.get_sales_report) as model:
+            for _ in range(2):
+                start_date, end_date = report_date_range("last_30_days")
+                generate_sales_report(ADMIN, start_date, end_date)
+            self.assertEqual(model.call_count, 1)
+        self.assertIsNone(end_date)
+        self.assertEqual(len(start_date), len("YYYY-MM-DD"))
+
+    def test_cost_labels(self):
+        """Purchase spend is "Total Cost"; only profit analysis reports COGS"""
+        purchases = {"total_orders": 1, "total_quantity_purchased": 2, "total_cost": 10.0,
+                     "average_order_cost": 10.0, "most_purchased_items": []}
+        profit = {"total_revenue": 20.0, "total_cost": 10.0, "gross_profit": 10.0, "profit_margin_percent": 50.0,
+                  "total_sales_orders": 1, "total_purchase_orders": 1}
+        self.assertIn(["Total Cost", "$10.00"], report_rows("purchase_report", purchases))
+        self.assertIn(["Cost of Goods Sold", "$10.00"], report_rows("profit_analysis", profit))
+
+    def test_write_to_report_table_invalidates(self):
+        """Adding an item recomputes the inventory summary"""
+        before = generate_inventory_summary(ADMIN)
+        add_item({"sku": "CACHETEST-A", "name": "Cache Item", "quantity": 3, "price": 1.0})
+        after = generate_inventory_summary(ADMIN)
+        self.assertEqual(after["total_items"], before["total_items"] + 1)
+
+    def test_failed_results_are_not_cached(self):
+        """Errors are recomputed on the next request"""
+        with patch.object(reports_controller, "get_inventory_summary",
+                          return_value={"success": False, "message": "boom"}) as model:
+            generate_inventory_summary(ADMIN)
+            generate_inventory_summary(ADMIN)
+            self.assertEqual(model.call_count, 2)
+
+    def test_batch_export_to_csv(self):
+        """Every requested report lands in its own CSV with a timing"""
+        with tempfile.TemporaryDirectory() as folder:
+            result = export_report_batch(ADMIN, folder, ["inventory_summary", "low_stock", "sales_report"],
+                                         file_format="csv")
+            self.assertTrue(result["success"], result.get("message"))
+            self.assertEqual(sorted(os.listdir(folder)), ["inventory_summary.csv", "low_stock.csv", "sales_report.csv"])
+            self.assertEqual(set(result["timings"]), {"inventory_summary", "low_stock", "sales_report"})
+            self.assertGreater(result["wall_clock"], 0)
+            with open(os.path.join(folder, "inventory_summary.csv"), encoding="utf-8") as f:
+                self.assertEqual(f.readline().strip(), "Metric,Value")
+
+        self.assertFalse(export_report_batch(ADMIN, "unused", ["weekly_gossip"])["success"])
+
+    @unittest.skipUnless(EXCEL_AVAILABLE, "openpyxl not installed")
+    def test_batch_export_to_workbook(self):
+        """An Excel batch has one sheet per report, in the order requested"""
+        import openpyxl
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "month_end.xlsx")
+            result = export_report_batch(ADMIN, path, start_date="2019-01-01", end_date="2019-01-31")
+            self.assertTrue(result["success"], result.get("message"))
+            workbook = openpyxl.load_workbook(path, read_only=True)
+            self.assertEqual(workbook.sheetnames, ["Inventory Summary", "Sales Report", "Purchase Report",
+                                                   "Stock Movement", "Low Stock", "Profit Analysis"])
+            workbook.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
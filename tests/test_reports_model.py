@@ -0,0 +1,144 @@
+import unittest
+import sys
+import os
+import csv
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.reports_model import get_sales_report, get_stock_movement_report, get_profit_analysis, iter_report_detail
+from utils.report_export import export_report_detail
+from models.sales_order_model import create_sales_order, complete_sales_order, update_sales_order_status
+from models.rollup_model import rebuild_rollups
+from models.customer_model import create_customer
+from models.inventory_model import add_item, update_item_quantity
+from database.db_setup import setup_database
+from database.db_connection import get_connection
+
+
+class TestReportsModel(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Set up test database once for all tests"""
+        setup_database()
+
+    def setUp(self):
+        """Clear report test data before each test"""
+        conn = get_connection()
+        cur = conn.cursor()
+        try:
+            cur.execute("DELETE FROM daily_item_sales WHERE item_id IN (SELECT id FROM items WHERE sku LIKE 'RPTTEST-%')")
+            cur.execute("DELETE FROM inventory_movements WHERE item_id IN (SELECT id FROM items WHERE sku LIKE 'RPTTEST-%')")
+            cur.execute("DELETE FROM daily_customer_sales WHERE customer_id IN (SELECT id FROM customers WHERE name = 'Test Report Customer')")
+            cur.execute("DELETE FROM sales_order_lines WHERE item_id IN (SELECT id FROM items WHERE sku LIKE 'RPTTEST-%')")
+            cur.execute("DELETE FROM sales_orders WHERE customer_id IN (SELECT id FROM customers WHERE name = 'Test Report Customer')")
+            cur.execute("DELETE FROM customers WHERE name = 'Test Report Customer'")
+            cur.execute("DELETE FROM items WHERE sku LIKE 'RPTTEST-%'")
+            conn.commit()
+        finally:
+            conn.close()
+        self.customer_id = create_customer(name="Test Report Customer", email="rpt@test.com")["id"]
+        self.item_id = add_item({"sku": "RPTTEST-001", "name": "Report Item", "quantity": 100, "price": 10.0})
+
+    def _completed_order(self, quantity, completed_at):
+        order = create_sales_order(self.customer_id, self.item_id, quantity, 10.0, created_by=1)
+        complete_sales_order(order["id"], completed_at=completed_at)
+        return order["id"]
+
+    def _rollup(self, day):
+        conn = get_connection()
+        row = conn.execute(
+            "SELECT quantity, revenue, order_count FROM daily_item_sales WHERE day = ? AND item_id = ?",
+            (day, self.item_id)
+        ).fetchone()
+        conn.close()
+        return tuple(row) if row else None
+
+    def test_sales_report_filters_on_completed_at(self):
+        """Only orders completed inside the range are counted; a bare end date covers the whole day"""
+        self._completed_order(2, "2021-03-01T10:00:00")
+        self._completed_order(3, "2021-03-15T18:30:00")
+        self._completed_order(4, "2021-04-02T09:00:00")
+
+        report = get_sales_report("2021-03-01", "2021-03-15")
+        self.assertEqual(report["total_orders"], 2)
+        self.assertEqual(report["total_quantity_sold"], 5)
+        self.assertEqual(report["total_revenue"], 50.0)
+
+        report = get_sales_report("2021-03-02T00:00:00", "2021-04-30T00:00:00")
+        self.assertEqual(report["total_orders"], 2)
+
+    def test_stock_movement_report_date_range(self):
+        """Stock movement report reads the ledger for the date range, adjustments included"""
+        self._completed_order(6, "2021-05-10T12:00:00")
+
+        movements = get_stock_movement_report("2021-05-01", "2021-05-31")
+        row = next(m for m in movements if m["id"] == self.item_id)
+        self.assertEqual((row["total_sold"], row["total_adjusted"], row["net_change"]), (6, 0, -6))
+        self.assertFalse(any(m["id"] == self.item_id for m in get_stock_movement_report("2021-06-01", "2021-06-30")))
+
+        update_item_quantity(self.item_id, 90)
+        row = next(m for m in get_stock_movement_report() if m["id"] == self.item_id)
+        self.assertEqual((row["total_purchased"], row["total_sold"], row["total_adjusted"]), (0, 6, 100 - 4))
+        self.assertEqual(row["net_change"], 90)
+
+    def test_rollups_follow_order_status(self):
+        """Completing adds to the daily rollup; moving the order out of COMPLETED takes it back out"""
+        order_id = self._completed_order(3, "2021-07-04T15:00:00")
+        self.assertEqual(self._rollup("2021-07-04"), (3, 30.0, 1))
+
+        update_sales_order_status(order_id, "CANCELLED")
+        self.assertEqual(self._rollup("2021-07-04"), (0, 0.0, 0))
+        self.assertEqual(get_sales_report("2021-07-01", "2021-07-31")["total_orders"], 0)
+
+        update_sales_order_status(order_id, "COMPLETED", completed_at="2021-07-05T08:00:00")
+        self.assertEqual(self._rollup("2021-07-05"), (3, 30.0, 1))
+
+        rebuild_rollups()
+        self.assertIsNone(self._rollup("2021-07-04"))
+        self.assertEqual(self._rollup("2021-07-05"), (3, 30.0, 1))
+
+    def test_partial_day_ranges(self):
+        """Ranges that start or end mid-day count only orders inside the exact window"""
+        self._completed_order(1, "2021-08-01T06:00:00")
+        self._completed_order(2, "2021-08-01T20:00:00")
+        self._completed_order(4, "2021-08-02T12:00:00")
+        self._completed_order(8, "2021-08-03T09:00:00")
+
+        self.assertEqual(get_sales_report("2021-08-01T12:00:00", "2021-08-03T08:00:00")["total_quantity_sold"], 6)
+        self.assertEqual(get_sales_report("2021-08-01T05:00:00", "2021-08-01T07:00:00")["total_quantity_sold"], 1)
+        self.assertEqual(get_sales_report("2021-08-02", "2021-08-03T09:00:00")["total_quantity_sold"], 12)
+        report = get_sales_report("2021-08-01T19:00:00", "2021-08-02")
+        self.assertEqual(report["total_orders"], 2)
+        self.assertEqual(report["top_selling_items"][0]["total_sold"], 6)
+        self.assertEqual(get_profit_analysis("2021-08-01", "2021-08-03")["total_revenue"], 150.0)
+
+    def test_detail_export_is_uncapped(self):
+        """Full-detail exports stream every line in range, in chunks, with progress"""
+        for day in range(1, 13):
+            self._completed_order(1, f"2021-09-{day:02d}T10:00:00")
+
+        chunks = list(iter_report_detail("sales_report", "2021-09-01", "2021-09-30", chunk_size=5))
+        self.assertEqual([len(c) for c in chunks], [5, 5, 2])
+        self.assertEqual(chunks[0][0][2:5], ("Test Report Customer", "RPTTEST-001", "Report Item"))
+
+        progress = []
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "sales.csv")
+            result = export_report_detail("sales_report", path, "2021-09-01", "2021-09-30",
+                                          progress=lambda done, total: progress.append((done, total)), chunk_size=5)
+            self.assertTrue(result["success"], result.get("message"))
+            with open(path, newline="", encoding="utf-8") as f:
+                rows = list(csv.reader(f))
+        self.assertEqual(rows[0][0], "Order Number")
+        self.assertEqual(len(rows), 13)
+        self.assertEqual(progress, [(5, 12), (10, 12), (12, 12)])
+
+        # Stock movement detail lists every ledger row, not just the 50 most active items
+        with tempfile.TemporaryDirectory() as folder:
+            result = export_report_detail("stock_movement", os.path.join(folder, "movement.csv"),
+                                          "2021-09-01", "2021-09-30")
+        self.assertEqual(result["rows"], 12)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,12 +5,14 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 
 from models.sales_order_model import (
     create_sales_order, get_sales_order,
-    update_sales_order_status, list_all_sales_orders
+    update_sales_order_status, list_all_sales_orders,
+    create_sales_order_with_lines, complete_sales_order
 )
 from models.customer_model import create_customer
-from models.inventory_model import add_item
-from database.db_setup import setup_database
+from models.inventory_model import add_item, get_item
+from database.db_setup import setup_database, _migrate_order_lines, BASE_PURCHASE_ORDER_LINES_SQL, BASE_SALES_ORDER_LINES_SQL
 from database.db_connection import get_connection
+import sqlite3
 
 
 class TestSalesOrderModel(unittest.TestCase):
@@ -86,6 +88,126 @@ class TestSalesOrderModel(unittest.TestCase):
         # If none worked, just check the function returns a result
         self.assertIsInstance(update_result, dict)
 
+    
+    def test_create_multi_line_order(self):
+        """Test creating one order with several lines"""
+        customer_result = create_customer(name="Test SO Customer 4", email="so4@test.com")
+        item_ids = [add_item({"sku": f"SOTEST-1{i}", "name": f"Line Item {i}", "quantity": 50, "price": 10.0})
+                    for i in range(3)]
+        
+        so_result = create_sales_order_with_lines(
+            customer_result["id"],
+            [{"item_id": item_id, "quantity": 2, "unit_price": 10.0} for item_id in item_ids],
+            created_by=1
+        )
+        self.assertTrue(so_result["success"])
+        self.assertEqual(so_result["line_count"], 3)
+        
+        order = get_sales_order(so_result["id"])["order"]
+        self.assertEqual(order["quantity"], 6)
+        self.assertEqual(order["total_price"], 60.0)
+        self.assertIsNone(order["item_id"])
+        self.assertEqual([line["item_id"] for line in order["lines"]], item_ids)
+    
+    def test_complete_multi_line_order(self):
+        """Test completing applies every line to inventory at once"""
+        customer_result = create_customer(name="Test SO Customer 5", email="so5@test.com")
+        first = add_item({"sku": "SOTEST-201", "name": "First", "quantity": 10, "price": 5.0})
+        second = add_item({"sku": "SOTEST-202", "name": "Second", "quantity": 4, "price": 5.0})
+        
+        so_result = create_sales_order_with_lines(
+            customer_result["id"],
+            [{"item_id": first, "quantity": 3, "unit_price": 5.0},
+             {"item_id": second, "quantity": 4, "unit_price": 5.0}],
+            created_by=1
+        )
+        result = complete_sales_order(so_result["id"])
+        self.assertTrue(result["success"])
+        self.assertEqual((len(result["items"]), result["line_count"]), (2, 2))
+        self.assertEqual(get_item(first)["item"]["quantity"], 7)
+        self.assertEqual(get_item(second)["item"]["quantity"], 0)
+        self.assertEqual(get_sales_order(so_result["id"])["order"]["status"], "COMPLETED")
+    
+    def test_rejects_invalid_lines(self):
+        """Non-positive quantities and negative or missing prices never reach the reservation"""
+        customer_result = create_customer(name="Test SO Customer 7", email="so7@test.com")
+        item_id = add_item({"sku": "SOTEST-401", "name": "Guarded", "quantity": 10, "price": 5.0})
+        bad_lines = ({"item_id": item_id, "quantity": -3, "unit_price": 5.0},
+                     {"item_id": item_id, "quantity": 0, "unit_price": 5.0},
+                     {"item_id": item_id, "quantity": 1, "unit_price": -1.0},
+                     {"item_id": item_id, "quantity": 1})
+        for bad in bad_lines:
+            result = create_sales_order_with_lines(
+                customer_result["id"], [{"item_id": item_id, "quantity": 2, "unit_price": 5.0}, bad], created_by=1
+            )
+            self.assertFalse(result["success"])
+            self.assertIn("Line 2", result["message"])
+        conn = get_connection()
+        try:
+            reserved = conn.execute("SELECT reserved_quantity FROM items WHERE id = ?", (item_id,)).fetchone()[0]
+        finally:
+            conn.close()
+        self.assertEqual(reserved, 0)
+    
+    def test_complete_rolls_back_on_shortage(self):
+        """Test that a short line leaves every item and the order untouched"""
+        customer_result = create_customer(name="Test SO Customer 6", email="so6@test.com")
+        first = add_item({"sku": "SOTEST-301", "name": "Plenty", "quantity": 10, "price": 5.0})
+        second = add_item({"sku": "SOTEST-302", "name": "Scarce", "quantity": 2, "price": 5.0})
+        
+        so_result = create_sales_order_with_lines(
+            customer_result["id"],
+            [{"item_id": first, "quantity": 3, "unit_price": 5.0},
+             {"item_id": second, "quantity": 2, "unit_price": 5.0}],
+            created_by=1
+        )
+        # Stock written off after the order was placed
+        conn = get_connection()
+        conn.execute("UPDATE items SET quantity = 1 WHERE id = ?", (second,))
+        conn.commit()
+        conn.close()
+        result = complete_sales_order(so_result["id"])
+        self.assertFalse(result["success"])
+        self.assertEqual(get_item(first)["item"]["quantity"], 10)
+        self.assertEqual(get_item(second)["item"]["quantity"], 1)
+        self.assertEqual(get_sales_order(so_result["id"])["order"]["status"], "PENDING")
+    
+    def test_migrate_single_item_orders_to_lines(self):
+        """Test that legacy single-item rows are converted to one line each"""
+        conn = sqlite3.connect(":memory:")
+        conn.execute("""
+            CREATE TABLE sales_orders (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, order_number TEXT UNIQUE NOT NULL,
+                customer_id INTEGER NOT NULL, item_id INTEGER NOT NULL, quantity INTEGER NOT NULL,
+                unit_price REAL NOT NULL, total_price REAL NOT NULL, status TEXT NOT NULL DEFAULT 'PENDING',
+                notes TEXT, created_by INTEGER NOT NULL, created_at TEXT, completed_at TEXT
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE purchase_orders (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, order_number TEXT UNIQUE NOT NULL,
+                supplier_id INTEGER NOT NULL, item_id INTEGER NOT NULL, quantity INTEGER NOT NULL,
+                unit_price REAL NOT NULL, total_price REAL NOT NULL, status TEXT NOT NULL DEFAULT 'PENDING',
+                notes TEXT, created_by INTEGER NOT NULL, created_at TEXT, completed_at TEXT
+            )
+        """)
+        conn.execute(BASE_PURCHASE_ORDER_LINES_SQL)
+        conn.execute(BASE_SALES_ORDER_LINES_SQL)
+        conn.execute("""
+            INSERT INTO sales_orders (order_number, customer_id, item_id, quantity, unit_price, total_price, created_by)
+            VALUES ('SO-OLD-1', 1, 7, 3, 2.5, 7.5, 1)
+        """)
+        conn.commit()
+        
+        _migrate_order_lines(conn)
+        _migrate_order_lines(conn)  # idempotent
+        
+        lines = conn.execute("SELECT order_id, line_no, item_id, quantity, total_price FROM sales_order_lines").fetchall()
+        self.assertEqual(lines, [(1, 1, 7, 3, 7.5)])
+        notnull = {row[1]: row[3] for row in conn.execute("PRAGMA table_info(sales_orders)")}
+        self.assertEqual(notnull["item_id"], 0)
+        conn.close()
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models import scan_model
+from models.scan_model import ScanSession, lookup_barcode, load_barcode_index
+from models.inventory_model import add_item, update_item_quantity, delete_item, get_item
+from utils.barcode_utils import assign_item_barcode, update_item_barcode
+from database.db_setup import setup_database
+from database.db_connection import get_connection
+
+
+class TestScanModel(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Set up test database once for all tests"""
+        setup_database()
+
+    def setUp(self):
+        """Create two barcoded scan test items"""
+        conn = get_connection()
+        cur = conn.cursor()
+        try:
+            cur.execute("DELETE FROM inventory_movements WHERE item_id IN (SELECT id FROM items WHERE sku LIKE 'SCANTEST-%')")
+            cur.execute("DELETE FROM items WHERE sku LIKE 'SCANTEST-%'")
+            conn.commit()
+        finally:
+            conn.close()
+
+        self.apple = add_item({"sku": "SCANTEST-A", "name": "Scan Apple", "quantity": 10, "price": 1.5})
+        self.pear = add_item({"sku": "SCANTEST-B", "name": "Scan Pear", "quantity": 2, "price": 2.0})
+        self.apple_code = assign_item_barcode(self.apple, "SCANTEST-A")
+        self.pear_code = assign_item_barcode(self.pear, "SCANTEST-B")
+
+    def _quantity(self, item_id):
+        return get_item(item_id)["item"]["quantity"]
+
+    def test_index_follows_item_writes(self):
+        """Lookups see new, changed and deleted barcodes; stock changes don't reload the index"""
+        load_barcode_index()
+        item = lookup_barcode(self.apple_code[:12])
+        self.assertEqual((item["id"], item["sku"], item["price"]), (self.apple, "SCANTEST-A", 1.5))
+
+        version = scan_model._index_version
+        update_item_quantity(self.apple, 50)
+        lookup_barcode(self.apple_code)
+        self.assertEqual(scan_model._index_version, version)
+
+        update_item_barcode(self.apple, "2000000000008")
+        self.assertIsNone(lookup_barcode(self.apple_code))
+        self.assertEqual(lookup_barcode("2000000000008")["id"], self.apple)
+
+        delete_item(self.pear)
+        self.assertIsNone(lookup_barcode(self.pear_code))
+
+    def test_receive_session_applies_once(self):
+        """Scans accumulate in memory and land in one transaction with ledger rows"""
+        session = ScanSession("receive")
+        for _ in range(3):
+            session.scan(self.apple_code)
+        session.scan(self.pear_code, quantity=5)
+        session.scan(self.pear_code, quantity=-1)
+        self.assertFalse(session.scan("0000000000000")["success"])
+        self.assertEqual(self._quantity(self.apple), 10)
+        self.assertEqual([(row["sku"], row["quantity"]) for row in session.summary()],
+                         [("SCANTEST-A", 3), ("SCANTEST-B", 4)])
+
+        result = session.commit()
+        self.assertTrue(result["success"], result.get("message"))
+        self.assertEqual((result["items"], result["units"]), (2, 7))
+        self.assertEqual(self._quantity(self.apple), 13)
+        self.assertEqual(self._quantity(self.pear), 6)
+        self.assertEqual(session.summary(), [])
+
+        conn = get_connection()
+        try:
+            row = conn.execute("SELECT change, reason FROM inventory_movements WHERE item_id = ? ORDER BY id DESC",
+                               (self.apple,)).fetchone()
+        finally:
+            conn.close()
+        self.assertEqual((row[0], row[1]), (3, "SCAN"))
+
+    def test_remove_session_is_all_or_nothing(self):
+        """A shortfall on one item leaves every item untouched"""
+        session = ScanSession("remove")
+        session.scan(self.apple_code, quantity=4)
+        session.scan(self.pear_code, quantity=3)
+        result = session.commit()
+        self.assertFalse(result["success"])
+        self.assertIn("Scan Pear", result["message"])
+        self.assertEqual(self._quantity(self.apple), 10)
+
+        session.scan(self.pear_code, quantity=-1)
+        self.assertTrue(session.commit()["success"])
+        self.assertEqual((self._quantity(self.apple), self._quantity(self.pear)), (6, 0))
+        self.assertRaises(ValueError, ScanSession, "borrow")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+import sys
+import os
+import threading
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.sequence_model import allocate_block, next_value, next_order_number
+from models.sales_order_model import create_sales_order
+from models.customer_model import create_customer
+from models.inventory_model import add_item
+from database.db_setup import setup_database
+from database.db_connection import get_connection
+
+
+class TestSequenceModel(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Set up test database once for all tests"""
+        setup_database()
+    
+    def setUp(self):
+        """Clear test data before each test"""
+        conn = get_connection()
+        cur = conn.cursor()
+        try:
+            cur.execute("DELETE FROM sequences WHERE name LIKE 'test:%'")
+            cur.execute("DELETE FROM sales_orders WHERE order_number LIKE 'SO-%'")
+            cur.execute("DELETE FROM customers WHERE name LIKE 'Test Seq Customer%'")
+            cur.execute("DELETE FROM items WHERE sku LIKE 'SEQTEST-%'")
+            conn.commit()
+        finally:
+            conn.close()
+    
+    def test_allocate_block_is_contiguous(self):
+        """Test that consecutive blocks don't overlap"""
+        first = allocate_block("test:blocks", 10)
+        second = allocate_block("test:blocks", 10)
+        self.assertEqual(first, (1, 10))
+        self.assertEqual(second, (11, 20))
+    
+    def test_concurrent_block_allocation(self):
+        """Stress test: many threads allocating blocks directly, as separate processes would"""
+        blocks = []
+        lock = threading.Lock()
+        
+        def worker():
+            for _ in range(20):
+                block = allocate_block("test:stress_blocks", 5)
+                with lock:
+                    blocks.append(block)
+        
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        
+        values = [v for first, last in blocks for v in range(first, last + 1)]
+        self.assertEqual(len(values), 8 * 20 * 5)
+        self.assertEqual(len(set(values)), len(values))
+    
+    def test_concurrent_next_value(self):
+        """Stress test: many threads drawing from the shared in-process block"""
+        values = []
+        lock = threading.Lock()
+        
+        def worker():
+            local = [next_value("test:stress_values", block_size=50) for _ in range(500)]
+            with lock:
+                values.extend(local)
+        
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        
+        self.assertEqual(len(values), 4000)
+        self.assertEqual(len(set(values)), 4000)
+    
+    def test_order_numbers_unique_within_same_second(self):
+        """Test that orders created back to back get distinct order numbers"""
+        customer = create_customer(name="Test Seq Customer 1")
+        item_id = add_item({"sku": "SEQTEST-001", "name": "Seq Item", "quantity": 1000, "price": 1.0})
+        
+        results = [create_sales_order(customer["id"], item_id, 1, 1.0, created_by=1) for _ in range(200)]
+        self.assertTrue(all(r["success"] for r in results))
+        self.assertEqual(len({r["order_number"] for r in results}), 200)
+    
+    def test_order_number_format(self):
+        """Test order numbers keep their prefix"""
+        self.assertTrue(next_order_number("PO").startswith("PO-"))
+
+
+if __name__ == '__main__':
+    unittest.main()
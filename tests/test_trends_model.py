@@ -0,0 +1,84 @@
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.analytics_model import NUMPY_AVAILABLE
+from models.trends_model import get_trend_series
+from models.sales_order_model import create_sales_order, complete_sales_order
+from models.customer_model import create_customer
+from models.inventory_model import add_item
+from database.db_setup import setup_database
+from database.db_connection import get_connection
+
+
+@unittest.skipUnless(NUMPY_AVAILABLE, "numpy not installed")
+class TestTrendsModel(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Set up test database once for all tests"""
+        setup_database()
+
+    def setUp(self):
+        """Create a trend test item with three sales in March 2018"""
+        conn = get_connection()
+        cur = conn.cursor()
+        try:
+            items = "(SELECT id FROM items WHERE sku LIKE 'TRENDTEST-%')"
+            customers = "(SELECT id FROM customers WHERE name = 'Test Trend Customer')"
+            for table in ("daily_item_sales", "sales_order_lines", "inventory_movements"):
+                cur.execute(f"DELETE FROM {table} WHERE item_id IN {items}")
+            cur.execute(f"DELETE FROM daily_customer_sales WHERE customer_id IN {customers}")
+            cur.execute(f"DELETE FROM sales_orders WHERE customer_id IN {customers}")
+            cur.execute("DELETE FROM customers WHERE name = 'Test Trend Customer'")
+            cur.execute("DELETE FROM items WHERE sku LIKE 'TRENDTEST-%'")
+            conn.commit()
+        finally:
+            conn.close()
+
+        self.item_id = add_item({"sku": "TRENDTEST-A", "name": "Trend Item", "quantity": 100, "price": 5.0})
+        self.customer_id = create_customer(name="Test Trend Customer", email="trend@test.com")["id"]
+        for quantity, completed_at in ((2, "2018-03-05T10:15:00"), (3, "2018-03-05T14:00:00"), (1, "2018-03-20T09:00:00")):
+            order = create_sales_order(self.customer_id, self.item_id, quantity, 5.0, created_by=1)
+            complete_sales_order(order["id"], completed_at=completed_at)
+
+    def _series(self, bucket, start, end, **filters):
+        result = get_trend_series("sales", bucket, start, end, **filters)
+        self.assertTrue(result["success"], result.get("message"))
+        return result, dict(zip(result["labels"], result["quantity"]))
+
+    def test_daily_series_is_gap_filled(self):
+        """Every day in range has a bucket, zero when nothing sold"""
+        result, by_day = self._series("day", "2018-03-01", "2018-03-31", item_id=self.item_id)
+        self.assertEqual(len(result["labels"]), 31)
+        self.assertEqual(by_day["2018-03-05"], 5)
+        self.assertEqual(by_day["2018-03-20"], 1)
+        self.assertEqual(by_day["2018-03-06"], 0)
+        self.assertEqual(result["amount"].sum(), 30.0)
+        self.assertEqual(result["order_count"][result["labels"].index("2018-03-05")], 2)
+
+    def test_week_month_and_hour_buckets(self):
+        """Weeks start on Monday, months and hours are labelled by their start"""
+        result, by_week = self._series("week", "2018-03-01", "2018-03-31", item_id=self.item_id)
+        self.assertEqual(result["labels"][0], "2018-02-26")
+        self.assertEqual(by_week["2018-03-05"], 5)
+        self.assertEqual(by_week["2018-03-19"], 1)
+
+        result, by_month = self._series("month", "2018-01-01", "2018-06-30", item_id=self.item_id)
+        self.assertEqual(result["labels"], ["2018-01", "2018-02", "2018-03", "2018-04", "2018-05", "2018-06"])
+        self.assertEqual(by_month["2018-03"], 6)
+
+        result, by_hour = self._series("hour", "2018-03-05", "2018-03-05", item_id=self.item_id)
+        self.assertEqual(len(result["labels"]), 24)
+        self.assertEqual(by_hour["2018-03-05T10"], 2)
+        self.assertEqual(by_hour["2018-03-05T14"], 3)
+
+    def test_party_filter(self):
+        """A customer's series counts only that customer's orders"""
+        result, by_day = self._series("day", "2018-03-01", "2018-03-31", party_id=self.customer_id)
+        self.assertEqual(result["quantity"].sum(), 6)
+        self.assertFalse(get_trend_series("sales", "fortnight")["success"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,9 +2,12 @@ import unittest
 import sys
 import os
 import time
+from unittest.mock import patch
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from models.user_model import create_user, authenticate
+from models import user_model
+from models.user_model import create_user, authenticate, generate_username
+from utils.encryption import Pbkdf2Hasher, needs_rehash
 from database.db_setup import setup_database
 from database.db_connection import get_connection
 
@@ -55,6 +58,51 @@ class TestUserModel(unittest.TestCase):
         """Test authentication with non-existent username"""
         auth_result = authenticate("nonexistent_user_xyz", "password123")
         self.assertIsNone(auth_result)
+    
+    def test_authenticate_upgrades_outdated_hash(self):
+        """A login with an outdated hash re-hashes the password with current settings"""
+        result = create_user(password="password123", role="STAFF", first_name="Old", last_name="Hash", email="oldhash@testuser.com")
+        legacy = Pbkdf2Hasher(1000).encode("password123", b"0123456789abcdef")
+        conn = get_connection()
+        try:
+            conn.execute("UPDATE users SET password = ? WHERE id = ?", (legacy, result["id"]))
+            conn.commit()
+            
+            self.assertIsNone(authenticate(result["username"], "wrongpassword"))
+            stored = conn.execute("SELECT password FROM users WHERE id = ?", (result["id"],)).fetchone()[0]
+            self.assertEqual(stored, legacy)
+            
+            self.assertIsNotNone(authenticate(result["username"], "password123"))
+            stored = conn.execute("SELECT password FROM users WHERE id = ?", (result["id"],)).fetchone()[0]
+            self.assertNotEqual(stored, legacy)
+            self.assertFalse(needs_rehash(stored))
+            self.assertIsNotNone(authenticate(result["username"], "password123"))
+        finally:
+            conn.close()
+
+    
+    def test_generate_username_in_crowded_prefix(self):
+        """The last free suffix of a prefix is found with a single query"""
+        conn = get_connection()
+        try:
+            conn.executemany("INSERT INTO users (username, email, password, role) VALUES (?, ?, 'x', 'STAFF')",
+                             [(f"qz{n:04d}", f"qz{n}@testuser.com") for n in range(10000) if n != 4321])
+            conn.commit()
+        finally:
+            conn.close()
+        
+        statements = []
+        def traced_connection():
+            traced = get_connection()
+            traced.set_trace_callback(statements.append)
+            return traced
+        
+        with patch.object(user_model, "get_connection", traced_connection):
+            self.assertEqual(generate_username("Quinn", "Zhang"), "qz4321")
+        self.assertEqual(len(statements), 1)
+        
+        create_user(password="password123", username="qz4321", email="qzlast@testuser.com")
+        self.assertRaises(RuntimeError, generate_username, "Quinn", "Zhang")
 
 
 if __name__ == '__main__':
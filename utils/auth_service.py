@@ -0,0 +1,170 @@
+"""
+Login service
+
+Password verification (scrypt or PBKDF2 per PASSWORD_HASHER, at the
+cost configured in utils.encryption) runs on a small pool of worker
+threads rather than the caller's thread. hashlib releases the GIL
+while hashing, so the pool both keeps callers responsive and caps how many
+cores a burst of logins can take; beyond AUTH_QUEUE_LIMIT waiting logins,
+new ones are turned away instead of queueing without bound.
+
+Each identifier gets MAX_LOGIN_ATTEMPTS tries per ATTEMPT_WINDOW_SECONDS;
+a successful login resets its count. Attempts are counted when submitted,
+so parallel guesses can't slip in ahead of the failures being recorded.
+
+A successful login issues a session token, kept in memory for
+SESSION_SECONDS, so later requests present the token instead of the
+password. Tokens are dropped when the user is deleted or their role or
+active flag changes.
+"""
+import secrets
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from models.user_model import authenticate
+
+AUTH_WORKERS = 2
+AUTH_QUEUE_LIMIT = 32
+MAX_LOGIN_ATTEMPTS = 5
+ATTEMPT_WINDOW_SECONDS = 300
+MAX_TRACKED_IDENTIFIERS = 10000
+SESSION_SECONDS = 30 * 60
+MAX_SESSIONS = 1000
+
+_pool = None
+_pool_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(AUTH_WORKERS + AUTH_QUEUE_LIMIT)
+
+_attempts = {}  # identifier -> deque of attempt times (monotonic)
+_attempts_lock = threading.Lock()
+
+_sessions = OrderedDict()  # token -> (expires_at, user), oldest first
+_sessions_lock = threading.Lock()
+
+
+def _executor():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=AUTH_WORKERS, thread_name_prefix="auth-worker")
+        return _pool
+
+
+def _attempt_key(identifier):
+    return (identifier or "").strip().lower()
+
+
+def _take_attempt(key):
+    """Count an attempt for key, or return False if it has used up its window"""
+    now = time.monotonic()
+    with _attempts_lock:
+        attempts = _attempts.setdefault(key, deque())
+        while attempts and attempts[0] <= now - ATTEMPT_WINDOW_SECONDS:
+            attempts.popleft()
+        if len(attempts) >= MAX_LOGIN_ATTEMPTS:
+            return False
+        attempts.append(now)
+        # forget identifiers whose attempts have all expired
+        if len(_attempts) > MAX_TRACKED_IDENTIFIERS:
+            for stale in [k for k, times in _attempts.items() if times[-1] <= now - ATTEMPT_WINDOW_SECONDS]:
+                del _attempts[stale]
+        return True
+
+
+def _issue_session(user):
+    token = secrets.token_urlsafe(32)
+    with _sessions_lock:
+        _sessions[token] = (time.monotonic() + SESSION_SECONDS, user)
+        while len(_sessions) > MAX_SESSIONS:
+            _sessions.popitem(last=False)
+    return token
+
+
+def _verify(key, identifier, password):
+    try:
+        user = authenticate(identifier, password)
+    finally:
+        _slots.release()
+    if user is None:
+        return {"success": False, "message": "Invalid credentials or account not found"}
+    with _attempts_lock:
+        _attempts.pop(key, None)
+    return {"success": True, "user": user, "token": _issue_session(user)}
+
+
+def _resolved(result):
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+def submit_login(identifier, password):
+    """
+    Queue a password check on the auth pool
+
+    Returns:
+        Future: resolves to {"success": True, "user": dict, "token": str}
+            or {"success": False, "message": str}
+    """
+    key = _attempt_key(identifier)
+    if not _take_attempt(key):
+        return _resolved({"success": False,
+                          "message": "Too many login attempts. Please wait a few minutes and try again."})
+    if not _slots.acquire(blocking=False):
+        return _resolved({"success": False, "message": "Login service is busy. Please try again."})
+    try:
+        return _executor().submit(_verify, key, identifier, password)
+    except Exception:
+        _slots.release()
+        raise
+
+
+def login_with_password(identifier, password, timeout=None):
+    """Verify a password on the auth pool and wait for the result (see submit_login)"""
+    return submit_login(identifier, password).result(timeout)
+
+
+def validate_session(token):
+    """
+    The user a session token was issued to, or None if it is unknown or expired
+    """
+    if not token:
+        return None
+    with _sessions_lock:
+        entry = _sessions.get(token)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del _sessions[token]
+            return None
+        return dict(entry[1])
+
+
+def end_session(token):
+    """Log a session out; returns True if it existed"""
+    with _sessions_lock:
+        return _sessions.pop(token, None) is not None
+
+
+def revoke_user_sessions(user_id):
+    """Drop every session of a user; returns how many there were"""
+    with _sessions_lock:
+        tokens = [token for token, (_, user) in _sessions.items() if user["id"] == user_id]
+        for token in tokens:
+            del _sessions[token]
+    return len(tokens)
+
+
+def shutdown_auth_service():
+    """Wait for queued logins, stop the pool and forget sessions and attempt counts"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True)
+    with _sessions_lock:
+        _sessions.clear()
+    with _attempts_lock:
+        _attempts.clear()
@@ -1,8 +1,16 @@
 """
 Barcode and QR Code Utilities
+
+Rendered images are cached at two levels: an in-memory LRU of PIL images
+and a content-addressed PNG cache on disk, both keyed by a digest of the
+image kind, its data and the render options, and both evicted by size.
 """
 import os
 import io
+import hashlib
+import shutil
+import threading
+from collections import OrderedDict
 import barcode
 from barcode.writer import ImageWriter
 import qrcode
@@ -15,43 +23,202 @@ except ImportError:
     HAS_IMAGETK = False
     print("Warning: ImageTk not available. GUI barcode display will be limited.")
 
+from config import BASE_DIR
 from database.db_connection import get_connection
 
+# Bump when render options change so stale cached images are never served
+IMAGE_RENDER_VERSION = 1
+IMAGE_CACHE_MEMORY_BYTES = 64 * 1024 * 1024
+IMAGE_CACHE_DIR = os.path.join(BASE_DIR, "image_cache")  # None disables the disk cache
+IMAGE_CACHE_DISK_BYTES = 100 * 1024 * 1024
+
+_image_cache = OrderedDict()
+_image_cache_bytes = 0
+_disk_cache_bytes = None  # scanned on first write
+_image_cache_lock = threading.Lock()
+
+
+# GS1 restricted-circulation prefix: codes for in-store use that never clash with retail GTINs
+BARCODE_PREFIX = "20"
 
-def generate_barcode_number(item_id, sku):
+
+def ean13_check_digit(digits):
     """
-    Generate a unique barcode number from item ID and SKU
-    Uses EAN13 format (13 digits)
+    Compute the EAN-13 check digit for a 12-digit string
     
     Args:
-        item_id (int): Item database ID
-        sku (str): Item SKU
+        digits (str): First 12 digits
         
     Returns:
-        str: 12-digit barcode number (13th digit is checksum, auto-added by library)
+        str: Check digit
     """
-    # Use item_id padded to 6 digits + first 6 chars of SKU hash
-    sku_hash = str(abs(hash(sku)))[:6]
-    item_part = str(item_id).zfill(6)
-    barcode_num = item_part + sku_hash
-    return barcode_num[:12]  # EAN13 needs 12 digits (13th is checksum)
+    total = sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(digits))
+    return str((10 - total % 10) % 10)
 
 
-def generate_barcode_image(barcode_number, item_name=""):
+def normalize_barcode(barcode_number):
     """
-    Generate EAN13 barcode image
+    Normalize a scanned or typed barcode for storage and lookup
+    
+    Codes are stored as the 13 digits a scanner reads. A 12-digit UPC-A
+    (valid check digit) becomes its EAN-13 form with a leading "0"; other
+    12-digit codes, and any starting with our BARCODE_PREFIX, are EAN-13
+    bodies missing the check digit, which is appended. Anything else is
+    kept as given, and blank input gives "".
+    """
+    code = "" if barcode_number is None else str(barcode_number).strip()
+    if len(code) == 12 and code.isdigit():
+        if not code.startswith(BARCODE_PREFIX) and ean13_check_digit("0" + code[:11]) == code[11]:
+            return "0" + code
+        return code + ean13_check_digit(code)
+    return code
+
+
+def generate_barcode_number(item_id, sku, attempt=0):
+    """
+    Generate a reproducible EAN-13 barcode number from item ID and SKU
+    
+    The body is a SHA-256 digest of the ID and SKU, so the same item gets the
+    same code in every process (unlike the built-in hash(), which is salted
+    per process). Bump `attempt` to derive the next candidate on a collision.
     
     Args:
-        barcode_number (str): 12-digit barcode number
-        item_name (str): Item name for display
+        item_id (int): Item database ID
+        sku (str): Item SKU
+        attempt (int): Collision retry counter
         
     Returns:
-        PIL.Image: Barcode image
+        str: 13-digit barcode number including check digit
+    """
+    digest = hashlib.sha256(f"{item_id}:{sku}:{attempt}".encode("utf-8")).digest()
+    body = BARCODE_PREFIX + str(int.from_bytes(digest[:8], "big") % 10**10).zfill(10)
+    return body + ean13_check_digit(body)
+
+
+def _allocate_barcode(item_id, sku, is_taken):
+    """First candidate code for an item that is_taken(code) says is free"""
+    attempt = 0
+    while True:
+        code = generate_barcode_number(item_id, sku, attempt)
+        if not is_taken(code):
+            return code
+        attempt += 1
+
+
+def _image_key(kind, args):
+    """Content address of a rendered image"""
+    return hashlib.sha256(repr((IMAGE_RENDER_VERSION, kind, args)).encode("utf-8")).hexdigest()
+
+
+def _image_cache_file(key):
+    return os.path.join(IMAGE_CACHE_DIR, key[:2], key + ".png")
+
+
+def _remember_image(key, img):
+    """Add an image to the memory LRU, evicting the oldest beyond the byte budget"""
+    global _image_cache_bytes
+    size = img.width * img.height * len(img.getbands())
+    with _image_cache_lock:
+        if key in _image_cache:
+            return
+        _image_cache[key] = (img, size)
+        _image_cache_bytes += size
+        while _image_cache_bytes > IMAGE_CACHE_MEMORY_BYTES and len(_image_cache) > 1:
+            _, (_, evicted) = _image_cache.popitem(last=False)
+            _image_cache_bytes -= evicted
+
+
+def _store_image_file(key, img):
+    """Write an image to the disk cache atomically, then evict least recently used files"""
+    global _disk_cache_bytes
+    path = _image_cache_file(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    # Barcodes compress well even at the fastest level
+    img.save(temp_path, format="PNG", compress_level=1)
+    os.replace(temp_path, path)
+    with _image_cache_lock:
+        if _disk_cache_bytes is None:
+            _disk_cache_bytes = sum(size for _, size, _ in _disk_cache_entries())
+        else:
+            _disk_cache_bytes += os.path.getsize(path)
+        if _disk_cache_bytes > IMAGE_CACHE_DISK_BYTES:
+            # Trim to 80% so a full cache isn't rescanned on every write
+            entries = sorted(_disk_cache_entries(), key=lambda entry: entry[2])
+            _disk_cache_bytes = sum(size for _, size, _ in entries)
+            for file_path, size, _ in entries:
+                if _disk_cache_bytes <= IMAGE_CACHE_DISK_BYTES * 0.8:
+                    break
+                if file_path != path:
+                    os.remove(file_path)
+                    _disk_cache_bytes -= size
+
+
+def _disk_cache_entries():
+    """(path, size, mtime) of every file in the disk cache"""
+    entries = []
+    for folder, _, files in os.walk(IMAGE_CACHE_DIR):
+        for name in files:
+            if name.endswith(".png"):
+                stat = os.stat(os.path.join(folder, name))
+                entries.append((os.path.join(folder, name), stat.st_size, stat.st_mtime))
+    return entries
+
+
+def _cached_image(kind, args, render):
     """
+    Return a rendered image from memory, disk, or render() and cache it
+    
+    Callers get their own copy, so modifying it can't corrupt the cache.
+    """
+    key = _image_key(kind, args)
+    with _image_cache_lock:
+        if key in _image_cache:
+            _image_cache.move_to_end(key)
+            return _image_cache[key][0].copy()
+    
+    img = None
+    if IMAGE_CACHE_DIR:
+        path = _image_cache_file(key)
+        try:
+            with Image.open(path) as cached:
+                img = cached.copy()
+            os.utime(path)  # mtime is the disk cache's LRU clock
+        except (OSError, ValueError):
+            img = None
+    
+    if img is None:
+        img = render()
+        if img is None:
+            return None
+        if IMAGE_CACHE_DIR:
+            try:
+                _store_image_file(key, img)
+            except OSError as e:
+                print(f"Warning: could not write image cache: {e}")
+    
+    _remember_image(key, img)
+    return img.copy()
+
+
+def clear_image_cache(disk=False):
+    """Empty the in-memory image cache, and the disk cache too if disk=True"""
+    global _image_cache_bytes, _disk_cache_bytes
+    with _image_cache_lock:
+        _image_cache.clear()
+        _image_cache_bytes = 0
+        if disk and IMAGE_CACHE_DIR and os.path.isdir(IMAGE_CACHE_DIR):
+            shutil.rmtree(IMAGE_CACHE_DIR, ignore_errors=True)
+        if disk:
+            _disk_cache_bytes = None
+
+
+def _render_barcode_image(barcode_number, item_name):
     try:
         # Create EAN13 barcode
         EAN = barcode.get_barcode_class('ean13')
-        ean = EAN(barcode_number, writer=ImageWriter())
+        # BMP: the buffer is decoded straight away, so skip PNG compression
+        ean = EAN(barcode_number, writer=ImageWriter(format="BMP"))
         
         # Generate to BytesIO
         buffer = io.BytesIO()
@@ -66,23 +233,29 @@ def generate_barcode_image(barcode_number, item_name=""):
         
         buffer.seek(0)
         img = Image.open(buffer)
+        img.load()
         return img
     except Exception as e:
         print(f"Error generating barcode: {e}")
         return None
 
 
-def generate_qr_code(data, size=200):
+def generate_barcode_image(barcode_number, item_name=""):
     """
-    Generate QR code image
+    Generate EAN13 barcode image
     
     Args:
-        data (str): Data to encode in QR code
-        size (int): Image size in pixels
+        barcode_number (str): EAN-13 number, with or without check digit
+        item_name (str): Item name for display
         
     Returns:
-        PIL.Image: QR code image
+        PIL.Image: Barcode image
     """
+    return _cached_image("barcode", (barcode_number, item_name),
+                         lambda: _render_barcode_image(barcode_number, item_name))
+
+
+def _render_qr_code(data, size):
     try:
         qr = qrcode.QRCode(
             version=1,
@@ -101,6 +274,43 @@ def generate_qr_code(data, size=200):
         return None
 
 
+def generate_qr_code(data, size=200):
+    """
+    Generate QR code image
+    
+    Args:
+        data (str): Data to encode in QR code
+        size (int): Image size in pixels
+        
+    Returns:
+        PIL.Image: QR code image
+    """
+    return _cached_image("qr", (data, size), lambda: _render_qr_code(data, size))
+
+
+def barcode_display_image(barcode_number, item_name="", width=300):
+    """
+    Barcode image scaled to a display width, cached like the full-size image
+    
+    Args:
+        barcode_number (str): Barcode number
+        item_name (str): Item name
+        width (int): Desired width in pixels
+        
+    Returns:
+        PIL.Image: Scaled barcode image or None
+    """
+    def render():
+        img = generate_barcode_image(barcode_number, item_name)
+        if img is None:
+            return None
+        # Resize to desired width while maintaining aspect ratio
+        new_height = int(width * img.height / img.width)
+        return img.resize((width, new_height), Image.Resampling.LANCZOS)
+    
+    return _cached_image("barcode_display", (barcode_number, item_name, width), render)
+
+
 def save_barcode_image(barcode_number, item_name, output_dir="barcodes"):
     """
     Save barcode image to file
@@ -118,11 +328,16 @@ def save_barcode_image(barcode_number, item_name, output_dir="barcodes"):
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
         
-        # Generate and save
+        # Generate (or fetch from cache) and save
         img = generate_barcode_image(barcode_number, item_name)
         if img:
             filename = f"{output_dir}/barcode_{barcode_number}.png"
-            img.save(filename)
+            cached_file = _image_cache_file(_image_key("barcode", (barcode_number, item_name))) if IMAGE_CACHE_DIR else None
+            if cached_file and os.path.exists(cached_file):
+                # Already encoded as PNG; copy the bytes instead of re-encoding
+                shutil.copyfile(cached_file, filename)
+            else:
+                img.save(filename)
             return filename
         return None
     except Exception as e:
@@ -172,11 +387,12 @@ def search_item_by_barcode(barcode_number):
     conn = get_connection()
     cur = conn.cursor()
     
+    # Served by the unique index on items.barcode
     cur.execute("""
         SELECT id, name, sku, quantity, price, min_stock_level, reorder_point, barcode
         FROM items
         WHERE barcode = ?
-    """, (barcode_number,))
+    """, (normalize_barcode(barcode_number),))
     
     row = cur.fetchone()
     conn.close()
@@ -214,7 +430,7 @@ def update_item_barcode(item_id, barcode_number):
             UPDATE items
             SET barcode = ?
             WHERE id = ?
-        """, (barcode_number, item_id))
+        """, (normalize_barcode(barcode_number) or None, item_id))
         conn.commit()
         success = cur.rowcount > 0
         conn.close()
@@ -225,6 +441,75 @@ def update_item_barcode(item_id, barcode_number):
         return False
 
 
+def assign_item_barcode(item_id, sku):
+    """
+    Give an item its deterministic barcode, skipping codes other items hold
+    
+    Args:
+        item_id (int): Item ID
+        sku (str): Item SKU
+        
+    Returns:
+        str: Assigned barcode number, or None on error
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+    
+    try:
+        cur.execute("BEGIN IMMEDIATE")
+        
+        def is_taken(code):
+            cur.execute("SELECT 1 FROM items WHERE barcode = ? AND id != ?", (code, item_id))
+            return cur.fetchone() is not None
+        
+        barcode_number = _allocate_barcode(item_id, sku, is_taken)
+        cur.execute("UPDATE items SET barcode = ? WHERE id = ?", (barcode_number, item_id))
+        conn.commit()
+        return barcode_number if cur.rowcount > 0 else None
+    except Exception as e:
+        conn.rollback()
+        print(f"Error assigning barcode: {e}")
+        return None
+    finally:
+        conn.close()
+
+
+def assign_missing_barcodes():
+    """
+    Assign barcodes to every item that has none, in one transaction
+    
+    Existing codes are loaded once into a set, so collisions with them and
+    within the batch are resolved in memory without a query per item.
+    
+    Returns:
+        dict: {"success", "assigned", "message"}
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+    
+    try:
+        cur.execute("BEGIN IMMEDIATE")
+        cur.execute("SELECT barcode FROM items WHERE barcode IS NOT NULL AND barcode != ''")
+        taken = {row[0] for row in cur.fetchall()}
+        cur.execute("SELECT id, sku FROM items WHERE barcode IS NULL OR barcode = '' ORDER BY id")
+        
+        updates = []
+        for item_id, sku in cur.fetchall():
+            code = _allocate_barcode(item_id, sku, taken.__contains__)
+            taken.add(code)
+            updates.append((code, item_id))
+        
+        cur.executemany("UPDATE items SET barcode = ? WHERE id = ?", updates)
+        conn.commit()
+        return {"success": True, "assigned": len(updates),
+                "message": f"Assigned barcodes to {len(updates)} items"}
+    except Exception as e:
+        conn.rollback()
+        return {"success": False, "assigned": 0, "message": f"Error assigning barcodes: {e}"}
+    finally:
+        conn.close()
+
+
 def generate_and_save_item_barcode(item_id, item_name, sku):
     """
     Generate barcode number, save it to database, and create image
@@ -238,11 +523,10 @@ def generate_and_save_item_barcode(item_id, item_name, sku):
         tuple: (barcode_number, image_path) or (None, None) on error
     """
     try:
-        # Generate barcode number
-        barcode_number = generate_barcode_number(item_id, sku)
+        # Allocate and save barcode number
+        barcode_number = assign_item_barcode(item_id, sku)
         
-        # Save to database
-        if update_item_barcode(item_id, barcode_number):
+        if barcode_number:
             # Generate and save image
             img_path = save_barcode_image(barcode_number, item_name)
             return (barcode_number, img_path)
@@ -269,12 +553,8 @@ def get_barcode_tk_image(barcode_number, item_name="", width=300):
         return None
     
     try:
-        img = generate_barcode_image(barcode_number, item_name)
+        img = barcode_display_image(barcode_number, item_name, width)
         if img:
-            # Resize to desired width while maintaining aspect ratio
-            aspect_ratio = img.height / img.width
-            new_height = int(width * aspect_ratio)
-            img = img.resize((width, new_height), Image.Resampling.LANCZOS)
             return ImageTk.PhotoImage(img)
         return None
     except Exception as e:
@@ -1,23 +1,60 @@
 """
 Email Notification System
 Handles sending email notifications for inventory events
+
+Order and stock notifications are first collected per recipient and
+coalesced into one digest email per window (EMAIL_CONFIG["digest_minutes"]).
+Emails are queued in the email_outbox table and delivered by a
+background sender thread, which sends everything due over one
+authenticated SMTP session and keeps it open for a while for the next
+batch. send_email still sends synchronously, for the settings dialog's
+test button.
 """
 import smtplib
+import threading
+import time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime
 import os
 
+from models.email_outbox_model import (
+    enqueue_email, claim_due_emails, mark_emails_sent, mark_email_failed,
+    requeue_interrupted_emails, next_email_due, add_digest_event, flush_digests, next_digest_due
+)
+from utils.email_templates import render, render_each, render_email
+
+
+def _env_int(name, default, minimum):
+    """Integer setting from the environment; malformed values fall back to default"""
+    try:
+        value = int(os.getenv(name, str(default)))
+    except ValueError:
+        print(f"Ignoring invalid {name}={os.getenv(name)!r}, using {default}")
+        value = default
+    return max(value, minimum)
 
 EMAIL_CONFIG = {
     "smtp_server": os.getenv("SMTP_SERVER", "smtp.gmail.com"),
-    "smtp_port": int(os.getenv("SMTP_PORT", "587")),
+    "smtp_port": _env_int("SMTP_PORT", 587, 1),
     "sender_email": os.getenv("SENDER_EMAIL", ""),
     "sender_password": os.getenv("SENDER_PASSWORD", ""),
     "use_tls": os.getenv("USE_TLS", "True").lower() == "true",
-    "enabled": os.getenv("EMAIL_ENABLED", "False").lower() == "true"
+    "enabled": os.getenv("EMAIL_ENABLED", "False").lower() == "true",
+    # order and stock notifications are coalesced per recipient over this window (0 = send each)
+    "digest_minutes": _env_int("EMAIL_DIGEST_MINUTES", 15, 0)
 }
 
+SMTP_TIMEOUT = 30
+SEND_BATCH_SIZE = 50
+SMTP_IDLE_SECONDS = 60  # keep the session open this long waiting for more mail
+POLL_SECONDS = 30
+
+_sender_thread = None
+_sender_lock = threading.Lock()
+_wake = threading.Event()
+_stop = threading.Event()
+
 
 def is_email_configured():
     """Check if email is properly configured"""
@@ -26,9 +63,44 @@ def is_email_configured():
             EMAIL_CONFIG["sender_password"])
 
 
+def _build_message(to_email, subject, body_html, body_text=None):
+    msg = MIMEMultipart("alternative")
+    msg["From"] = EMAIL_CONFIG["sender_email"]
+    msg["To"] = to_email
+    msg["Subject"] = subject
+    msg["Date"] = datetime.now().strftime("%a, %d %b %Y %H:%M:%S %z")
+    
+    # Attach both plain text and HTML versions
+    if body_text:
+        msg.attach(MIMEText(body_text, "plain"))
+    msg.attach(MIMEText(body_html, "html"))
+    return msg
+
+
+def _open_smtp():
+    """Connect and log in to the configured SMTP server"""
+    if EMAIL_CONFIG["use_tls"]:
+        server = smtplib.SMTP(EMAIL_CONFIG["smtp_server"], EMAIL_CONFIG["smtp_port"], timeout=SMTP_TIMEOUT)
+        server.starttls()
+    else:
+        server = smtplib.SMTP_SSL(EMAIL_CONFIG["smtp_server"], EMAIL_CONFIG["smtp_port"], timeout=SMTP_TIMEOUT)
+    
+    server.login(EMAIL_CONFIG["sender_email"], EMAIL_CONFIG["sender_password"])
+    return server
+
+
+def _close_smtp(server):
+    if server is None:
+        return
+    try:
+        server.quit()
+    except Exception:
+        server.close()
+
+
 def send_email(to_email, subject, body_html, body_text=None):
     """
-    Send an email notification
+    Send an email notification right away, on its own SMTP connection
     
     Args:
         to_email (str): Recipient email address
@@ -43,30 +115,8 @@ def send_email(to_email, subject, body_html, body_text=None):
         return {"success": False, "message": "Email notifications are not configured"}
     
     try:
-        # Create message
-        msg = MIMEMultipart("alternative")
-        msg["From"] = EMAIL_CONFIG["sender_email"]
-        msg["To"] = to_email
-        msg["Subject"] = subject
-        msg["Date"] = datetime.now().strftime("%a, %d %b %Y %H:%M:%S %z")
-        
-        # Attach both plain text and HTML versions
-        if body_text:
-            part1 = MIMEText(body_text, "plain")
-            msg.attach(part1)
-        
-        part2 = MIMEText(body_html, "html")
-        msg.attach(part2)
-        
-        # Send email
-        if EMAIL_CONFIG["use_tls"]:
-            server = smtplib.SMTP(EMAIL_CONFIG["smtp_server"], EMAIL_CONFIG["smtp_port"])
-            server.starttls()
-        else:
-            server = smtplib.SMTP_SSL(EMAIL_CONFIG["smtp_server"], EMAIL_CONFIG["smtp_port"])
-        
-        server.login(EMAIL_CONFIG["sender_email"], EMAIL_CONFIG["sender_password"])
-        server.send_message(msg)
+        server = _open_smtp()
+        server.send_message(_build_message(to_email, subject, body_html, body_text))
         server.quit()
         
         return {"success": True, "message": "Email sent successfully"}
@@ -76,83 +126,289 @@ def send_email(to_email, subject, body_html, body_text=None):
         return {"success": False, "message": f"Failed to send email: {str(e)}"}
 
 
-def send_low_stock_alert(user_email, items):
+def queue_email(to_email, subject, body_html, body_text=None):
     """
-    Send low stock alert email
+    Queue an email for the background sender and return immediately
     
     Args:
-        user_email (str): Recipient email
-        items (list): List of low stock items
+        to_email (str): Recipient email address
+        subject (str): Email subject
+        body_html (str): HTML body content
+        body_text (str): Plain text body (optional fallback)
         
     Returns:
-        dict: {"success": bool, "message": str}
+        dict: {"success": bool, "message": str, "id": outbox id}
     """
-    if not items:
-        return {"success": False, "message": "No items to notify"}
+    if not is_email_configured():
+        return {"success": False, "message": "Email notifications are not configured"}
+    
+    result = enqueue_email(to_email, subject, body_html, body_text)
+    if not result.get("success"):
+        return result
+    start_email_sender()
+    _wake.set()
+    return {"success": True, "message": "Email queued for delivery", "id": result["id"]}
+
+
+def deliver_due_emails(server=None):
+    """
+    Send every due outbox message over one SMTP session
+    
+    A refused message is retried later on its own; a connection or login
+    failure puts the rest of the batch back for a later retry.
+    
+    Args:
+        server: Open SMTP session to reuse, if any
+        
+    Returns:
+        tuple: (messages sent, SMTP session still open or None)
+    """
+    if not is_email_configured():
+        return 0, server
     
+    sent = 0
+    while True:
+        batch = claim_due_emails(SEND_BATCH_SIZE)
+        if not batch:
+            return sent, server
+        
+        delivered = []
+        for index, email in enumerate(batch):
+            msg = _build_message(email["to_email"], email["subject"], email["body_html"], email["body_text"])
+            try:
+                if server is None:
+                    server = _open_smtp()
+                try:
+                    server.send_message(msg)
+                except smtplib.SMTPServerDisconnected:
+                    # The server dropped the idle session; reconnect once
+                    server = _open_smtp()
+                    server.send_message(msg)
+                delivered.append(email["id"])
+            except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError) as e:
+                mark_email_failed(email["id"], email["attempts"] + 1, e)
+            except Exception as e:
+                print(f"Email sender error: {e}")
+                _close_smtp(server)
+                for pending in batch[index:]:
+                    mark_email_failed(pending["id"], pending["attempts"] + 1, e)
+                mark_emails_sent(delivered)
+                return sent + len(delivered), None
+        
+        mark_emails_sent(delivered)
+        sent += len(delivered)
+
+
+def _seconds_until_due():
+    due = [when for when in (next_email_due(), next_digest_due(max(EMAIL_CONFIG["digest_minutes"], 0) * 60))
+           if when is not None]
+    if not due:
+        return POLL_SECONDS
+    wait = (datetime.fromisoformat(min(due)) - datetime.now()).total_seconds()
+    return min(max(wait, 0), POLL_SECONDS)
+
+
+def _sender_loop():
+    server = None
+    last_sent = time.monotonic()
+    while not _stop.is_set():
+        _wake.clear()
+        try:
+            flush_due_digests()
+            sent, server = deliver_due_emails(server)
+            if sent:
+                last_sent = time.monotonic()
+            timeout = _seconds_until_due()
+        except Exception as e:
+            print(f"Email sender error: {e}")
+            timeout = POLL_SECONDS
+        
+        if server is not None:
+            idle_left = SMTP_IDLE_SECONDS - (time.monotonic() - last_sent)
+            if idle_left <= 0:
+                _close_smtp(server)
+                server = None
+            else:
+                timeout = min(timeout, idle_left)
+        _wake.wait(timeout)
+    _close_smtp(server)
+
+
+def start_email_sender():
+    """Start the background sender thread if it isn't running"""
+    global _sender_thread
+    with _sender_lock:
+        if _sender_thread is not None and _sender_thread.is_alive():
+            return
+        requeue_interrupted_emails()
+        _stop.clear()
+        _sender_thread = threading.Thread(target=_sender_loop, name="email-sender", daemon=True)
+        _sender_thread.start()
+
+
+def stop_email_sender(timeout=10):
+    """Stop the sender thread after its current message; unsent mail stays queued"""
+    global _sender_thread
+    with _sender_lock:
+        thread, _sender_thread = _sender_thread, None
+    if thread is not None:
+        _stop.set()
+        _wake.set()
+        thread.join(timeout)
+
+
+def _stock_row(item):
+    """Template values for one low stock item"""
+    min_level = item.get('min_stock_level', 10)
+    if item['quantity'] == 0:
+        status = "🔴 OUT OF STOCK"
+    elif item['quantity'] <= min_level:
+        status = "🟡 LOW STOCK"
+    else:
+        status = "⚠️ REORDER SOON"
+    return dict(item, status=status, min_stock_level=min_level, price=f"{item['price']:.2f}")
+
+
+def _low_stock_content(items):
+    """Subject, HTML and plain text of a low stock alert"""
     subject = f"🔴 Low Stock Alert - {len(items)} Items Need Attention"
     
-    # Build HTML content
-    html_body = f"""
-    <html>
-    <head>
-        <style>
-            body {{ font-family: Arial, sans-serif; }}
-            .header {{ background-color: #dc2626; color: white; padding: 20px; }}
-            .content {{ padding: 20px; }}
-            .item {{ background-color: #fee2e2; padding: 10px; margin: 10px 0; border-radius: 5px; }}
-            .item-name {{ font-weight: bold; color: #991b1b; }}
-            .footer {{ padding: 20px; font-size: 12px; color: #666; }}
-        </style>
-    </head>
-    <body>
-        <div class="header">
-            <h2>⚠️ Low Stock Alert</h2>
-        </div>
-        <div class="content">
-            <p>The following items are running low and need to be restocked:</p>
+    items_html = render_each("low_stock_item", map(_stock_row, items))
+    html_body = render_email("⚠️ Low Stock Alert", "#dc2626", render("low_stock", items_html=items_html), [
+        "This is an automated notification from your Inventory Management System.",
+        "Please log in to the system to take action."
+    ])
+    
+    text_body = render("low_stock_text", count=len(items), items=render_each("low_stock_text_item", items))
+    
+    return subject, html_body, text_body
+
+
+def _order_label(order_type):
+    return "Purchase Order" if order_type == "purchase" else "Sales Order"
+
+
+def _order_completion_content(order_type, order_id, items_count, completed_at):
+    """Subject, HTML and plain text of an order completion notice"""
+    order_label = _order_label(order_type)
+    subject = f"✅ {order_label} #{order_id} Completed"
+    
+    values = {"order_label": order_label, "order_id": order_id, "items_count": items_count,
+              "completed_at": completed_at}
+    html_body = render_email("✅ Order Completed Successfully", "#059669", render("order_completed", **values), [
+        "This is an automated notification from your Inventory Management System."
+    ])
+    text_body = render("order_completed_text", **values)
+    
+    return subject, html_body, text_body
+
+
+def _digest_content(events):
+    """
+    Subject, HTML and plain text of one recipient's coalesced notifications
+    
+    Rendered once per digest. A lone event keeps its usual layout; later
+    low stock alerts supersede earlier ones, since each lists current stock.
+    """
+    if len(events) == 1:
+        return NOTIFICATION_CONTENT[events[0]["kind"]](events[0]["payload"])
+    
+    orders = [event["payload"] for event in events if event["kind"] == "order_completed"]
+    low_stock = [event["payload"]["items"] for event in events if event["kind"] == "low_stock"]
+    items = low_stock[-1] if low_stock else []
+    
+    parts = []
+    if orders:
+        parts.append(f"{len(orders)} Orders Completed")
+    if items:
+        parts.append(f"{len(items)} Items Low on Stock")
+    subject = f"📬 Inventory Digest - {', '.join(parts)}"
+    
+    content_html = ""
+    text_body = f"Inventory Digest - {', '.join(parts)}\n"
+    
+    if orders:
+        content_html += render("digest_orders", rows_html=render_each("digest_order_row", (
+            dict(order, order_label=_order_label(order['order_type'])) for order in orders
+        )))
+        text_body += "\nCompleted orders:\n" + render_each("digest_order_text", (
+            dict(order, order_type=order['order_type'].title()) for order in orders
+        ))
+    
+    if items:
+        content_html += render("digest_stock", rows_html=render_each("digest_stock_row", map(_stock_row, items)))
+        text_body += "\nLow stock:\n" + render_each("low_stock_text_item", items)
+    
+    html_body = render_email("📬 Inventory Digest", "#6b21a8", content_html, [
+        "This is an automated digest from your Inventory Management System."
+    ])
+    return subject, html_body, text_body
+
+
+# digest event kind -> renderer of a single event's payload
+NOTIFICATION_CONTENT = {
+    "order_completed": lambda payload: _order_completion_content(**payload),
+    "low_stock": lambda payload: _low_stock_content(payload["items"]),
+}
+
+
+def queue_notification(to_email, kind, payload):
     """
+    Add a notification to the recipient's digest, or queue it straight
+    away when digests are off (digest_minutes = 0)
     
-    for item in items:
-        status = ""
-        if item['quantity'] == 0:
-            status = "🔴 OUT OF STOCK"
-        elif item['quantity'] <= item.get('min_stock_level', 10):
-            status = "🟡 LOW STOCK"
-        else:
-            status = "⚠️ REORDER SOON"
+    Args:
+        to_email (str): Recipient email
+        kind (str): Key of NOTIFICATION_CONTENT
+        payload (dict): JSON-serialisable arguments for the renderer
         
-        html_body += f"""
-            <div class="item">
-                <div class="item-name">{item['name']} ({item['sku']})</div>
-                <div>Status: {status}</div>
-                <div>Current Quantity: {item['quantity']}</div>
-                <div>Min Stock Level: {item.get('min_stock_level', 10)}</div>
-                <div>Price: ${item['price']:.2f}</div>
-            </div>
-        """
-    
-    html_body += """
-        </div>
-        <div class="footer">
-            <p>This is an automated notification from your Inventory Management System.</p>
-            <p>Please log in to the system to take action.</p>
-        </div>
-    </body>
-    </html>
+    Returns:
+        dict: {"success": bool, "message": str}
+    """
+    if not is_email_configured():
+        return {"success": False, "message": "Email notifications are not configured"}
+    
+    if EMAIL_CONFIG["digest_minutes"] <= 0:
+        return queue_email(to_email, *NOTIFICATION_CONTENT[kind](payload))
+    
+    result = add_digest_event(to_email, kind, payload)
+    if not result.get("success"):
+        return result
+    start_email_sender()
+    _wake.set()
+    return {"success": True, "message": f"Added to the {EMAIL_CONFIG['digest_minutes']}-minute email digest"}
+
+
+def flush_due_digests():
+    """Queue one email per recipient whose oldest digest event has waited a full window"""
+    if EMAIL_CONFIG["digest_minutes"] <= 0:
+        # digests were switched off: send what was collected
+        return flush_digests(0, _digest_content)
+    return flush_digests(EMAIL_CONFIG["digest_minutes"] * 60, _digest_content)
+
+
+def send_low_stock_alert(user_email, items):
     """
+    Send low stock alert email (via the recipient's digest)
     
-    # Plain text version
-    text_body = f"Low Stock Alert - {len(items)} Items\n\n"
-    for item in items:
-        text_body += f"- {item['name']} ({item['sku']}): {item['quantity']} units\n"
+    Args:
+        user_email (str): Recipient email
+        items (list): List of low stock items
+        
+    Returns:
+        dict: {"success": bool, "message": str}
+    """
+    if not items:
+        return {"success": False, "message": "No items to notify"}
     
-    return send_email(user_email, subject, html_body, text_body)
+    fields = ("name", "sku", "quantity", "min_stock_level", "price")
+    return queue_notification(user_email, "low_stock",
+                              {"items": [{key: item[key] for key in fields if key in item} for item in items]})
 
 
 def send_order_completion_notification(user_email, order_type, order_id, items_count):
     """
-    Send order completion notification
+    Send order completion notification (via the recipient's digest)
     
     Args:
         user_email (str): Recipient email
@@ -163,43 +419,12 @@ def send_order_completion_notification(user_email, order_type, order_id, items_c
     Returns:
         dict: {"success": bool, "message": str}
     """
-    order_label = "Purchase Order" if order_type == "purchase" else "Sales Order"
-    subject = f"✅ {order_label} #{order_id} Completed"
-    
-    html_body = f"""
-    <html>
-    <head>
-        <style>
-            body {{ font-family: Arial, sans-serif; }}
-            .header {{ background-color: #059669; color: white; padding: 20px; }}
-            .content {{ padding: 20px; }}
-            .info {{ background-color: #d1fae5; padding: 15px; margin: 10px 0; border-radius: 5px; }}
-            .footer {{ padding: 20px; font-size: 12px; color: #666; }}
-        </style>
-    </head>
-    <body>
-        <div class="header">
-            <h2>✅ Order Completed Successfully</h2>
-        </div>
-        <div class="content">
-            <div class="info">
-                <p><strong>Order Type:</strong> {order_label}</p>
-                <p><strong>Order ID:</strong> #{order_id}</p>
-                <p><strong>Items:</strong> {items_count}</p>
-                <p><strong>Completed:</strong> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
-            </div>
-            <p>The order has been processed and inventory has been updated accordingly.</p>
-        </div>
-        <div class="footer">
-            <p>This is an automated notification from your Inventory Management System.</p>
-        </div>
-    </body>
-    </html>
-    """
-    
-    text_body = f"{order_label} #{order_id} completed with {items_count} items."
-    
-    return send_email(user_email, subject, html_body, text_body)
+    return queue_notification(user_email, "order_completed", {
+        "order_type": order_type,
+        "order_id": order_id,
+        "items_count": items_count,
+        "completed_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    })
 
 
 def send_welcome_email(user_email, username, temporary_password=None):
@@ -216,46 +441,15 @@ def send_welcome_email(user_email, username, temporary_password=None):
     """
     subject = "Welcome to Inventory Management System"
     
-    password_info = ""
-    if temporary_password:
-        password_info = f"""
-            <div style="background-color: #fef3c7; padding: 15px; margin: 15px 0; border-radius: 5px;">
-                <p><strong>Temporary Password:</strong> {temporary_password}</p>
-                <p style="color: #92400e;">Please change your password after first login.</p>
-            </div>
-        """
-    
-    html_body = f"""
-    <html>
-    <head>
-        <style>
-            body {{ font-family: Arial, sans-serif; }}
-            .header {{ background-color: #7c3aed; color: white; padding: 20px; }}
-            .content {{ padding: 20px; }}
-            .footer {{ padding: 20px; font-size: 12px; color: #666; }}
-        </style>
-    </head>
-    <body>
-        <div class="header">
-            <h2>Welcome to Inventory Management System!</h2>
-        </div>
-        <div class="content">
-            <p>Hello {username},</p>
-            <p>Your account has been created successfully.</p>
-            <p><strong>Username:</strong> {username}</p>
-            {password_info}
-            <p>You can now log in and start managing your inventory.</p>
-        </div>
-        <div class="footer">
-            <p>If you have any questions, please contact your system administrator.</p>
-        </div>
-    </body>
-    </html>
-    """
+    password_html = render("welcome_password", password=temporary_password) if temporary_password else ""
+    html_body = render_email("Welcome to Inventory Management System!", "#7c3aed",
+                             render("welcome", username=username, password_html=password_html), [
+        "If you have any questions, please contact your system administrator."
+    ])
     
     text_body = f"Welcome {username}! Your account has been created."
     
-    return send_email(user_email, subject, html_body, text_body)
+    return queue_email(user_email, subject, html_body, text_body)
 
 
 def send_stock_alert_summary(user_email, alert_counts):
@@ -275,45 +469,12 @@ def send_stock_alert_summary(user_email, alert_counts):
     
     subject = f"📊 Daily Stock Alert Summary - {total} Total Alerts"
     
-    html_body = f"""
-    <html>
-    <head>
-        <style>
-            body {{ font-family: Arial, sans-serif; }}
-            .header {{ background-color: #6b21a8; color: white; padding: 20px; }}
-            .content {{ padding: 20px; }}
-            .summary {{ background-color: #f5f3ff; padding: 15px; margin: 10px 0; border-radius: 5px; }}
-            .alert-stat {{ margin: 10px 0; padding: 10px; border-left: 4px solid #7c3aed; }}
-            .footer {{ padding: 20px; font-size: 12px; color: #666; }}
-        </style>
-    </head>
-    <body>
-        <div class="header">
-            <h2>📊 Daily Stock Alert Summary</h2>
-        </div>
-        <div class="content">
-            <p>Here's your daily inventory alert summary:</p>
-            <div class="summary">
-                <div class="alert-stat">
-                    <strong>🔴 Out of Stock:</strong> {alert_counts.get('out_of_stock', 0)} items
-                </div>
-                <div class="alert-stat">
-                    <strong>🟡 Low Stock:</strong> {alert_counts.get('low_stock', 0)} items
-                </div>
-                <div class="alert-stat">
-                    <strong>⚠️ Reorder Needed:</strong> {alert_counts.get('reorder', 0)} items
-                </div>
-            </div>
-            <p><strong>Total Items Needing Attention: {total}</strong></p>
-            <p>Please log in to the system to review and take action.</p>
-        </div>
-        <div class="footer">
-            <p>This is an automated daily summary from your Inventory Management System.</p>
-        </div>
-    </body>
-    </html>
-    """
+    content_html = render("stock_summary", total=total, out_of_stock=alert_counts.get('out_of_stock', 0),
+                          low_stock=alert_counts.get('low_stock', 0), reorder=alert_counts.get('reorder', 0))
+    html_body = render_email("📊 Daily Stock Alert Summary", "#6b21a8", content_html, [
+        "This is an automated daily summary from your Inventory Management System."
+    ])
     
     text_body = f"Daily Summary: {alert_counts.get('out_of_stock', 0)} out of stock, {alert_counts.get('low_stock', 0)} low stock, {alert_counts.get('reorder', 0)} need reordering."
     
-    return send_email(user_email, subject, html_body, text_body)
+    return queue_email(user_email, subject, html_body, text_body)
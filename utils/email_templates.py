@@ -0,0 +1,179 @@
+"""
+Email templates
+
+Notification emails share one layout and stylesheet, with ${name}
+placeholders (string.Template syntax) for the parts that vary. Each
+template is parsed once, on first use, into a str.format_map format
+string; repeated fragments such as table rows are rendered with a
+generator and joined.
+
+Values are HTML-escaped, except placeholders ending in _html, which take
+fragments that were already rendered. Plain text templates are not escaped.
+"""
+import html
+import string
+from functools import lru_cache
+
+
+LAYOUT = """
+<html>
+<head>
+    <style>
+        body { font-family: Arial, sans-serif; }
+        .header { background-color: ${header_color}; color: white; padding: 20px; }
+        .content { padding: 20px; }
+        .item { background-color: #fee2e2; padding: 10px; margin: 10px 0; border-radius: 5px; }
+        .item-name { font-weight: bold; color: #991b1b; }
+        .info { background-color: #d1fae5; padding: 15px; margin: 10px 0; border-radius: 5px; }
+        .notice { background-color: #fef3c7; padding: 15px; margin: 15px 0; border-radius: 5px; }
+        .notice-hint { color: #92400e; }
+        .summary { background-color: #f5f3ff; padding: 15px; margin: 10px 0; border-radius: 5px; }
+        .alert-stat { margin: 10px 0; padding: 10px; border-left: 4px solid #7c3aed; }
+        table { border-collapse: collapse; width: 100%; margin: 10px 0; }
+        th, td { text-align: left; padding: 8px; border-bottom: 1px solid #e5e7eb; }
+        th { background-color: #f5f3ff; }
+        .footer { padding: 20px; font-size: 12px; color: #666; }
+    </style>
+</head>
+<body>
+    <div class="header">
+        <h2>${title}</h2>
+    </div>
+    <div class="content">
+${content_html}
+    </div>
+    <div class="footer">
+${footer_html}
+    </div>
+</body>
+</html>
+"""
+
+# name -> (source, escape values)
+TEMPLATES = {
+    "layout": (LAYOUT, True),
+    "paragraph": ("        <p>${text}</p>\n", True),
+
+    "low_stock": ("""        <p>The following items are running low and need to be restocked:</p>
+${items_html}""", True),
+    "low_stock_item": ("""        <div class="item">
+            <div class="item-name">${name} (${sku})</div>
+            <div>Status: ${status}</div>
+            <div>Current Quantity: ${quantity}</div>
+            <div>Min Stock Level: ${min_stock_level}</div>
+            <div>Price: $$${price}</div>
+        </div>
+""", True),
+    "low_stock_text": ("Low Stock Alert - ${count} Items\n\n${items}", False),
+    "low_stock_text_item": ("- ${name} (${sku}): ${quantity} units\n", False),
+
+    "order_completed": ("""        <div class="info">
+            <p><strong>Order Type:</strong> ${order_label}</p>
+            <p><strong>Order ID:</strong> #${order_id}</p>
+            <p><strong>Items:</strong> ${items_count}</p>
+            <p><strong>Completed:</strong> ${completed_at}</p>
+        </div>
+        <p>The order has been processed and inventory has been updated accordingly.</p>
+""", True),
+    "order_completed_text": ("${order_label} #${order_id} completed with ${items_count} items.", False),
+
+    "digest_orders": ("""        <h3>✅ Completed Orders</h3>
+        <table>
+            <tr><th>Type</th><th>Order</th><th>Items</th><th>Completed</th></tr>
+${rows_html}        </table>
+""", True),
+    "digest_order_row": ("            <tr><td>${order_label}</td><td>#${order_id}</td>"
+                         "<td>${items_count}</td><td>${completed_at}</td></tr>\n", True),
+    "digest_order_text": ("- ${order_type} order #${order_id}: ${items_count} items\n", False),
+    "digest_stock": ("""        <h3>⚠️ Low Stock</h3>
+        <table>
+            <tr><th>Item</th><th>Quantity</th><th>Min Level</th><th>Price</th></tr>
+${rows_html}        </table>
+""", True),
+    "digest_stock_row": ("            <tr><td>${name} (${sku})</td><td>${quantity}</td>"
+                         "<td>${min_stock_level}</td><td>$$${price}</td></tr>\n", True),
+
+    "welcome": ("""        <p>Hello ${username},</p>
+        <p>Your account has been created successfully.</p>
+        <p><strong>Username:</strong> ${username}</p>
+${password_html}        <p>You can now log in and start managing your inventory.</p>
+""", True),
+    "welcome_password": ("""        <div class="notice">
+            <p><strong>Temporary Password:</strong> ${password}</p>
+            <p class="notice-hint">Please change your password after first login.</p>
+        </div>
+""", True),
+
+    "stock_summary": ("""        <p>Here's your daily inventory alert summary:</p>
+        <div class="summary">
+            <div class="alert-stat">
+                <strong>🔴 Out of Stock:</strong> ${out_of_stock} items
+            </div>
+            <div class="alert-stat">
+                <strong>🟡 Low Stock:</strong> ${low_stock} items
+            </div>
+            <div class="alert-stat">
+                <strong>⚠️ Reorder Needed:</strong> ${reorder} items
+            </div>
+        </div>
+        <p><strong>Total Items Needing Attention: ${total}</strong></p>
+        <p>Please log in to the system to review and take action.</p>
+""", True),
+}
+
+
+class EmailTemplate:
+    """
+    A template parsed once into a str.format_map format string, so
+    rendering is a single format call on values escaped up front
+    """
+
+    def __init__(self, source, escape=True):
+        template = string.Template(source)
+        if not template.is_valid():
+            raise ValueError("Invalid placeholder in template")
+        self.fields = tuple(template.get_identifiers())
+        self.escaped = tuple(name for name in self.fields if not name.endswith("_html")) if escape else ()
+        # literal text keeps its braces doubled; names are identifiers
+        # (Template.idpattern), so "{name}" is a plain field lookup
+        pieces, position = [], 0
+        for match in template.pattern.finditer(source):
+            pieces.append(source[position:match.start()].replace("{", "{{").replace("}", "}}"))
+            name = match.group("named") or match.group("braced")
+            pieces.append("$" if name is None else "{" + name + "}")
+            position = match.end()
+        pieces.append(source[position:].replace("{", "{{").replace("}", "}}"))
+        self.format = "".join(pieces)
+
+    def render(self, values):
+        """Fill in the placeholders from a mapping; every one must be present"""
+        if self.escaped:
+            values = dict(values)
+            for name in self.escaped:
+                if isinstance(value := values[name], str):
+                    values[name] = html.escape(value)
+        return self.format.format_map(values)
+
+
+@lru_cache(maxsize=None)
+def get_template(name):
+    """Template by name (parsed on first use)"""
+    source, escape = TEMPLATES[name]
+    return EmailTemplate(source, escape)
+
+
+def render(name, **values):
+    """Render a named template"""
+    return get_template(name).render(values)
+
+
+def render_each(name, rows):
+    """Render a named template once per dict in rows and join the results"""
+    render_row = get_template(name).render
+    return "".join(render_row(row) for row in rows)
+
+
+def render_email(title, header_color, content_html, footer_lines):
+    """Wrap rendered content in the shared layout"""
+    return render("layout", title=title, header_color=header_color, content_html=content_html,
+                  footer_html=render_each("paragraph", ({"text": line} for line in footer_lines)))
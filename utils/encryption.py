@@ -1,23 +1,138 @@
-import os, base64, hashlib, hmac
+"""
+Password hashing
 
-_ITER = 120_000
+Hashers are registered by scheme, the first "$"-separated field of a
+stored hash, so old hashes keep verifying after the default changes.
+New hashes use scrypt where hashlib has it, otherwise PBKDF2-SHA256.
+Scheme and cost are set per deployment with PASSWORD_HASHER,
+SCRYPT_N and PBKDF2_ITERATIONS; calibrate() finds the cost that takes
+a target time on this machine. needs_rehash() tells authenticate when a
+stored hash should be upgraded to the current settings.
+"""
+import os, base64, hashlib, hmac, math, time
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode()
+
+class Pbkdf2Hasher:
+    """pbkdf2$sha256$<iterations>$<salt>$<key>"""
+    scheme = "pbkdf2"
+
+    def __init__(self, iterations: int = 120_000):
+        self.iterations = iterations
+
+    def encode(self, password: str, salt: bytes) -> str:
+        dk = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, self.iterations)
+        return f"pbkdf2$sha256${self.iterations}${_b64(salt)}${_b64(dk)}"
+
+    def verify(self, password: str, hashed: str) -> bool:
+        scheme, algo, iters, b64_salt, b64_dk = hashed.split("$", 4)
+        if algo != "sha256":
+            return False
+        dk = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), base64.b64decode(b64_salt), int(iters))
+        return hmac.compare_digest(dk, base64.b64decode(b64_dk))
+
+    def needs_update(self, hashed: str) -> bool:
+        return hashed.split("$")[1:3] != ["sha256", str(self.iterations)]
+
+    def with_cost(self, cost: int) -> "Pbkdf2Hasher":
+        return Pbkdf2Hasher(cost)
+
+    def cost(self) -> int:
+        return self.iterations
+
+    def next_cost(self, cost: int, elapsed_ms: float, target_ms: float) -> int:
+        # time is linear in iterations
+        return max(1000, round(cost * target_ms / elapsed_ms / 1000) * 1000)
+
+class ScryptHasher:
+    """scrypt$<n>$<r>$<p>$<salt>$<key>"""
+    scheme = "scrypt"
+
+    def __init__(self, n: int = 2 ** 14, r: int = 8, p: int = 1):
+        if n < 2 or n & (n - 1):
+            raise ValueError("scrypt n must be a power of two")
+        self.n, self.r, self.p = n, r, p
+
+    def _derive(self, password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+        return hashlib.scrypt(password.encode("utf-8"), salt=salt, n=n, r=r, p=p,
+                              maxmem=256 * r * (n + p) + 2 ** 20, dklen=32)
+
+    def encode(self, password: str, salt: bytes) -> str:
+        dk = self._derive(password, salt, self.n, self.r, self.p)
+        return f"scrypt${self.n}${self.r}${self.p}${_b64(salt)}${_b64(dk)}"
+
+    def verify(self, password: str, hashed: str) -> bool:
+        scheme, n, r, p, b64_salt, b64_dk = hashed.split("$", 5)
+        dk = self._derive(password, base64.b64decode(b64_salt), int(n), int(r), int(p))
+        return hmac.compare_digest(dk, base64.b64decode(b64_dk))
+
+    def needs_update(self, hashed: str) -> bool:
+        return hashed.split("$")[1:4] != [str(self.n), str(self.r), str(self.p)]
+
+    def with_cost(self, cost: int) -> "ScryptHasher":
+        return ScryptHasher(cost, self.r, self.p)
+
+    def cost(self) -> int:
+        return self.n
+
+    def next_cost(self, cost: int, elapsed_ms: float, target_ms: float) -> int:
+        # time is roughly linear in n, which must stay a power of two
+        return 2 ** max(10, round(math.log2(cost * target_ms / elapsed_ms)))
+
+HASHERS = {}
+
+def register_hasher(hasher) -> None:
+    """Add a hasher, or replace the one registered for its scheme"""
+    HASHERS[hasher.scheme] = hasher
+
+register_hasher(Pbkdf2Hasher(int(os.getenv("PBKDF2_ITERATIONS", "120000"))))
+if hasattr(hashlib, "scrypt"):
+    register_hasher(ScryptHasher(int(os.getenv("SCRYPT_N", str(2 ** 14)))))
+
+DEFAULT_SCHEME = os.getenv("PASSWORD_HASHER", "scrypt" if "scrypt" in HASHERS else "pbkdf2")
 
 def hash_password(password: str) -> str:
     if not isinstance(password, str):
         raise TypeError("password must be str")
-    salt = os.urandom(16)
-    dk = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, _ITER)
-    return f"pbkdf2$sha256${_ITER}${base64.b64encode(salt).decode()}${base64.b64encode(dk).decode()}"
+    return HASHERS[DEFAULT_SCHEME].encode(password, os.urandom(16))
 
 def verify_password(password: str, hashed: str) -> bool:
     try:
-        scheme, algo, iters, b64_salt, b64_dk = hashed.split("$", 4)
-        if scheme != "pbkdf2" or algo != "sha256":
-            return False
-        iters = int(iters)
-        salt = base64.b64decode(b64_salt)
-        dk_expected = base64.b64decode(b64_dk)
-        dk = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iters)
-        return hmac.compare_digest(dk, dk_expected)
+        hasher = HASHERS.get(hashed.split("$", 1)[0])
+        return hasher is not None and hasher.verify(password, hashed)
     except Exception:
         return False
+
+def needs_rehash(hashed: str) -> bool:
+    """True if hashed wasn't made with the current default scheme and cost"""
+    hasher = HASHERS[DEFAULT_SCHEME]
+    try:
+        return hashed.split("$", 1)[0] != hasher.scheme or hasher.needs_update(hashed)
+    except Exception:
+        return True
+
+def time_hash(hasher, rounds: int = 3) -> float:
+    """Best time in ms for one hash with this hasher"""
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        hasher.encode("calibration password", b"\0" * 16)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def calibrate(scheme: str, target_ms: float = 250.0, rounds: int = 3):
+    """
+    Hasher for scheme whose cost makes one hash take about target_ms here
+
+    Starts from the registered cost and rescales it from measured times
+    until a step changes it by less than 10%.
+    """
+    hasher = HASHERS[scheme]
+    for _ in range(8):
+        cost = hasher.cost()
+        new_cost = hasher.next_cost(cost, time_hash(hasher, rounds), target_ms)
+        if abs(new_cost - cost) < cost / 10:
+            break
+        hasher = hasher.with_cost(new_cost)
+    return hasher
@@ -0,0 +1,233 @@
+"""
+Printable label sheets for the item catalog
+
+Labels are rendered across a process pool (python-barcode and qrcode are
+pure Python, so threads would serialize on the GIL) and placed onto A4 or
+US letter sheets in item order as they come back. Only a bounded window of
+rendered labels and the page being composed are held in memory; each
+finished page is written out before the next one starts.
+"""
+import os
+from collections import deque
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from PIL import Image, ImageDraw, ImageFont
+
+from database.db_connection import get_connection
+from utils.barcode_utils import generate_barcode_image, generate_qr_code
+
+LABEL_DPI = 300
+LABEL_CONTENTS = ("barcode", "qr", "both")
+LABELS_PER_TASK = 8
+
+# page size, label grid and page margins in millimetres (Avery L7160 / 5160 style sheets)
+LABEL_LAYOUTS = {
+    "A4": {"page_mm": (210.0, 297.0), "columns": 3, "rows": 7, "margin_mm": (7.0, 15.0)},
+    "letter": {"page_mm": (215.9, 279.4), "columns": 3, "rows": 10, "margin_mm": (4.8, 12.7)},
+}
+
+
+def _mm_to_px(mm):
+    return int(round(mm / 25.4 * LABEL_DPI))
+
+
+def _fit(img, width, height, resample=Image.Resampling.LANCZOS):
+    """Scale an image down to fit a box, keeping its aspect ratio"""
+    scale = min(width / img.width, height / img.height, 1.0)
+    if scale == 1.0:
+        return img
+    return img.resize((max(1, int(img.width * scale)), max(1, int(img.height * scale))), resample)
+
+
+@lru_cache(maxsize=None)
+def _font(size):
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:
+        # Pillow < 10.1 has only the fixed-size bitmap font
+        return ImageFont.load_default()
+
+
+def render_label(item, label_size, content="barcode"):
+    """
+    Render one item's label as a greyscale image
+
+    Barcodes are drawn at their native 300 dpi size (only ever shrunk, with
+    nearest-neighbour, so bar edges stay sharp); QR codes fill the space left.
+
+    Args:
+        item (tuple): (id, name, sku, barcode)
+        label_size (tuple): (width, height) in pixels
+        content (str): "barcode", "qr" or "both"
+
+    Returns:
+        PIL.Image: Label image
+    """
+    item_id, name, sku, barcode_number = item
+    width, height = label_size
+    padding = height // 12
+    inner_w, inner_h = width - 2 * padding, height - 2 * padding
+    label = Image.new("L", label_size, 255)
+    draw = ImageDraw.Draw(label)
+    text_h = inner_h // 6
+    # The barcode number, so a QR scan works in the barcode lookup too
+    qr_data = barcode_number or sku
+
+    if content == "qr":
+        qr = generate_qr_code(qr_data, size=inner_h)
+        if qr is not None:
+            label.paste(qr.convert("L"), (padding, padding))
+        x = 2 * padding + inner_h
+        draw.text((x, padding), (name or "")[:30], fill=0, font=_font(text_h))
+        draw.text((x, padding + 2 * text_h), f"SKU: {sku}", fill=0, font=_font(text_h))
+        return label
+
+    draw.text((padding, padding), (name or "")[:30], fill=0, font=_font(text_h))
+    top = padding + text_h + padding // 2
+    body_h = height - padding - top
+    barcode_w = inner_w
+    if content == "both":
+        qr_size = min(body_h, inner_w // 3)
+        barcode_w = inner_w - qr_size - padding
+        qr = generate_qr_code(qr_data, size=qr_size)
+        if qr is not None:
+            label.paste(qr.convert("L"), (width - padding - qr_size, top + (body_h - qr_size) // 2))
+
+    img = generate_barcode_image(barcode_number)
+    if img is not None:
+        img = _fit(img.convert("L"), barcode_w, body_h, Image.Resampling.NEAREST)
+        label.paste(img, (padding + (barcode_w - img.width) // 2, top + (body_h - img.height) // 2))
+    return label
+
+
+def _render_labels(items, label_size, content):
+    """Worker task: render a batch of labels"""
+    return [render_label(item, label_size, content) for item in items]
+
+
+def _label_items(item_ids=None):
+    """(id, name, sku, barcode) of items with a barcode, in catalog order"""
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.row_factory = None
+    try:
+        cur.execute("""
+            SELECT id, name, sku, barcode FROM items
+            WHERE barcode IS NOT NULL AND barcode != ''
+            ORDER BY name, id
+        """)
+        if item_ids is None:
+            return cur.fetchall()
+        # Filter here rather than binding thousands of IN (...) parameters
+        wanted = set(item_ids)
+        return [row for row in cur.fetchall() if row[0] in wanted]
+    finally:
+        conn.close()
+
+
+def _rendered(items, label_size, content, max_workers):
+    """Yield rendered labels in item order, keeping a bounded number in flight"""
+    batches = (items[i:i + LABELS_PER_TASK] for i in range(0, len(items), LABELS_PER_TASK))
+    if max_workers <= 1:
+        for batch in batches:
+            yield from _render_labels(batch, label_size, content)
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        pending = deque()
+        for batch in batches:
+            pending.append(pool.submit(_render_labels, batch, label_size, content))
+            # Block on the oldest batch once every worker has a few queued
+            if len(pending) >= max_workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def generate_label_sheets(output_path: str, item_ids: Optional[List[int]] = None, page_size: str = "A4",
+                          content: str = "barcode", max_workers: int = None,
+                          progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+    """
+    Render labels for many items onto printable sheets
+
+    A .pdf path gets one multi-page PDF, appended a page at a time. A .png
+    path gets one PNG per page, numbered after the file name
+    (labels.png -> labels_001.png, labels_002.png, ...).
+
+    Args:
+        output_path: .pdf or .png file path
+        item_ids: Items to label (default: every item with a barcode)
+        page_size: Key of LABEL_LAYOUTS
+        content: "barcode", "qr" or "both"
+        max_workers: Render processes (default: CPU count; 1 renders in-process)
+        progress: Called as progress(labels_done, total_labels) after each page
+
+    Returns:
+        Dict with success status, message, files, pages, labels and skipped
+        (requested items without a barcode)
+    """
+    if page_size not in LABEL_LAYOUTS:
+        return {"success": False, "message": f"Unknown page size: {page_size}"}
+    if content not in LABEL_CONTENTS:
+        return {"success": False, "message": f"Unknown label content: {content}"}
+    stem, extension = os.path.splitext(output_path)
+    extension = extension.lower()
+    if extension not in (".pdf", ".png"):
+        return {"success": False, "message": "Label sheets can be saved as .pdf or .png"}
+
+    layout = LABEL_LAYOUTS[page_size]
+    page_w, page_h = (_mm_to_px(mm) for mm in layout["page_mm"])
+    margin_x, margin_y = (_mm_to_px(mm) for mm in layout["margin_mm"])
+    columns, rows = layout["columns"], layout["rows"]
+    label_size = ((page_w - 2 * margin_x) // columns, (page_h - 2 * margin_y) // rows)
+    per_page = columns * rows
+
+    try:
+        items = _label_items(item_ids)
+        skipped = len(set(item_ids)) - len(items) if item_ids is not None else 0
+        if not items:
+            return {"success": False, "message": "No items with barcodes to label"}
+
+        files = []
+        page = None
+        done = 0
+
+        def flush():
+            # 1-bit pages keep PDFs small (CCITT G4) and barcodes crisp
+            sheet = page.convert("1", dither=Image.Dither.NONE)
+            if extension == ".pdf":
+                sheet.save(output_path, "PDF", resolution=LABEL_DPI, append=bool(files))
+                if not files:
+                    files.append(output_path)
+            else:
+                filepath = f"{stem}_{len(files) + 1:03d}.png"
+                sheet.save(filepath, "PNG", dpi=(LABEL_DPI, LABEL_DPI))
+                files.append(filepath)
+            if progress:
+                progress(done, len(items))
+
+        pages = 0
+        for index, label in enumerate(_rendered(items, label_size, content, max_workers or os.cpu_count() or 1)):
+            slot = index % per_page
+            if slot == 0:
+                if page is not None:
+                    flush()
+                page = Image.new("L", (page_w, page_h), 255)
+                pages += 1
+            page.paste(label, (margin_x + (slot % columns) * label_size[0],
+                               margin_y + (slot // columns) * label_size[1]))
+            done += 1
+        flush()
+
+        return {
+            "success": True,
+            "message": f"Printed {done} labels on {pages} {page_size} pages",
+            "files": files,
+            "pages": pages,
+            "labels": done,
+            "skipped": skipped
+        }
+    except Exception as e:
+        return {"success": False, "message": f"Error generating label sheets: {e}"}
@@ -0,0 +1,31 @@
+"""
+Order line parsing and checks shared by the purchase and sales order
+controllers and models
+"""
+
+def parse_order_lines(form_data):
+    """Read order lines from form_data["lines"], or the single item_id/quantity/unit_price fields"""
+    raw_lines = form_data.get("lines") or [{
+        "item_id": form_data.get("item_id"),
+        "quantity": form_data.get("quantity"),
+        "unit_price": form_data.get("unit_price")
+    }]
+    return [
+        {"item_id": int(l["item_id"]), "quantity": int(l["quantity"]), "unit_price": float(l["unit_price"])}
+        for l in raw_lines
+    ]
+
+
+def check_order_lines(lines):
+    """Error message for the first line without a positive quantity and a non-negative unit price, or None"""
+    for line_no, line in enumerate(lines, start=1):
+        try:
+            quantity = int(line["quantity"])
+            unit_price = float(line["unit_price"])
+        except (KeyError, TypeError, ValueError):
+            return f"Line {line_no}: quantity and unit price are required"
+        if quantity <= 0:
+            return f"Line {line_no}: Quantity must be positive"
+        if unit_price < 0:
+            return f"Line {line_no}: Unit price cannot be negative"
+    return None
@@ -0,0 +1,192 @@
+"""
+Tabular export of report results
+Turns the dicts returned by the report generators into rows for CSV files
+and Excel sheets, and streams full-detail reports straight from the
+database cursor to disk
+"""
+
+import csv
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+from models.reports_model import DETAIL_HEADERS, DETAIL_CHUNK_SIZE, count_report_detail, iter_report_detail
+
+REPORT_TITLES = {
+    "inventory_summary": "Inventory Summary",
+    "sales_report": "Sales Report",
+    "purchase_report": "Purchase Report",
+    "stock_movement": "Stock Movement",
+    "low_stock": "Low Stock",
+    "profit_analysis": "Profit Analysis",
+}
+
+
+def report_rows(report_type: str, data: Any) -> List[List[Any]]:
+    """
+    Flatten a report result into rows
+
+    Args:
+        report_type: One of REPORT_TITLES
+        data: Result of the matching report generator
+
+    Returns:
+        List of rows, each a list of cell values
+    """
+    if report_type == "inventory_summary":
+        return [
+            ["Metric", "Value"],
+            ["Total Items", data['total_items']],
+            ["Total Quantity", data['total_quantity']],
+            ["Total Value", f"${data['total_value']:.2f}"],
+            ["Out of Stock Count", data['out_of_stock_count']],
+            ["Low Stock Count", data['low_stock_count']],
+            ["Average Price", f"${data['average_price']:.2f}"],
+        ]
+
+    if report_type == "sales_report":
+        return [
+            ["Sales Report"],
+            ["Total Orders", data['total_orders']],
+            ["Total Quantity Sold", data['total_quantity_sold']],
+            ["Total Revenue", f"${data['total_revenue']:.2f}"],
+            ["Average Order Value", f"${data['average_order_value']:.2f}"],
+            [],
+            ["Top Selling Items"],
+            ["Name", "SKU", "Quantity Sold", "Revenue"],
+        ] + [
+            [item['name'], item['sku'], item['total_sold'], f"${item['revenue']:.2f}"]
+            for item in data['top_selling_items']
+        ]
+
+    if report_type == "purchase_report":
+        return [
+            ["Purchase Report"],
+            ["Total Orders", data['total_orders']],
+            ["Total Quantity Purchased", data['total_quantity_purchased']],
+            ["Total Cost", f"${data['total_cost']:.2f}"],
+            ["Average Order Cost", f"${data['average_order_cost']:.2f}"],
+            [],
+            ["Most Purchased Items"],
+            ["Name", "SKU", "Quantity", "Cost"],
+        ] + [
+            [item['name'], item['sku'], item['total_purchased'], f"${item['total_cost']:.2f}"]
+            for item in data['most_purchased_items']
+        ]
+
+    if report_type == "stock_movement":
+        return [["Name", "SKU", "Current Stock", "Purchased", "Sold", "Adjusted", "Net Change"]] + [
+            [item['name'], item['sku'], item['current_stock'], item['total_purchased'],
+             item['total_sold'], item['total_adjusted'], item['net_change']]
+            for item in data
+        ]
+
+    if report_type == "low_stock":
+        return [
+            ["Low Stock Report"],
+            [],
+            ["OUT OF STOCK"],
+            ["Name", "SKU", "Min Level", "Price"],
+        ] + [
+            [item['name'], item['sku'], item['min_stock_level'], f"${item['price']:.2f}"]
+            for item in data['out_of_stock']
+        ] + [
+            [],
+            ["LOW STOCK"],
+            ["Name", "SKU", "Quantity", "Min Level", "Price"],
+        ] + [
+            [item['name'], item['sku'], item['quantity'], item['min_stock_level'], f"${item['price']:.2f}"]
+            for item in data['low_stock']
+        ]
+
+    if report_type == "profit_analysis":
+        return [
+            ["Profit & Loss Analysis"],
+            ["Total Revenue", f"${data['total_revenue']:.2f}"],
+            ["Cost of Goods Sold", f"${data['total_cost']:.2f}"],
+            ["Gross Profit", f"${data['gross_profit']:.2f}"],
+            ["Profit Margin", f"{data['profit_margin_percent']:.2f}%"],
+            ["Sales Orders", data['total_sales_orders']],
+            ["Purchase Orders", data['total_purchase_orders']],
+        ]
+
+    raise ValueError(f"Unknown report type: {report_type}")
+
+
+def write_report_csv(filepath: str, rows: List[List[Any]]) -> None:
+    """Write report rows to a CSV file"""
+    with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
+        csv.writer(csvfile).writerows(rows)
+
+
+def append_report_sheet(workbook, report_type: str, rows: List[List[Any]]) -> None:
+    """Add report rows as a new sheet of a (write-only) openpyxl workbook"""
+    sheet = workbook.create_sheet(title=REPORT_TITLES[report_type])
+    for row in rows:
+        sheet.append(row)
+
+
+def export_report_detail(report_type: str, filepath: str, start_date: str = None, end_date: str = None,
+                         progress: Optional[Callable[[int, int], None]] = None,
+                         chunk_size: int = DETAIL_CHUNK_SIZE) -> Dict[str, Any]:
+    """
+    Export every row behind a report, without the on-screen row limits
+
+    Rows are written chunk by chunk as they come off the cursor, so memory
+    use stays flat however large the export. A .xlsx path writes a
+    write-only workbook; anything else writes CSV.
+
+    Args:
+        report_type: Key of DETAIL_HEADERS
+        filepath: Output file
+        start_date, end_date: Range for order-based reports
+        progress: Called as progress(rows_written, total_rows) after each chunk
+        chunk_size: Rows fetched and written per chunk
+
+    Returns:
+        Dict with success status, message, filepath and rows
+    """
+    if report_type not in DETAIL_HEADERS:
+        return {"success": False, "message": f"No full-detail export for report type: {report_type}"}
+
+    excel = filepath.lower().endswith(".xlsx")
+    if excel:
+        from utils.import_export import EXCEL_AVAILABLE
+        if not EXCEL_AVAILABLE:
+            return {"success": False, "message": "Excel support not available. Install openpyxl: pip install openpyxl"}
+
+    try:
+        total = count_report_detail(report_type, start_date, end_date)
+        written = 0
+        if excel:
+            import openpyxl
+            workbook = openpyxl.Workbook(write_only=True)
+            sheet = workbook.create_sheet(title=REPORT_TITLES[report_type])
+            sheet.append(DETAIL_HEADERS[report_type])
+            for chunk in iter_report_detail(report_type, start_date, end_date, chunk_size):
+                for row in chunk:
+                    sheet.append(row)
+                written += len(chunk)
+                if progress:
+                    progress(written, total)
+            workbook.save(filepath)
+        else:
+            with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
+                writer = csv.writer(csvfile)
+                writer.writerow(DETAIL_HEADERS[report_type])
+                for chunk in iter_report_detail(report_type, start_date, end_date, chunk_size):
+                    writer.writerows(chunk)
+                    written += len(chunk)
+                    if progress:
+                        progress(written, total)
+
+        return {
+            "success": True,
+            "message": f"Successfully exported {written} records to {os.path.basename(filepath)}",
+            "filepath": filepath,
+            "rows": written
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "message": f"Export failed: {str(e)}"
+        }
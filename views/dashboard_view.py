@@ -1,7 +1,9 @@
+import os
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from controllers.inventory_controller import create_item, edit_item, remove_item, find_items
+from controllers.login_controller import logout
 from controllers.supplier_controller import create_supplier, list_suppliers, update_supplier, delete_supplier, search_suppliers
 from controllers.customer_controller import create_customer, list_customers, update_customer, delete_customer, search_customers
 from controllers.reports_controller import (
@@ -19,6 +21,24 @@ from controllers.sales_order_controller import (
 from models.user_model import create_user, delete_user, list_team_employees, list_all_users, update_user
 from utils.permissions import can_manage_inventory, can_manage_users, is_admin, is_staff, has_permission
 
+
+# Report ranges are day-granular and ranges ending now have no end date, so
+# picking the same range again hits the report cache.
+REPORT_RANGE_DAYS = {"last_7_days": 7, "last_30_days": 30, "last_90_days": 90}
+AUDIT_RANGE_DAYS = {"Today": 0, "Last 7 Days": 7, "Last 30 Days": 30, "Last 90 Days": 90}
+
+
+def report_date_range(range_type, today=None):
+    """(start_date, end_date) for a dashboard report range; end_date None means up to now"""
+    today = today or date.today()
+    if range_type == "today":
+        return today.isoformat(), None
+    if range_type in REPORT_RANGE_DAYS:
+        return (today - timedelta(days=REPORT_RANGE_DAYS[range_type])).isoformat(), None
+    if range_type == "this_year":
+        return today.replace(month=1, day=1).isoformat(), None
+    return None, None
+
 class DashboardPage(tk.Frame):
     def __init__(self, master, current_user: dict):
         super().__init__(master, bg="#f5f3ff")
@@ -1059,6 +1079,7 @@ class DashboardPage(tk.Frame):
     # ---- session / nav ----
     def _logout(self):
         if messagebox.askyesno("Log out", "Log out and return to sign-in?"):
+            logout(self.current_user.get("session_token"))
             app = self.winfo_toplevel()   # the root App()
             app.show_auth()               # swap back to AuthPage
 
@@ -1937,7 +1958,7 @@ class DashboardPage(tk.Frame):
                     self.po_table.insert("", "end", values=(
                         po["id"], po["order_number"], po["supplier_name"],
                         po["item_name"], po["quantity"],
-                        f"${po['unit_price']:.2f}", f"${po['total_price']:.2f}",
+                        f"${po['unit_price']:.2f}" if po['unit_price'] is not None else "Multiple", f"${po['total_price']:.2f}",
                         po["status"], po["created_at"][:16] if po["created_at"] else ""
                     ))
         except PermissionError as e:
@@ -2133,7 +2154,7 @@ class DashboardPage(tk.Frame):
                     self.so_table.insert("", "end", values=(
                         so["id"], so["order_number"], so["customer_name"],
                         so["item_name"], so["quantity"],
-                        f"${so['unit_price']:.2f}", f"${so['total_price']:.2f}",
+                        f"${so['unit_price']:.2f}" if so['unit_price'] is not None else "Multiple", f"${so['total_price']:.2f}",
                         so["status"], so["created_at"][:16] if so["created_at"] else ""
                     ))
         except PermissionError as e:
@@ -2747,14 +2768,8 @@ class DashboardPage(tk.Frame):
         # Calculate date range
         start_date = None
         date_range = self.audit_date_range_var.get()
-        if date_range == "Today":
-            start_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0).isoformat()
-        elif date_range == "Last 7 Days":
-            start_date = (datetime.now() - timedelta(days=7)).isoformat()
-        elif date_range == "Last 30 Days":
-            start_date = (datetime.now() - timedelta(days=30)).isoformat()
-        elif date_range == "Last 90 Days":
-            start_date = (datetime.now() - timedelta(days=90)).isoformat()
+        if date_range in AUDIT_RANGE_DAYS:
+            start_date = (date.today() - timedelta(days=AUDIT_RANGE_DAYS[date_range])).isoformat()
         
         # Fetch logs
         logs = filter_logs(
@@ -2824,14 +2839,8 @@ class DashboardPage(tk.Frame):
         
         start_date = None
         date_range = self.audit_date_range_var.get()
-        if date_range == "Today":
-            start_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0).isoformat()
-        elif date_range == "Last 7 Days":
-            start_date = (datetime.now() - timedelta(days=7)).isoformat()
-        elif date_range == "Last 30 Days":
-            start_date = (datetime.now() - timedelta(days=30)).isoformat()
-        elif date_range == "Last 90 Days":
-            start_date = (datetime.now() - timedelta(days=90)).isoformat()
+        if date_range in AUDIT_RANGE_DAYS:
+            start_date = (date.today() - timedelta(days=AUDIT_RANGE_DAYS[date_range])).isoformat()
         
         # Fetch all matching logs
         logs = filter_logs(
@@ -3027,30 +3036,7 @@ class DashboardPage(tk.Frame):
     
     def _calculate_date_range(self):
         """Calculate start and end dates based on selected range"""
-        from datetime import datetime, timedelta
-        
-        range_type = self.date_range_var.get()
-        now = datetime.now()
-        
-        if range_type == "all_time":
-            return None, None
-        elif range_type == "today":
-            start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-            return start.isoformat(), now.isoformat()
-        elif range_type == "last_7_days":
-            start = now - timedelta(days=7)
-            return start.isoformat(), now.isoformat()
-        elif range_type == "last_30_days":
-            start = now - timedelta(days=30)
-            return start.isoformat(), now.isoformat()
-        elif range_type == "last_90_days":
-            start = now - timedelta(days=90)
-            return start.isoformat(), now.isoformat()
-        elif range_type == "this_year":
-            start = now.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
-            return start.isoformat(), now.isoformat()
-        
-        return None, None
+        return report_date_range(self.date_range_var.get())
     
     def _generate_report(self):
         """Generate the selected report"""
@@ -3178,7 +3164,7 @@ class DashboardPage(tk.Frame):
             for item in data:
                 self.report_text.insert(tk.END, f"{item['name']} ({item['sku']})\n", "subheading")
                 self.report_text.insert(tk.END, f"  Current Stock: {item['current_stock']:,}\n", "normal")
-                self.report_text.insert(tk.END, f"  Purchased: +{item['total_purchased']:,} | Sold: -{item['total_sold']:,}\n", "normal")
+                self.report_text.insert(tk.END, f"  Purchased: +{item['total_purchased']:,} | Sold: -{item['total_sold']:,} | Adjusted: {item['total_adjusted']:+,}\n", "normal")
                 self.report_text.insert(tk.END, f"  Net Change: {item['net_change']:+,}\n\n", "metric")
         else:
             self.report_text.insert(tk.END, "No stock movement in selected period.\n", "normal")
@@ -3227,110 +3213,76 @@ class DashboardPage(tk.Frame):
         
         self.report_text.insert(tk.END, "Financial Summary:\n", "heading")
         self.report_text.insert(tk.END, f"  Total Revenue (Sales): ${data['total_revenue']:,.2f}\n", "metric")
-        self.report_text.insert(tk.END, f"  Total Cost (Purchases): ${data['total_cost']:,.2f}\n", "metric")
+        self.report_text.insert(tk.END, f"  Cost of Goods Sold: ${data['total_cost']:,.2f}\n", "metric")
         self.report_text.insert(tk.END, f"  Gross Profit: ${data['gross_profit']:,.2f}\n", "metric")
-        self.report_text.insert(tk.END, f"  Profit Margin: {data['profit_margin_percent']:.2f}%\n\n", "metric")
+        self.report_text.insert(tk.END, f"  Profit Margin: {data['profit_margin_percent']:.2f}%\n", "metric")
+        self.report_text.insert(tk.END, f"  Purchases in Period: ${data['total_purchases']:,.2f}\n\n", "metric")
+        
+        if data['uncosted_revenue'] > 0:
+            self.report_text.insert(tk.END, f"  ⚠️  Revenue from items with no purchase history (no cost): ${data['uncosted_revenue']:,.2f}\n\n", "warning")
+        
+        if data['top_items']:
+            self.report_text.insert(tk.END, "Most Profitable Items:\n", "heading")
+            for idx, item in enumerate(data['top_items'], 1):
+                if item['gross_profit'] is None:
+                    break
+                self.report_text.insert(tk.END, f"  {idx}. {item['name']} ({item['sku']})\n", "subheading")
+                self.report_text.insert(tk.END, f"     Sold: {item['quantity_sold']:,} | Revenue: ${item['revenue']:,.2f} | COGS: ${item['cogs']:,.2f} | Margin: {item['margin_percent'] or 0:.2f}%\n", "normal")
+            self.report_text.insert(tk.END, "\n", "normal")
         
         self.report_text.insert(tk.END, "Order Statistics:\n", "heading")
         self.report_text.insert(tk.END, f"  Sales Orders Completed: {data['total_sales_orders']}\n", "normal")
         self.report_text.insert(tk.END, f"  Purchase Orders Completed: {data['total_purchase_orders']}\n", "normal")
     
     def _export_report(self):
-        """Export current report to CSV"""
+        """Export current report: every row behind it where available, otherwise the summary"""
         from tkinter import filedialog
-        import csv
+        from utils.report_export import report_rows, write_report_csv
+        from utils.import_export import EXCEL_AVAILABLE
+        from models.reports_model import DETAIL_HEADERS
+        from controllers.reports_controller import export_report_detail
         
         if not self.current_report_data:
             messagebox.showwarning("No Report", "Please generate a report first.")
             return
         
+        report_type = self.current_report_data['type']
+        full_detail = report_type in DETAIL_HEADERS
+        file_types = [("CSV files", "*.csv")]
+        if full_detail and EXCEL_AVAILABLE:
+            file_types.insert(0, ("Excel files", "*.xlsx"))
+        default_extension = file_types[0][1][1:]
+        
         # Ask for save location
         filename = filedialog.asksaveasfilename(
-            defaultextension=".csv",
-            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")],
-            initialfile=f"{self.current_report_data['type']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+            defaultextension=default_extension,
+            filetypes=file_types + [("All files", "*.*")],
+            initialfile=f"{report_type}_{datetime.now().strftime('%Y%m%d_%H%M%S')}{default_extension}"
         )
         
         if not filename:
             return
         
         try:
-            report_type = self.current_report_data['type']
-            data = self.current_report_data['data']
-            
-            with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-                if report_type == "inventory_summary":
-                    writer = csv.writer(csvfile)
-                    writer.writerow(["Metric", "Value"])
-                    writer.writerow(["Total Items", data['total_items']])
-                    writer.writerow(["Total Quantity", data['total_quantity']])
-                    writer.writerow(["Total Value", f"${data['total_value']:.2f}"])
-                    writer.writerow(["Out of Stock Count", data['out_of_stock_count']])
-                    writer.writerow(["Low Stock Count", data['low_stock_count']])
-                    writer.writerow(["Average Price", f"${data['average_price']:.2f}"])
-                
-                elif report_type in ["sales_report", "purchase_report"]:
-                    if report_type == "sales_report":
-                        writer = csv.writer(csvfile)
-                        writer.writerow(["Sales Report"])
-                        writer.writerow(["Total Orders", data['total_orders']])
-                        writer.writerow(["Total Quantity Sold", data['total_quantity_sold']])
-                        writer.writerow(["Total Revenue", f"${data['total_revenue']:.2f}"])
-                        writer.writerow(["Average Order Value", f"${data['average_order_value']:.2f}"])
-                        writer.writerow([])
-                        writer.writerow(["Top Selling Items"])
-                        writer.writerow(["Name", "SKU", "Quantity Sold", "Revenue"])
-                        for item in data['top_selling_items']:
-                            writer.writerow([item['name'], item['sku'], item['total_sold'], f"${item['revenue']:.2f}"])
-                    else:
-                        writer = csv.writer(csvfile)
-                        writer.writerow(["Purchase Report"])
-                        writer.writerow(["Total Orders", data['total_orders']])
-                        writer.writerow(["Total Quantity Purchased", data['total_quantity_purchased']])
-                        writer.writerow(["Total Cost", f"${data['total_cost']:.2f}"])
-                        writer.writerow(["Average Order Cost", f"${data['average_order_cost']:.2f}"])
-                        writer.writerow([])
-                        writer.writerow(["Most Purchased Items"])
-                        writer.writerow(["Name", "SKU", "Quantity", "Cost"])
-                        for item in data['most_purchased_items']:
-                            writer.writerow([item['name'], item['sku'], item['total_purchased'], f"${item['total_cost']:.2f}"])
+            if full_detail:
+                button_text = self.btn_export_report.cget("text")
                 
-                elif report_type == "stock_movement":
-                    writer = csv.DictWriter(csvfile, fieldnames=['Name', 'SKU', 'Current Stock', 'Purchased', 'Sold', 'Net Change'])
-                    writer.writeheader()
-                    for item in data:
-                        writer.writerow({
-                            'Name': item['name'],
-                            'SKU': item['sku'],
-                            'Current Stock': item['current_stock'],
-                            'Purchased': item['total_purchased'],
-                            'Sold': item['total_sold'],
-                            'Net Change': item['net_change']
-                        })
+                def show_progress(written, total):
+                    self.btn_export_report.config(text=f"Exporting... {written:,} / {total:,}")
+                    self.update_idletasks()
                 
-                elif report_type == "low_stock":
-                    writer = csv.writer(csvfile)
-                    writer.writerow(["Low Stock Report"])
-                    writer.writerow([])
-                    writer.writerow(["OUT OF STOCK"])
-                    writer.writerow(["Name", "SKU", "Min Level", "Price"])
-                    for item in data['out_of_stock']:
-                        writer.writerow([item['name'], item['sku'], item['min_stock_level'], f"${item['price']:.2f}"])
-                    writer.writerow([])
-                    writer.writerow(["LOW STOCK"])
-                    writer.writerow(["Name", "SKU", "Quantity", "Min Level", "Price"])
-                    for item in data['low_stock']:
-                        writer.writerow([item['name'], item['sku'], item['quantity'], item['min_stock_level'], f"${item['price']:.2f}"])
-                
-                elif report_type == "profit_analysis":
-                    writer = csv.writer(csvfile)
-                    writer.writerow(["Profit & Loss Analysis"])
-                    writer.writerow(["Total Revenue", f"${data['total_revenue']:.2f}"])
-                    writer.writerow(["Total Cost", f"${data['total_cost']:.2f}"])
-                    writer.writerow(["Gross Profit", f"${data['gross_profit']:.2f}"])
-                    writer.writerow(["Profit Margin", f"{data['profit_margin_percent']:.2f}%"])
-                    writer.writerow(["Sales Orders", data['total_sales_orders']])
-                    writer.writerow(["Purchase Orders", data['total_purchase_orders']])
+                try:
+                    result = export_report_detail(
+                        self.current_user, report_type, filename,
+                        self.current_report_data.get('start_date'), self.current_report_data.get('end_date'),
+                        progress=show_progress
+                    )
+                finally:
+                    self.btn_export_report.config(text=button_text)
+                if not result["success"]:
+                    raise RuntimeError(result["message"])
+            else:
+                write_report_csv(filename, report_rows(report_type, self.current_report_data['data']))
             
             messagebox.showinfo("Export Successful", f"Report exported to:\n{filename}")
         except Exception as e:
@@ -3498,7 +3450,7 @@ Reorder Point: {item['reorder_point']}
     
     def _regenerate_barcode(self, item_id, barcode_frame, parent_dialog):
         """Regenerate barcode for an item"""
-        from utils.barcode_utils import generate_barcode_number, update_item_barcode, get_barcode_tk_image
+        from utils.barcode_utils import assign_item_barcode, get_barcode_tk_image
         from models.inventory_model import get_item
         
         try:
@@ -3510,11 +3462,11 @@ Reorder Point: {item['reorder_point']}
             
             item = result.get("item")
             
-            # Generate new barcode
-            new_barcode = generate_barcode_number(item_id, item['sku'])
-            
-            # Update in database
-            update_item_barcode(item_id, new_barcode)
+            # Allocate the item's barcode, skipping codes held by other items
+            new_barcode = assign_item_barcode(item_id, item['sku'])
+            if not new_barcode:
+                messagebox.showerror("Error", "Failed to assign barcode")
+                return
             
             # Clear and update the barcode frame
             for widget in barcode_frame.winfo_children():
@@ -3694,7 +3646,12 @@ SENDER_EMAIL={entries["sender_email"].get().strip()}
 SENDER_PASSWORD={entries["sender_password"].get().strip()}
 USE_TLS={'True' if use_tls_var.get() else 'False'}
 EMAIL_ENABLED={'True' if enabled_var.get() else 'False'}
+EMAIL_DIGEST_MINUTES={EMAIL_CONFIG['digest_minutes']}
 """
+                # keep the password hashing settings, which this dialog doesn't edit
+                env_content += "".join(f"{name}={os.environ[name]}\n"
+                                       for name in ("PASSWORD_HASHER", "SCRYPT_N", "PBKDF2_ITERATIONS")
+                                       if name in os.environ)
                 with open(".env", "w") as f:
                     f.write(env_content)
                 
@@ -3811,6 +3768,7 @@ EMAIL_ENABLED={'True' if enabled_var.get() else 'False'}
         from utils.import_export import (import_inventory_from_csv, import_inventory_from_excel, 
                                           EXCEL_AVAILABLE)
         from models.inventory_model import add_item
+        from utils.barcode_utils import normalize_barcode
         
         # Ask for file
         file_types = [("CSV files", "*.csv")]
@@ -3859,7 +3817,7 @@ EMAIL_ENABLED={'True' if enabled_var.get() else 'False'}
                     'price': item.get('price'),
                     'min_stock_level': item.get('min_stock_level', 10),
                     'reorder_point': item.get('reorder_point', 20),
-                    'barcode': item.get('barcode', '')
+                    'barcode': normalize_barcode(item.get('barcode')) or None
                 }
                 
                 add_item(payload)